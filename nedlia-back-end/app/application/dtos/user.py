@@ -1,9 +1,12 @@
 """User DTOs for application layer."""
 
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, List, Mapping, Optional
 
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, field_validator
+
+from app.domain.entities.user import User
+from app.domain.value_objects.common import PhoneNumber
 
 class UserCreateDTO(BaseModel):
     """DTO for creating a new user."""
@@ -19,18 +22,117 @@ class UserUpdateDTO(BaseModel):
     phone: Optional[str] = None
     password: Optional[str] = Field(None, min_length=8)
 
+class UserPatchDTO(BaseModel):
+    """DTO for merging changes into a user's free-form attributes.
+
+    Each attribute is a JSON Merge Patch: null removes a key, objects are
+    merged into existing objects, and other values replace what was there.
+    A null attribute is reset to an empty object.
+    """
+
+    preferences: Optional[Dict[str, Any]] = None
+    metadata: Optional[Dict[str, Any]] = None
+
+    class Config:
+        """Pydantic model configuration."""
+
+        extra = "forbid"
+
 class UserResponseDTO(BaseModel):
     """DTO for user response."""
     
     id: str
     email: EmailStr
+    first_name: str = ""
+    last_name: str = ""
     phone: Optional[str] = None
+    locale: str = "en-US"
     is_active: bool
     is_verified: bool
     created_at: datetime
     updated_at: datetime
 
+    @classmethod
+    def from_entity(cls, user: User) -> "UserResponseDTO":
+        """Build a response from a domain entity without re-validating it."""
+        return cls.model_construct(
+            id=user.id,
+            email=user.email.value,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            phone=str(user.phone) if user.phone else None,
+            locale=user.locale,
+            is_active=user.is_active,
+            is_verified=user.is_verified,
+            created_at=user.created_at,
+            updated_at=user.updated_at
+        )
+
+    @classmethod
+    def partial(cls, record: Mapping[str, Any]) -> "UserResponseDTO":
+        """Build a response holding only some fields, for sparse fieldsets.
+
+        Serialize it with ``include`` set to those fields.
+        """
+        return cls.model_construct(**record)
+
+    @field_validator("email", "phone", mode="before")
+    @classmethod
+    def unwrap_value_objects(cls, value: Any) -> Any:
+        """Accept domain value objects in place of plain strings."""
+        if isinstance(value, PhoneNumber):
+            return str(value)
+        return getattr(value, "value", value)
+
     class Config:
         """Pydantic model configuration."""
         
         from_attributes = True
+
+class UserAttributesDTO(BaseModel):
+    """DTO for a user's free-form attributes."""
+
+    id: str
+    preferences: Dict[str, Any]
+    metadata: Dict[str, Any]
+    updated_at: datetime
+
+    @classmethod
+    def from_entity(cls, user: User) -> "UserAttributesDTO":
+        """Build a response from a domain entity without re-validating it."""
+        return cls.model_construct(
+            id=user.id,
+            preferences=user.preferences,
+            metadata=user.metadata,
+            updated_at=user.updated_at
+        )
+
+class UserSearchResponseDTO(BaseModel):
+    """DTO for a page of user search results."""
+
+    items: List[UserResponseDTO]
+    # Pass back as ``cursor`` to get the next page; None on the last page
+    next_cursor: Optional[str] = None
+
+class UserCountResponseDTO(BaseModel):
+    """DTO for a count of users."""
+
+    count: int
+    # True when the total comes from collection metadata rather than a query
+    estimated: bool = False
+
+class UserChangeDTO(BaseModel):
+    """DTO for one entry of the user change feed."""
+
+    id: str
+    seq: int
+    user_id: str
+    type: str
+    occurred_at: datetime
+
+class UserChangeFeedDTO(BaseModel):
+    """DTO for a page of the user change feed."""
+
+    items: List[UserChangeDTO]
+    # Pass back as ``since`` to get the changes after this page
+    next_since: int
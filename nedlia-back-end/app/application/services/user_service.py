@@ -1,110 +1,250 @@
 """User service implementation."""
 
-from typing import List, Optional
-
-from app.application.dtos.user import UserCreateDTO, UserResponseDTO, UserUpdateDTO
+from typing import AbstractSet, List, Optional
+
+from app.application.dtos.user import (
+    UserAttributesDTO,
+    UserChangeDTO,
+    UserChangeFeedDTO,
+    UserCountResponseDTO,
+    UserCreateDTO,
+    UserPatchDTO,
+    UserResponseDTO,
+    UserSearchResponseDTO,
+    UserUpdateDTO,
+)
 from app.domain.entities.user import User
-from app.domain.exceptions.base import ConflictError, EntityNotFound
-from app.domain.repositories.user import UserRepository
+from app.domain.events.user import (
+    USER_ACTIVATED,
+    USER_CREATED,
+    USER_DEACTIVATED,
+    USER_DELETED,
+    USER_UPDATED,
+    USER_VERIFIED,
+    UserChange,
+)
+from app.domain.exceptions.base import BusinessRuleViolation, ConflictError, EntityNotFound
+from app.domain.repositories.unit_of_work import UnitOfWork
+from app.domain.repositories.user import UserSearchCriteria
+from app.domain.services.password_hasher import PasswordHasher
 from app.domain.value_objects.common import Email, Password, PhoneNumber
 
 class UserService:
     """User service for handling user-related operations."""
 
-    def __init__(self, user_repository: UserRepository) -> None:
-        self._repository = user_repository
+    def __init__(self, unit_of_work: UnitOfWork, password_hasher: PasswordHasher) -> None:
+        self._unit_of_work = unit_of_work
+        self._repository = unit_of_work.users
+        self._password_hasher = password_hasher
 
-    async def create_user(self, user_data: UserCreateDTO) -> UserResponseDTO:
-        """Create a new user."""
-        # Check if email exists
-        email = Email(user_data.email)
-        if await self._repository.email_exists(email):
-            raise ConflictError(f"Email {email.value} already exists")
-
-        # Create user entity
-        user = User(
-            email=email,
-            password=Password(user_data.password),
-            phone=PhoneNumber(user_data.phone) if user_data.phone else None
-        )
+    @property
+    def unit_of_work(self) -> UnitOfWork:
+        """Unit of work shared by this service's calls.
 
-        # Save user
-        created_user = await self._repository.add(user)
-        return UserResponseDTO.from_orm(created_user)
+        Wrap several calls in ``async with service.unit_of_work:`` to write
+        their changes in one batch when the block exits.
+        """
+        return self._unit_of_work
 
-    async def get_user(self, user_id: str) -> UserResponseDTO:
-        """Get user by ID."""
+    async def create_user(self, user_data: UserCreateDTO) -> UserResponseDTO:
+        """Create a new user."""
+        async with self._unit_of_work:
+            # Check if email exists
+            email = Email(user_data.email)
+            if await self._repository.email_exists(email):
+                raise ConflictError(f"Email {email.value} already exists")
+
+            # Create user entity
+            user = User(
+                email=email,
+                password=await self._hash_password(Password(user_data.password)),
+                phone=PhoneNumber(user_data.phone) if user_data.phone else None
+            )
+
+            # Save user
+            created_user = await self._repository.add(user)
+            self._unit_of_work.record(UserChange(created_user.id, USER_CREATED))
+        return UserResponseDTO.from_entity(created_user)
+
+    async def get_user(
+        self,
+        user_id: str,
+        fields: Optional[AbstractSet[str]] = None
+    ) -> UserResponseDTO:
+        """Get user by ID, loading only ``fields`` if given."""
+        if fields is not None:
+            record = await self._repository.get_fields(user_id, fields)
+            if record is None:
+                raise EntityNotFound(f"User {user_id} not found")
+            return UserResponseDTO.partial(record)
         user = await self._repository.get_by_id(user_id)
         if not user:
             raise EntityNotFound(f"User {user_id} not found")
-        return UserResponseDTO.from_orm(user)
+        return UserResponseDTO.from_entity(user)
 
     async def get_user_by_email(self, email: str) -> Optional[UserResponseDTO]:
         """Get user by email."""
         user = await self._repository.get_by_email(Email(email))
-        return UserResponseDTO.from_orm(user) if user else None
-
-    async def list_users(self, skip: int = 0, limit: int = 100) -> List[UserResponseDTO]:
-        """List users with pagination."""
+        return UserResponseDTO.from_entity(user) if user else None
+
+    async def list_users(
+        self,
+        skip: int = 0,
+        limit: int = 100,
+        fields: Optional[AbstractSet[str]] = None
+    ) -> List[UserResponseDTO]:
+        """List users with pagination, loading only ``fields`` if given."""
+        if fields is not None:
+            records = await self._repository.list_fields(fields, skip=skip, limit=limit)
+            return [UserResponseDTO.partial(record) for record in records]
         users = await self._repository.list(skip=skip, limit=limit)
-        return [UserResponseDTO.from_orm(user) for user in users]
-
-    async def update_user(self, user_id: str, user_data: UserUpdateDTO) -> UserResponseDTO:
-        """Update user."""
-        # Get existing user
-        user = await self._repository.get_by_id(user_id)
-        if not user:
-            raise EntityNotFound(f"User {user_id} not found")
-
-        # Update fields
-        if user_data.email:
-            new_email = Email(user_data.email)
-            if await self._repository.email_exists(new_email):
-                raise ConflictError(f"Email {new_email.value} already exists")
-            user.update_email(new_email)
+        return [UserResponseDTO.from_entity(user) for user in users]
+
+    async def search_users(
+        self,
+        criteria: UserSearchCriteria,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> UserSearchResponseDTO:
+        """Search users, one page at a time."""
+        users, next_cursor = await self._repository.search(criteria, limit=limit, cursor=cursor)
+        return UserSearchResponseDTO.model_construct(
+            items=[UserResponseDTO.from_entity(user) for user in users],
+            next_cursor=next_cursor
+        )
 
-        if user_data.phone:
-            user.update_phone(PhoneNumber(user_data.phone))
+    async def count_users(
+        self,
+        criteria: Optional[UserSearchCriteria] = None
+    ) -> UserCountResponseDTO:
+        """Count users matching the criteria, or all users."""
+        count = await self._repository.count(criteria)
+        return UserCountResponseDTO.model_construct(
+            count=count,
+            estimated=criteria is None or criteria.is_empty
+        )
 
-        if user_data.password:
-            user.update_password(Password(user_data.password))
+    async def list_changes(self, since: int = 0, limit: int = 100) -> UserChangeFeedDTO:
+        """List published user changes after a feed position."""
+        changes = await self._repository.changes(since=since, limit=limit)
+        return UserChangeFeedDTO.model_construct(
+            items=[
+                UserChangeDTO.model_construct(
+                    id=change.id,
+                    seq=change.seq,
+                    user_id=change.user_id,
+                    type=change.type,
+                    occurred_at=change.occurred_at
+                )
+                for change in changes
+            ],
+            next_since=changes[-1].seq if changes else since
+        )
 
-        # Save changes
-        updated_user = await self._repository.update(user)
-        return UserResponseDTO.from_orm(updated_user)
+    async def update_user(self, user_id: str, user_data: UserUpdateDTO) -> UserResponseDTO:
+        """Update user."""
+        # Changes stay unrecorded until the end, and any error discards them
+        async with self._unit_of_work:
+            # Get existing user
+            user = await self._get_existing(user_id)
+
+            # Update fields
+            if user_data.email:
+                new_email = Email(user_data.email)
+                if await self._repository.email_exists(new_email):
+                    raise ConflictError(f"Email {new_email.value} already exists")
+                user.update_email(new_email)
+
+            if user_data.phone:
+                user.update_phone(PhoneNumber(user_data.phone))
+
+            if user_data.password:
+                password = Password(user_data.password)
+                if user.password and user.password.hashed:
+                    same, _ = await self._password_hasher.verify(
+                        password.value, user.password.hashed
+                    )
+                    if same:
+                        raise BusinessRuleViolation("New password is same as current")
+                user.update_password(await self._hash_password(password))
+
+            # Save changes
+            updated_user = await self._repository.update(user)
+            self._unit_of_work.record(UserChange(user_id, USER_UPDATED))
+        return UserResponseDTO.from_entity(updated_user)
+
+    async def patch_user(self, user_id: str, patch: UserPatchDTO) -> UserAttributesDTO:
+        """Merge changes into a user's preferences and metadata.
+
+        Only the changed keys are written, not the whole profile.
+        """
+        async with self._unit_of_work:
+            user = await self._get_existing(user_id)
+            changes = user.merge_attributes(
+                {name: getattr(patch, name) for name in patch.model_fields_set}
+            )
+            if not changes.is_empty:
+                await self._repository.patch(user, changes)
+                self._unit_of_work.record(UserChange(user_id, USER_UPDATED))
+        return UserAttributesDTO.from_entity(user)
+
+    async def verify_password(self, user_id: str, password: str) -> bool:
+        """Check a user's password, upgrading its hash if the cost changed."""
+        async with self._unit_of_work:
+            user = await self._get_existing(user_id)
+            if not user.password or not user.password.hashed:
+                return False
+
+            valid, new_hash = await self._password_hasher.verify(password, user.password.hashed)
+            if valid and new_hash:
+                user.update_password(Password.from_trusted("", new_hash))
+                await self._repository.update(user)
+        return valid
 
     async def delete_user(self, user_id: str) -> bool:
         """Delete user."""
-        if not await self._repository.exists(user_id):
-            raise EntityNotFound(f"User {user_id} not found")
-        return await self._repository.delete(user_id)
+        async with self._unit_of_work:
+            if not await self._repository.exists(user_id):
+                raise EntityNotFound(f"User {user_id} not found")
+            deleted = await self._repository.delete(user_id)
+            self._unit_of_work.record(UserChange(user_id, USER_DELETED))
+        return deleted
 
     async def activate_user(self, user_id: str) -> UserResponseDTO:
         """Activate user."""
-        user = await self._repository.get_by_id(user_id)
-        if not user:
-            raise EntityNotFound(f"User {user_id} not found")
-        
-        user.activate()
-        updated_user = await self._repository.update(user)
-        return UserResponseDTO.from_orm(updated_user)
+        async with self._unit_of_work:
+            user = await self._get_existing(user_id)
+            user.activate()
+            updated_user = await self._repository.update(user)
+            self._unit_of_work.record(UserChange(user_id, USER_ACTIVATED))
+        return UserResponseDTO.from_entity(updated_user)
 
     async def deactivate_user(self, user_id: str) -> UserResponseDTO:
         """Deactivate user."""
-        user = await self._repository.get_by_id(user_id)
-        if not user:
-            raise EntityNotFound(f"User {user_id} not found")
-        
-        user.deactivate()
-        updated_user = await self._repository.update(user)
-        return UserResponseDTO.from_orm(updated_user)
+        async with self._unit_of_work:
+            user = await self._get_existing(user_id)
+            user.deactivate()
+            updated_user = await self._repository.update(user)
+            self._unit_of_work.record(UserChange(user_id, USER_DEACTIVATED))
+        return UserResponseDTO.from_entity(updated_user)
 
     async def verify_user(self, user_id: str) -> UserResponseDTO:
         """Verify user."""
+        async with self._unit_of_work:
+            user = await self._get_existing(user_id)
+            user.verify()
+            updated_user = await self._repository.update(user)
+            self._unit_of_work.record(UserChange(user_id, USER_VERIFIED))
+        return UserResponseDTO.from_entity(updated_user)
+
+    async def _hash_password(self, password: Password) -> Password:
+        """Hash a validated password, keeping only the hash."""
+        hashed = await self._password_hasher.hash(password.value)
+        return Password.from_trusted("", hashed)
+
+    async def _get_existing(self, user_id: str) -> User:
+        """Get a user by ID or raise if it does not exist."""
         user = await self._repository.get_by_id(user_id)
         if not user:
             raise EntityNotFound(f"User {user_id} not found")
-        
-        user.verify()
-        updated_user = await self._repository.update(user)
-        return UserResponseDTO.from_orm(updated_user)
+        return user
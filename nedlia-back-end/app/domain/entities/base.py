@@ -7,6 +7,8 @@ import uuid
 
 class BaseEntity(ABC):
     """Abstract base class for all domain entities."""
+
+    __slots__ = ("_id", "_created_at", "_updated_at")
     
     def __init__(
         self,
@@ -1,37 +1,89 @@
 """User profile entity."""
 
 from datetime import datetime
-from typing import Optional, Dict, Any
-from pydantic import EmailStr, Field
+from typing import Optional, Dict, Any, Mapping, Set
 
 from app.domain.entities.base import BaseEntity
+from app.domain.exceptions.base import BusinessRuleViolation, ValidationError
+from app.domain.value_objects.common import Email, Password, PhoneNumber
+from app.domain.value_objects.patch import AttributePatch, apply_merge_patch, merge_patch
+
+# Free-form attributes that can be changed with a merge patch
+MERGEABLE_ATTRIBUTES = frozenset({"preferences", "metadata"})
 
 class User(BaseEntity):
     """User profile entity synchronized with Okta."""
+
+    # Entities are hydrated in bulk on reads; slots keep each one small
+    __slots__ = (
+        "_email",
+        "_password",
+        "_phone",
+        "_is_active",
+        "_is_verified",
+        "first_name",
+        "last_name",
+        "okta_id",
+        "last_sync",
+        "avatar_url",
+        "locale",
+        "timezone",
+        "preferences",
+        "metadata",
+    )
     
     # Core fields
-    email: EmailStr
     first_name: str
     last_name: str
     
     # Okta integration
-    okta_id: str
-    is_active: bool = True
-    last_sync: datetime = Field(default_factory=datetime.utcnow)
+    okta_id: Optional[str]
+    last_sync: datetime
     
     # Extended profile
-    phone: Optional[str] = None
-    avatar_url: Optional[str] = None
-    locale: str = "en-US"
-    timezone: str = "UTC"
+    avatar_url: Optional[str]
+    locale: str
+    timezone: str
     
     # Custom attributes
-    preferences: Dict[str, Any] = Field(default_factory=dict)
-    metadata: Dict[str, Any] = Field(default_factory=dict)
-    
-    # Timestamps
-    created_at: datetime
-    updated_at: datetime
+    preferences: Dict[str, Any]
+    metadata: Dict[str, Any]
+
+    def __init__(
+        self,
+        email: Email,
+        password: Optional[Password] = None,
+        phone: Optional[PhoneNumber] = None,
+        is_active: bool = True,
+        is_verified: bool = False,
+        first_name: str = "",
+        last_name: str = "",
+        okta_id: Optional[str] = None,
+        last_sync: Optional[datetime] = None,
+        avatar_url: Optional[str] = None,
+        locale: str = "en-US",
+        timezone: str = "UTC",
+        preferences: Optional[Dict[str, Any]] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        entity_id: Optional[str] = None,
+        created_at: Optional[datetime] = None,
+        updated_at: Optional[datetime] = None
+    ) -> None:
+        super().__init__(entity_id, created_at, updated_at)
+        self._email = email
+        self._password = password
+        self._phone = phone
+        self._is_active = is_active
+        self._is_verified = is_verified
+        self.first_name = first_name
+        self.last_name = last_name
+        self.okta_id = okta_id
+        self.last_sync = last_sync or self.created_at
+        self.avatar_url = avatar_url
+        self.locale = locale
+        self.timezone = timezone
+        self.preferences = preferences if preferences is not None else {}
+        self.metadata = metadata if metadata is not None else {}
     
     @property
     def full_name(self) -> str:
@@ -40,10 +92,12 @@ class User(BaseEntity):
     
     def update_from_okta(self, okta_profile: dict) -> None:
         """Update user profile from Okta data."""
-        self.email = okta_profile.get("email", self.email)
+        if okta_profile.get("email"):
+            self._email = Email(okta_profile["email"])
+        if okta_profile.get("mobilePhone"):
+            self._phone = PhoneNumber(okta_profile["mobilePhone"])
         self.first_name = okta_profile.get("firstName", self.first_name)
         self.last_name = okta_profile.get("lastName", self.last_name)
-        self.phone = okta_profile.get("mobilePhone", self.phone)
         self.locale = okta_profile.get("locale", self.locale)
         self.timezone = okta_profile.get("timezone", self.timezone)
         self.last_sync = datetime.utcnow()
@@ -56,10 +110,10 @@ class User(BaseEntity):
     def to_okta_profile(self) -> dict:
         """Convert to Okta profile format."""
         return {
-            "email": self.email,
+            "email": self._email.value,
             "firstName": self.first_name,
             "lastName": self.last_name,
-            "mobilePhone": self.phone,
+            "mobilePhone": str(self._phone) if self._phone else None,
             "locale": self.locale,
             "timezone": self.timezone,
             "customAttributes": self.metadata
@@ -85,6 +139,11 @@ class User(BaseEntity):
         """Get user verification status."""
         return self._is_verified
 
+    @property
+    def password(self) -> Optional[Password]:
+        """Get user password."""
+        return self._password
+
     def activate(self) -> None:
         """Activate the user."""
         if self._is_active:
@@ -123,11 +182,33 @@ class User(BaseEntity):
 
     def update_password(self, new_password: Password) -> None:
         """Update user password."""
-        if self._password.value == new_password.value:
+        if self._password and self._password == new_password:
             raise BusinessRuleViolation("New password is same as current")
         self._password = new_password
         self._update_timestamp()
 
+    def merge_attributes(self, patches: Mapping[str, Any]) -> AttributePatch:
+        """Merge JSON Merge Patches into ``preferences`` and ``metadata``.
+
+        Returns the changes made, by dotted path. Nothing changes if any
+        patch is invalid.
+        """
+        updates: Dict[str, Any] = {}
+        removals: Set[str] = set()
+        for name, patch in patches.items():
+            if name not in MERGEABLE_ATTRIBUTES:
+                raise ValidationError(f"{name} cannot be merged")
+            changes = merge_patch(name, getattr(self, name), patch)
+            updates.update(changes.updates)
+            removals.update(changes.removals)
+        merged = AttributePatch(updates=updates, removals=frozenset(removals))
+        if merged.is_empty:
+            return merged
+        for name, patch in patches.items():
+            setattr(self, name, apply_merge_patch(getattr(self, name), patch))
+        self._update_timestamp()
+        return merged
+
     def to_dict(self) -> Dict[str, Any]:
         """Convert user to dictionary."""
         data = super().to_dict()
@@ -144,7 +225,8 @@ class User(BaseEntity):
         """Create user from dictionary."""
         return cls(
             email=Email(data["email"]),
-            password=Password(data.get("password", ""), data.get("hashed_password")),
+            # Only the hash is stored, so there is no plaintext to validate
+            password=Password.from_trusted(data.get("password", ""), data.get("hashed_password")),
             phone=PhoneNumber(data["phone"]) if data.get("phone") else None,
             is_active=data.get("is_active", True),
             is_verified=data.get("is_verified", False),
@@ -0,0 +1,29 @@
+"""User profile change events."""
+
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Optional
+from uuid import uuid4
+
+# Change types published to other services
+USER_CREATED = "user.created"
+USER_UPDATED = "user.updated"
+USER_DELETED = "user.deleted"
+USER_ACTIVATED = "user.activated"
+USER_DEACTIVATED = "user.deactivated"
+USER_VERIFIED = "user.verified"
+
+@dataclass(frozen=True)
+class UserChange:
+    """A change to a user profile that other services are told about.
+
+    Changes carry no profile data; consumers fetch the current profile.
+    """
+
+    user_id: str
+    type: str
+    occurred_at: datetime = field(default_factory=datetime.utcnow)
+    # Consumers that see the same change twice can tell by its ID
+    id: str = field(default_factory=lambda: str(uuid4()))
+    # Position in the change feed, assigned when the change is published
+    seq: Optional[int] = None
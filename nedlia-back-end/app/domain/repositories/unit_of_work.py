@@ -0,0 +1,53 @@
+"""Unit of work interface."""
+
+from abc import ABC, abstractmethod
+from types import TracebackType
+from typing import List, Optional, Type
+
+from app.domain.events.user import UserChange
+from app.domain.repositories.user import UserRepository
+
+class UnitOfWork(ABC):
+    """Abstract base class for units of work.
+
+    Repositories obtained from a unit of work record changes instead of
+    writing them. ``async with unit_of_work:`` blocks may be nested; changes
+    are committed when the outermost block exits and discarded if any block
+    raises. Recorded changes are written together with them.
+    """
+
+    users: UserRepository
+
+    def __init__(self) -> None:
+        self._depth = 0
+        self._changes: List[UserChange] = []
+
+    def record(self, change: UserChange) -> None:
+        """Record a change to publish once the unit of work commits."""
+        self._changes.append(change)
+
+    async def __aenter__(self) -> "UnitOfWork":
+        self._depth += 1
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        traceback: Optional[TracebackType]
+    ) -> None:
+        self._depth -= 1
+        if exc_type is not None:
+            self.rollback()
+        elif self._depth == 0:
+            await self.commit()
+
+    @abstractmethod
+    async def commit(self) -> None:
+        """Write all recorded changes."""
+        pass
+
+    @abstractmethod
+    def rollback(self) -> None:
+        """Discard all recorded changes."""
+        pass
@@ -1,11 +1,35 @@
 """User repository interface."""
 
 from abc import abstractmethod
-from typing import Optional
+from dataclasses import dataclass
+from typing import AbstractSet, Any, Dict, List, Optional, Tuple
 
 from app.domain.entities.user import User
+from app.domain.events.user import UserChange
 from app.domain.repositories.base import BaseRepository
 from app.domain.value_objects.common import Email
+from app.domain.value_objects.patch import AttributePatch
+
+@dataclass(frozen=True)
+class UserSearchCriteria:
+    """Criteria for searching users; all given criteria must match.
+
+    Prefixes and the email domain match regardless of case and accents.
+    """
+
+    email_prefix: Optional[str] = None
+    first_name_prefix: Optional[str] = None
+    last_name_prefix: Optional[str] = None
+    # Full-text search over names and email
+    text: Optional[str] = None
+    is_active: Optional[bool] = None
+    locale: Optional[str] = None
+    email_domain: Optional[str] = None
+
+    @property
+    def is_empty(self) -> bool:
+        """Whether no criteria are given, so every user matches."""
+        return all(value is None for value in vars(self).values())
 
 class UserRepository(BaseRepository[User]):
     """Interface for user repository."""
@@ -15,7 +39,66 @@ class UserRepository(BaseRepository[User]):
         """Get user by email."""
         pass
 
+    @abstractmethod
+    async def get_by_okta_id(self, okta_id: str) -> Optional[User]:
+        """Get user by Okta user ID."""
+        pass
+
     @abstractmethod
     async def email_exists(self, email: Email) -> bool:
         """Check if email exists."""
         pass
+
+    @abstractmethod
+    async def patch(self, entity: User, changes: AttributePatch) -> User:
+        """Write only the given changes to an updated user, and its timestamp."""
+        pass
+
+    @abstractmethod
+    async def get_fields(
+        self,
+        entity_id: str,
+        fields: AbstractSet[str]
+    ) -> Optional[Dict[str, Any]]:
+        """Get some of a user's attributes, by name, without loading the user.
+
+        The record always includes ``id``. Passwords cannot be read this way.
+        """
+        pass
+
+    @abstractmethod
+    async def list_fields(
+        self,
+        fields: AbstractSet[str],
+        skip: int = 0,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """List some of each user's attributes, paged like ``list``."""
+        pass
+
+    @abstractmethod
+    async def search(
+        self,
+        criteria: UserSearchCriteria,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[User], Optional[str]]:
+        """Search users, returning a page and the cursor for the next one.
+
+        The cursor is ``None`` on the last page.
+        """
+        pass
+
+    @abstractmethod
+    async def count(self, criteria: Optional[UserSearchCriteria] = None) -> int:
+        """Count users matching the criteria, or all users.
+
+        Counts may be a few seconds stale, and the total of all users is
+        estimated from collection metadata.
+        """
+        pass
+
+    @abstractmethod
+    async def changes(self, since: int = 0, limit: int = 100) -> List[UserChange]:
+        """Published changes after feed position ``since``, oldest first."""
+        pass
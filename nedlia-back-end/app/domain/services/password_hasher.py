@@ -0,0 +1,21 @@
+"""Password hashing interface."""
+
+from abc import ABC, abstractmethod
+from typing import Optional, Tuple
+
+class PasswordHasher(ABC):
+    """Abstract base class for password hashers."""
+
+    @abstractmethod
+    async def hash(self, password: str) -> str:
+        """Hash a plaintext password."""
+        pass
+
+    @abstractmethod
+    async def verify(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """Verify a password against a stored hash.
+
+        Returns whether the password matched and, if the stored hash was made
+        with outdated cost parameters, a replacement hash to persist.
+        """
+        pass
@@ -1,32 +1,106 @@
 """Base value object implementation."""
 
+import sys
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import Any
+from dataclasses import MISSING, dataclass, fields
+from functools import lru_cache
+from typing import Any, Callable, ClassVar, Optional, Tuple, Type, TypeVar
+
+V = TypeVar('V', bound='ValueObject')
 
 @dataclass(frozen=True)
 class ValueObject(ABC):
     """Abstract base class for value objects.
-    
+
     Value objects are immutable and their equality is based on their attributes,
-    not their identity.
+    not their identity. They are validated on creation.
+
+    Subclasses are declared with ``@dataclass(frozen=True, slots=True)``: no
+    per-instance ``__dict__``, and per-class generated ``__eq__``/``__hash__``
+    that take precedence over the generic ones below.
     """
 
+    __slots__ = ()
+
+    # String fields worth sharing between instances, e.g. country codes
+    _interned_fields: ClassVar[Tuple[str, ...]] = ()
+
+    def __post_init__(self) -> None:
+        """Intern repeated values, then validate invariants."""
+        if self._interned_fields:
+            _intern_fields(self)
+        self.validate()
+
     def __eq__(self, other: Any) -> bool:
         """Value objects are equal if all their attributes are equal."""
         if not isinstance(other, self.__class__):
             return False
-        return self.__dict__ == other.__dict__
+        return self._values() == other._values()
 
     def __hash__(self) -> int:
         """Hash based on the object's attributes."""
-        return hash(tuple(sorted(self.__dict__.items())))
+        return hash(self._values())
+
+    def _values(self) -> Tuple[Any, ...]:
+        """Field values in declaration order; works with or without slots."""
+        return tuple(getattr(self, spec[0]) for spec in _field_specs(self.__class__))
 
     @abstractmethod
     def validate(self) -> None:
         """Validate the value object's invariants.
-        
+
         Raises:
             ValidationError: If validation fails.
         """
         pass
+
+    @classmethod
+    def from_trusted(cls: Type[V], *args: Any, **kwargs: Any) -> V:
+        """Create a value object without running ``validate``.
+
+        Only for values that were validated before they were stored, such as
+        documents read back from our own database.
+        """
+        instance = object.__new__(cls)
+        specs = _field_specs(cls)
+        if not kwargs and len(args) == len(specs):
+            for spec, value in zip(specs, args):
+                object.__setattr__(instance, spec[0], value)
+        else:
+            for position, (name, default, factory) in enumerate(specs):
+                if position < len(args):
+                    value = args[position]
+                elif name in kwargs:
+                    value = kwargs[name]
+                elif factory is not None:
+                    value = factory()
+                elif default is not MISSING:
+                    value = default
+                else:
+                    raise TypeError(f"{cls.__name__}.from_trusted() missing value for '{name}'")
+                object.__setattr__(instance, name, value)
+        if cls._interned_fields:
+            _intern_fields(instance)
+        return instance
+
+def _intern_fields(instance: ValueObject) -> None:
+    """Replace interned string fields with their shared copies."""
+    for name in instance._interned_fields:
+        value = getattr(instance, name)
+        if type(value) is str:
+            object.__setattr__(instance, name, sys.intern(value))
+
+@lru_cache(maxsize=None)
+def _field_specs(
+    cls: Type[ValueObject]
+) -> Tuple[Tuple[str, Any, Optional[Callable[[], Any]]], ...]:
+    """Field names with their defaults, in constructor order."""
+    return tuple(
+        (
+            field.name,
+            field.default,
+            None if field.default_factory is MISSING else field.default_factory,
+        )
+        for field in fields(cls)
+        if field.init
+    )
@@ -2,12 +2,15 @@
 
 import re
 from dataclasses import dataclass
-from typing import Optional
+from typing import ClassVar, Optional, Tuple
 
-from app.domain.exceptions.validation import ValidationError
+from app.domain.exceptions.base import ValidationError
 from app.domain.value_objects.base import ValueObject
 
-@dataclass(frozen=True)
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+PHONE_PATTERN = re.compile(r'^\+?1?\d{9,15}$')
+
+@dataclass(frozen=True, slots=True)
 class Email(ValueObject):
     """Email value object with validation."""
     
@@ -15,8 +18,7 @@ class Email(ValueObject):
 
     def validate(self) -> None:
         """Validate email format."""
-        pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-        if not re.match(pattern, self.value):
+        if not EMAIL_PATTERN.match(self.value):
             raise ValidationError(f"Invalid email format: {self.value}")
 
     @property
@@ -29,7 +31,7 @@ class Email(ValueObject):
         """Get email local part."""
         return self.value.split('@')[0]
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Password(ValueObject):
     """Password value object with validation."""
     
@@ -47,17 +49,18 @@ class Password(ValueObject):
         if not any(c.isdigit() for c in self.value):
             raise ValidationError("Password must contain at least one number")
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class PhoneNumber(ValueObject):
     """Phone number value object with validation."""
     
     value: str
     country_code: str = "1"  # Default to US/Canada
 
+    _interned_fields: ClassVar[Tuple[str, ...]] = ("country_code",)
+
     def validate(self) -> None:
         """Validate phone number format."""
-        pattern = r'^\+?1?\d{9,15}$'
-        if not re.match(pattern, self.value):
+        if not PHONE_PATTERN.match(self.value):
             raise ValidationError(f"Invalid phone number format: {self.value}")
 
     def __str__(self) -> str:
@@ -0,0 +1,102 @@
+"""JSON Merge Patch (RFC 7396) of nested attributes, as targeted changes."""
+
+import copy
+from dataclasses import dataclass, field
+from typing import Any, Dict, FrozenSet, Iterable, Mapping, Optional, Set
+
+from app.domain.exceptions.base import ValidationError
+
+# Nesting levels a patch may reach below the attribute it patches
+MAX_PATCH_DEPTH = 8
+# Values set and keys removed by one patch of an attribute
+MAX_PATCH_PATHS = 200
+
+@dataclass(frozen=True)
+class AttributePatch:
+    """Values set and removed by dotted path, such as ``preferences.theme``.
+
+    No path is a prefix of another, so the changes can be applied in any
+    order, or as one targeted database update.
+    """
+
+    updates: Dict[str, Any] = field(default_factory=dict)
+    removals: FrozenSet[str] = frozenset()
+
+    @property
+    def is_empty(self) -> bool:
+        """Whether the patch changes nothing."""
+        return not self.updates and not self.removals
+
+def merge_patch(name: str, target: Optional[Mapping[str, Any]], patch: Any) -> AttributePatch:
+    """Changes made to attribute ``name`` by merging ``patch`` into ``target``.
+
+    ``None`` resets the attribute to an empty object. Keys become path
+    segments, so they cannot be empty, contain dots or start with ``$``.
+    """
+    if patch is None:
+        return AttributePatch(updates={name: {}})
+    if not isinstance(patch, Mapping):
+        raise ValidationError(f"{name} must be an object")
+    _check_nesting(name, patch, 1)
+    updates: Dict[str, Any] = {}
+    removals: Set[str] = set()
+    _collect(target or {}, patch, name, updates, removals)
+    if len(updates) + len(removals) > MAX_PATCH_PATHS:
+        raise ValidationError(f"A patch can change at most {MAX_PATCH_PATHS} values")
+    return AttributePatch(updates=updates, removals=frozenset(removals))
+
+def apply_merge_patch(target: Optional[Mapping[str, Any]], patch: Any) -> Dict[str, Any]:
+    """The result of merging ``patch`` into a copy of ``target``."""
+    if not isinstance(patch, Mapping):
+        return {}
+    result = dict(target or {})
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        elif isinstance(value, Mapping):
+            current = result.get(key)
+            result[key] = apply_merge_patch(current if isinstance(current, Mapping) else {}, value)
+        else:
+            result[key] = copy.deepcopy(value)
+    return result
+
+def _collect(
+    target: Mapping[str, Any],
+    patch: Mapping[str, Any],
+    prefix: str,
+    updates: Dict[str, Any],
+    removals: Set[str]
+) -> None:
+    """Gather the changes a patch makes below ``prefix``."""
+    for key, value in patch.items():
+        path = f"{prefix}.{key}"
+        if value is None:
+            if key in target:
+                removals.add(path)
+        elif isinstance(value, Mapping) and isinstance(target.get(key), Mapping):
+            # Merge into the existing object rather than replacing it
+            _collect(target[key], value, path, updates, removals)
+        else:
+            # Nulls inside a new object have nothing to remove
+            updates[path] = apply_merge_patch({}, value) if isinstance(value, Mapping) else value
+
+def _check_nesting(name: str, value: Any, level: int) -> None:
+    """Reject values nested too deep or with keys unusable in paths."""
+    children: Iterable[Any]
+    if isinstance(value, Mapping):
+        for key in value:
+            if (
+                not isinstance(key, str) or not key or "." in key
+                or key.startswith("$") or "\0" in key
+            ):
+                raise ValidationError(f"Invalid {name} key: {key!r}")
+        children = value.values()
+    elif isinstance(value, (list, tuple)):
+        # Arrays are stored whole, but their objects reach the database too
+        children = value
+    else:
+        return
+    if level > MAX_PATCH_DEPTH:
+        raise ValidationError(f"{name} cannot be nested more than {MAX_PATCH_DEPTH} levels deep")
+    for child in children:
+        _check_nesting(name, child, level + 1)
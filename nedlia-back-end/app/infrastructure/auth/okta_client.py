@@ -1,14 +1,62 @@
 """Okta client implementation."""
 
-from typing import Optional
+import asyncio
+import time
+from collections import defaultdict
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+import structlog
 from okta.client import Client as OktaClient
+from tenacity import (
+    AsyncRetrying,
+    retry_if_exception_type,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+
 from app.infrastructure.config.settings import get_settings
+from app.infrastructure.resilience.breaker import CircuitBreaker, CircuitOpenError
+from app.infrastructure.resilience.deadline import DeadlineExceeded, check_deadline
+from app.infrastructure.resilience.hedging import LatencyTracker, hedge
+from app.infrastructure.tracing.spans import traced
+
+T = TypeVar("T")
 
 settings = get_settings()
 
+logger = structlog.get_logger(__name__)
+
+class OktaUnavailableError(Exception):
+    """Okta answered with a server error or asked us to slow down."""
+
+# Failures a later try may not see: error responses, timed out tries and
+# connection errors, which the HTTP client raises as OSError subclasses
+_TRANSIENT_ERRORS = (OktaUnavailableError, asyncio.TimeoutError, OSError)
+
+# Shared by every client in the process, as they all call the same Okta org
+okta_breaker = CircuitBreaker(
+    "okta",
+    failure_threshold=settings.okta.breaker_failure_threshold,
+    recovery_timeout=settings.okta.breaker_recovery_seconds,
+    included=_TRANSIENT_ERRORS
+)
+
+def _check_available(resp: Any) -> None:
+    """Raise for responses that say nothing about the request itself."""
+    if resp.status_code == 429 or resp.status_code >= 500:
+        raise OktaUnavailableError(f"Okta responded {resp.status_code}")
+
 class OktaAuthClient:
-    """Okta authentication client."""
-    
+    """Okta authentication client.
+
+    Every call goes through the Okta circuit breaker, times out per try and
+    is retried with jittered backoff if the try failed transiently. Tries
+    are cut short by the request deadline, if there is one, and raise
+    ``DeadlineExceeded`` once it has passed. Other failures are reported as
+    before, returning ``None`` or ``False``, and come at once while the
+    circuit is open.
+    """
+
     def __init__(self):
         self.client = OktaClient({
             'orgUrl': str(settings.okta.org_url),
@@ -16,38 +64,134 @@ class OktaAuthClient:
         })
         self.issuer = str(settings.okta.issuer)
         self.audience = settings.okta.audience
+        self.breaker = okta_breaker
+        self._latencies: Dict[str, LatencyTracker] = defaultdict(LatencyTracker)
 
+    @traced("okta", "okta.get_user")
     async def get_user(self, user_id: str) -> Optional[dict]:
         """Get user from Okta."""
-        try:
+        async def fetch() -> Optional[dict]:
             user, resp = await self.client.get_user(user_id)
-            if resp.status_code == 200:
-                return user.profile
-            return None
-        except Exception:
+            _check_available(resp)
+            return user.profile if resp.status_code == 200 else None
+
+        try:
+            return await self._call(
+                "get_user", fetch, settings.okta.get_user_timeout_seconds, read=True
+            )
+        except DeadlineExceeded:
+            raise
+        except Exception as error:
+            self._failed("get_user", error)
             return None
 
+    @traced("okta", "okta.update_user")
     async def update_user(self, user_id: str, profile: dict) -> bool:
         """Update user in Okta."""
-        try:
+        async def update() -> bool:
             user, resp = await self.client.get_user(user_id)
+            _check_available(resp)
             if resp.status_code != 200:
                 return False
-            
+
+            # Merging the same profile again is harmless, so retries are safe
             user.profile = {**user.profile, **profile}
             _, resp = await self.client.update_user(user)
+            _check_available(resp)
             return resp.status_code == 200
-        except Exception:
+
+        try:
+            return await self._call(
+                "update_user", update, settings.okta.update_user_timeout_seconds
+            )
+        except DeadlineExceeded:
+            raise
+        except Exception as error:
+            self._failed("update_user", error)
             return False
 
+    @traced("okta", "okta.validate_token")
     async def validate_token(self, token: str) -> Optional[dict]:
         """Validate JWT token from Okta."""
-        try:
+        async def validate() -> Optional[dict]:
             jwt = await self.client.jwt.validate_token(
                 token,
                 self.issuer,
                 self.audience,
             )
             return jwt.claims if jwt else None
-        except Exception:
+
+        try:
+            return await self._call(
+                "validate_token", validate, settings.okta.validate_token_timeout_seconds, read=True
+            )
+        except DeadlineExceeded:
+            raise
+        except Exception as error:
+            self._failed("validate_token", error)
             return None
+
+    async def _call(
+        self,
+        operation: str,
+        call: Callable[[], Awaitable[T]],
+        timeout: float,
+        read: bool = False
+    ) -> T:
+        """Call Okta through the circuit breaker, retrying failed tries.
+
+        Reads are hedged, when enabled, once they run past the configured
+        percentile of their recent latencies.
+        """
+        retrying = AsyncRetrying(
+            stop=stop_after_attempt(settings.okta.retry_attempts),
+            wait=wait_random_exponential(multiplier=0.1, max=settings.okta.retry_max_wait_seconds),
+            # Anything else would fail the same way again
+            retry=retry_if_exception_type(_TRANSIENT_ERRORS),
+            reraise=True
+        )
+        return await retrying(self._try, operation, call, timeout, read)
+
+    async def _try(
+        self,
+        operation: str,
+        call: Callable[[], Awaitable[T]],
+        timeout: float,
+        read: bool
+    ) -> T:
+        """One try of a call, timed for the operation's latency percentiles."""
+        left = check_deadline()
+        cut_short = left is not None and left < timeout
+        latencies = self._latencies[operation]
+        delay = None
+        if read and settings.okta.hedging_enabled:
+            delay = latencies.percentile(settings.okta.hedging_percentile)
+        async with self.breaker.guard():
+            started = time.monotonic()
+            try:
+                result = await asyncio.wait_for(
+                    hedge(operation, call, delay), left if cut_short else timeout
+                )
+            except asyncio.TimeoutError:
+                if cut_short:
+                    # Okta may well have answered in its usual time
+                    raise DeadlineExceeded() from None
+                raise
+        latencies.record(time.monotonic() - started)
+        return result
+
+    def _failed(self, operation: str, error: Exception) -> None:
+        """Log a call that failed after its retries, or was failed fast."""
+        if isinstance(error, CircuitOpenError):
+            logger.info(
+                "okta_call_rejected",
+                operation=operation,
+                retry_after=round(error.retry_after, 1)
+            )
+            return
+        logger.warning(
+            "okta_call_failed",
+            operation=operation,
+            error_type=type(error).__name__,
+            error=str(error)
+        )
@@ -0,0 +1,133 @@
+"""bcrypt password hashing in a process pool."""
+
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Optional, Tuple, TypeVar
+
+from passlib.context import CryptContext
+from prometheus_client import Histogram
+
+from app.domain.services.password_hasher import PasswordHasher
+
+PASSWORD_HASH_QUEUE_TIME = Histogram(
+    "password_hash_queue_seconds",
+    "Time password operations wait for a hashing slot and a worker",
+    ["operation"]
+)
+
+PASSWORD_HASH_DURATION = Histogram(
+    "password_hash_duration_seconds",
+    "Time password operations spend running in a worker",
+    ["operation"]
+)
+
+T = TypeVar("T")
+
+# Worker-side functions: module level so the process pool can pickle them.
+# Each returns its result together with wall-clock start and finish times.
+
+@lru_cache(maxsize=None)
+def _crypt_context(rounds: int) -> CryptContext:
+    """Get the bcrypt context for a cost, built once per worker process."""
+    # Hashes below the current cost are deprecated, so verify flags them
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds
+    )
+
+def _hash_password(password: str, rounds: int) -> Tuple[str, float, float]:
+    """Hash a password."""
+    started = time.time()
+    hashed = _crypt_context(rounds).hash(password)
+    return hashed, started, time.time()
+
+def _verify_password(
+    password: str,
+    hashed: str,
+    rounds: int
+) -> Tuple[Tuple[bool, Optional[str]], float, float]:
+    """Verify a password, returning a new hash if the stored one is outdated."""
+    started = time.time()
+    result = _crypt_context(rounds).verify_and_update(password, hashed)
+    return result, started, time.time()
+
+def _load_backend(rounds: int) -> None:
+    """Import and load bcrypt, so the worker's first operation does not."""
+    _crypt_context(rounds).handler().get_backend()
+
+class ProcessPoolPasswordHasher(PasswordHasher):
+    """Password hasher that keeps bcrypt off the event loop.
+
+    Hashes run in a process pool, so they neither block the loop nor hold the
+    GIL. At most ``max_concurrency`` operations are handed to the pool at a
+    time; the rest wait on a semaphore. A burst of user creation therefore
+    queues here instead of occupying every core the worker's reads need.
+    """
+
+    def __init__(
+        self,
+        rounds: int = 12,
+        workers: int = 2,
+        max_concurrency: int = 4,
+        executor: Optional[Executor] = None
+    ) -> None:
+        self._rounds = rounds
+        self._workers = workers
+        self._executor = executor
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def hash(self, password: str) -> str:
+        """Hash a plaintext password."""
+        return await self._run("hash", _hash_password, password, self._rounds)
+
+    async def verify(self, password: str, hashed: str) -> Tuple[bool, Optional[str]]:
+        """Verify a password against a stored hash."""
+        return await self._run("verify", _verify_password, password, hashed, self._rounds)
+
+    async def warm_up(self) -> None:
+        """Start every worker process ahead of the first operation."""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        # Concurrent tasks make the pool start a process for each
+        await asyncio.gather(*(
+            loop.run_in_executor(executor, _load_backend, self._rounds)
+            for _ in range(self._workers)
+        ))
+
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _run(
+        self,
+        operation: str,
+        func: Callable[..., Tuple[T, float, float]],
+        *args: Any
+    ) -> T:
+        """Run a worker function and record its queue and run times."""
+        submitted = time.time()
+        async with self._semaphore:
+            result, started, finished = await asyncio.get_running_loop().run_in_executor(
+                self._get_executor(), func, *args
+            )
+        PASSWORD_HASH_QUEUE_TIME.labels(operation=operation).observe(max(0.0, started - submitted))
+        PASSWORD_HASH_DURATION.labels(operation=operation).observe(finished - started)
+        return result
+
+    def _get_executor(self) -> Executor:
+        """Get the process pool, starting it on first use."""
+        if self._executor is None:
+            # Forking a process that runs an event loop and driver threads is
+            # unsafe, so workers start fresh
+            self._executor = ProcessPoolExecutor(
+                max_workers=self._workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
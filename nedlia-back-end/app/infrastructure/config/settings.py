@@ -1,6 +1,6 @@
 """Application configuration settings."""
 
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from pydantic import Field, RedisDsn, HttpUrl, SecretStr
 from pydantic_settings import BaseSettings
 
@@ -13,6 +13,18 @@ class DatabaseSettings(BaseSettings):
     max_idle_time_ms: int = Field(30000, env='DB_MAX_IDLE_TIME_MS')
     connect_timeout_ms: int = Field(20000, env='DB_CONNECT_TIMEOUT_MS')
     server_selection_timeout_ms: int = Field(30000, env='DB_SERVER_SELECTION_TIMEOUT_MS')
+    # List, search and export reads; "primary" keeps them off secondaries
+    bulk_read_preference: str = Field('secondaryPreferred', env='DB_BULK_READ_PREFERENCE')
+    # MongoDB requires at least 90 seconds
+    max_staleness_seconds: int = Field(90, env='DB_MAX_STALENESS_SECONDS')
+    causal_consistency: bool = Field(True, env='DB_CAUSAL_CONSISTENCY')
+    # Commands at least this slow are logged with their collection
+    slow_command_ms: int = Field(100, env='DB_SLOW_COMMAND_MS')
+    # User counts are reused this long unless users are added or deleted
+    count_cache_ttl_seconds: float = Field(5.0, env='DB_COUNT_CACHE_TTL_SECONDS')
+    # Partition name to connection string; profiles are spread across these
+    # by ID, and the deployment at DB_URL keeps the lookup table and outbox
+    partitions: Dict[str, str] = Field(default_factory=dict, env='DB_PARTITIONS')
 
     class Config:
         env_prefix = "DB_"
@@ -26,6 +38,131 @@ class RedisSettings(BaseSettings):
     class Config:
         env_prefix = "REDIS_"
 
+class PasswordHashingSettings(BaseSettings):
+    """Password hashing configuration settings."""
+    rounds: int = Field(12, env='PASSWORD_HASH_ROUNDS')
+    workers: int = Field(2, env='PASSWORD_HASH_WORKERS')
+    max_concurrency: int = Field(4, env='PASSWORD_HASH_MAX_CONCURRENCY')
+
+    class Config:
+        env_prefix = "PASSWORD_HASH_"
+
+class TracingSettings(BaseSettings):
+    """Request tracing configuration settings."""
+    sample_rate: float = Field(0.1, env='TRACING_SAMPLE_RATE')
+    # "log", "memory" or "none"
+    exporter: str = Field('log', env='TRACING_EXPORTER')
+    max_spans: int = Field(256, env='TRACING_MAX_SPANS')
+
+    class Config:
+        env_prefix = "TRACING_"
+
+class ProfilingSettings(BaseSettings):
+    """On-demand profiling configuration settings."""
+    # Requests sending this in X-Profile-Token are profiled; unset disables
+    token: Optional[SecretStr] = Field(None, env='PROFILING_TOKEN')
+    # Requests running longer are profiled from then on; unset disables
+    latency_threshold_ms: Optional[int] = Field(None, env='PROFILING_LATENCY_THRESHOLD_MS')
+    interval_ms: int = Field(5, env='PROFILING_INTERVAL_MS')
+    max_concurrent: int = Field(4, env='PROFILING_MAX_CONCURRENT')
+    output_dir: str = Field('profiles', env='PROFILING_OUTPUT_DIR')
+    max_profiles: int = Field(100, env='PROFILING_MAX_PROFILES')
+    max_age_hours: int = Field(24, env='PROFILING_MAX_AGE_HOURS')
+
+    class Config:
+        env_prefix = "PROFILING_"
+
+class LoopMonitorSettings(BaseSettings):
+    """Event loop monitoring configuration settings."""
+    interval_ms: int = Field(100, env='LOOP_MONITOR_INTERVAL_MS')
+    # The loop thread's stack is logged when it is blocked this long
+    block_threshold_ms: int = Field(250, env='LOOP_MONITOR_BLOCK_THRESHOLD_MS')
+
+    class Config:
+        env_prefix = "LOOP_MONITOR_"
+
+class OutboxSettings(BaseSettings):
+    """Change outbox relay configuration settings."""
+    # "redis", "log" or "none"
+    sink: str = Field('log', env='OUTBOX_SINK')
+    stream: str = Field('user-changes', env='OUTBOX_STREAM')
+    # Older entries are trimmed from the stream, approximately
+    stream_max_length: int = Field(100000, env='OUTBOX_STREAM_MAX_LENGTH')
+    batch_size: int = Field(100, env='OUTBOX_BATCH_SIZE')
+    poll_interval_ms: int = Field(500, env='OUTBOX_POLL_INTERVAL_MS')
+    # Another worker's relay takes over this long after the holder stops
+    lease_seconds: int = Field(10, env='OUTBOX_LEASE_SECONDS')
+
+    class Config:
+        env_prefix = "OUTBOX_"
+
+class LiveUpdateSettings(BaseSettings):
+    """Live profile update stream configuration settings."""
+    # Comment lines keep idle connections open through proxies
+    heartbeat_seconds: float = Field(15.0, env='LIVE_UPDATES_HEARTBEAT_SECONDS')
+    # Subscribers further behind than this are disconnected and must resume
+    max_pending: int = Field(100, env='LIVE_UPDATES_MAX_PENDING')
+    # Recent events kept per worker for clients resuming with Last-Event-ID
+    replay_size: int = Field(1000, env='LIVE_UPDATES_REPLAY_SIZE')
+    max_user_ids: int = Field(50, env='LIVE_UPDATES_MAX_USER_IDS')
+
+    class Config:
+        env_prefix = "LIVE_UPDATES_"
+
+class RateLimitSettings(BaseSettings):
+    """Request rate limiting configuration settings."""
+    # "redis" shares limits across workers; "local" keeps them per worker
+    backend: str = Field('redis', env='RATE_LIMIT_BACKEND')
+    # Limits such as "600/minute" or "10/30seconds"
+    default: str = Field('600/minute', env='RATE_LIMIT_DEFAULT')
+    # Per-route limits, keyed by method and route path, applied on top of
+    # the default; e.g. {"POST /api/v1/users": "30/minute"}
+    routes: Dict[str, str] = Field(
+        default_factory=lambda: {
+            "POST /api/v1/users": "60/minute",
+            "GET /api/v1/users/search": "120/minute",
+        },
+        env='RATE_LIMIT_ROUTES'
+    )
+    # Paths never limited, by prefix
+    exempt_paths: List[str] = Field(
+        default_factory=lambda: ["/metrics", "/api/v1/health"],
+        env='RATE_LIMIT_EXEMPT_PATHS'
+    )
+    # Identify anonymous clients by X-Forwarded-For; only behind a proxy
+    trust_forwarded_for: bool = Field(False, env='RATE_LIMIT_TRUST_FORWARDED_FOR')
+    # Trusted proxies in front of the service, each appending to the header
+    forwarded_for_hops: int = Field(1, env='RATE_LIMIT_FORWARDED_FOR_HOPS')
+    key_prefix: str = Field('ratelimit', env='RATE_LIMIT_KEY_PREFIX')
+    redis_timeout_ms: int = Field(50, env='RATE_LIMIT_REDIS_TIMEOUT_MS')
+    # After a Redis failure, limits are kept per worker this long
+    fallback_seconds: float = Field(5.0, env='RATE_LIMIT_FALLBACK_SECONDS')
+    local_max_keys: int = Field(10000, env='RATE_LIMIT_LOCAL_MAX_KEYS')
+
+    class Config:
+        env_prefix = "RATE_LIMIT_"
+
+class IdempotencySettings(BaseSettings):
+    """Idempotency key configuration settings."""
+    # Mutating requests under these paths honor Idempotency-Key
+    paths: List[str] = Field(
+        default_factory=lambda: ["/api/v1/users", "/api/v1/webhooks"],
+        env='IDEMPOTENCY_PATHS'
+    )
+    # Responses are replayed for this long after the first request
+    ttl_seconds: int = Field(86400, env='IDEMPOTENCY_TTL_SECONDS')
+    # A key whose first request never finished can be reused after this
+    lock_seconds: int = Field(60, env='IDEMPOTENCY_LOCK_SECONDS')
+    # Repeats wait this long for the first request before getting 409
+    wait_seconds: float = Field(10.0, env='IDEMPOTENCY_WAIT_SECONDS')
+    # Larger responses are not stored
+    max_response_bytes: int = Field(1048576, env='IDEMPOTENCY_MAX_RESPONSE_BYTES')
+    key_prefix: str = Field('idempotency', env='IDEMPOTENCY_KEY_PREFIX')
+    redis_timeout_ms: int = Field(100, env='IDEMPOTENCY_REDIS_TIMEOUT_MS')
+
+    class Config:
+        env_prefix = "IDEMPOTENCY_"
+
 class APISettings(BaseSettings):
     """API configuration settings."""
     title: str = Field('Nedlia User Profile Service', env='API_TITLE')
@@ -38,6 +175,75 @@ class APISettings(BaseSettings):
     class Config:
         env_prefix = "API_"
 
+class ServerSettings(BaseSettings):
+    """HTTP server and lifecycle configuration settings."""
+    host: str = Field('0.0.0.0', env='SERVER_HOST')
+    port: int = Field(8000, env='SERVER_PORT')
+    workers: int = Field(1, env='SERVER_WORKERS')
+    # Startup waits this long for connections and caches to warm up
+    warm_up_timeout_seconds: float = Field(10.0, env='SERVER_WARM_UP_TIMEOUT_SECONDS')
+    # Time between reporting not ready and no longer accepting connections,
+    # for load balancers to stop sending requests
+    drain_delay_seconds: float = Field(5.0, env='SERVER_DRAIN_DELAY_SECONDS')
+    # In-flight requests still running this long after that are cancelled
+    shutdown_timeout_seconds: int = Field(20, env='SERVER_SHUTDOWN_TIMEOUT_SECONDS')
+
+    class Config:
+        env_prefix = "SERVER_"
+
+class ConcurrencyLimitSettings(BaseSettings):
+    """Adaptive concurrency limit configuration settings."""
+    # Requests each worker lets run at once, before and while adapting
+    initial_limit: int = Field(20, env='CONCURRENCY_LIMIT_INITIAL_LIMIT')
+    min_limit: int = Field(4, env='CONCURRENCY_LIMIT_MIN_LIMIT')
+    max_limit: int = Field(200, env='CONCURRENCY_LIMIT_MAX_LIMIT')
+    # How far latency may rise over its long-term average before the limit shrinks
+    tolerance: float = Field(1.5, env='CONCURRENCY_LIMIT_TOLERANCE')
+    # Weight of each request in moving the limit
+    smoothing: float = Field(0.2, env='CONCURRENCY_LIMIT_SMOOTHING')
+    # Share of the limit normal priority requests leave to high priority ones
+    headroom: float = Field(0.1, env='CONCURRENCY_LIMIT_HEADROOM')
+    # Priority class by path prefix: "critical" is never shed, "high" is
+    # shed after "normal", the class of every other path
+    priorities: Dict[str, str] = Field(
+        default_factory=lambda: {
+            "/metrics": "critical",
+            "/api/v1/health": "critical",
+            "/api/v1/webhooks": "high",
+        },
+        env='CONCURRENCY_LIMIT_PRIORITIES'
+    )
+    # Paths never limited, by prefix; long-lived streams would hold slots
+    exempt_paths: List[str] = Field(
+        default_factory=lambda: ["/api/v1/users/events"],
+        env='CONCURRENCY_LIMIT_EXEMPT_PATHS'
+    )
+    # Seconds shed requests are told to wait before retrying
+    retry_after_seconds: int = Field(1, env='CONCURRENCY_LIMIT_RETRY_AFTER_SECONDS')
+
+    class Config:
+        env_prefix = "CONCURRENCY_LIMIT_"
+
+class DeadlineSettings(BaseSettings):
+    """Request deadline configuration settings."""
+    # Seconds a request may take unless its route or client says otherwise
+    default_seconds: float = Field(10.0, env='DEADLINE_DEFAULT_SECONDS')
+    # Per-route deadlines, keyed by method and route path
+    routes: Dict[str, float] = Field(
+        default_factory=lambda: {"POST /api/v1/webhooks/okta": 20.0},
+        env='DEADLINE_ROUTES'
+    )
+    # Longest deadline clients may ask for with X-Request-Timeout
+    max_seconds: float = Field(30.0, env='DEADLINE_MAX_SECONDS')
+    # Paths without a deadline, by prefix; streams stay open on purpose
+    exempt_paths: List[str] = Field(
+        default_factory=lambda: ["/metrics", "/api/v1/users/events"],
+        env='DEADLINE_EXEMPT_PATHS'
+    )
+
+    class Config:
+        env_prefix = "DEADLINE_"
+
 class OktaSettings(BaseSettings):
     """Okta configuration settings."""
     org_url: HttpUrl = Field(..., env='OKTA_ORG_URL')
@@ -46,6 +252,19 @@ class OktaSettings(BaseSettings):
     api_token: SecretStr = Field(..., env='OKTA_API_TOKEN')
     issuer: HttpUrl = Field(..., env='OKTA_ISSUER')
     audience: str = Field('api://default', env='OKTA_AUDIENCE')
+    # Seconds each try of an Okta call may take before it counts as failed
+    get_user_timeout_seconds: float = Field(2.0, env='OKTA_GET_USER_TIMEOUT_SECONDS')
+    update_user_timeout_seconds: float = Field(5.0, env='OKTA_UPDATE_USER_TIMEOUT_SECONDS')
+    validate_token_timeout_seconds: float = Field(2.0, env='OKTA_VALIDATE_TOKEN_TIMEOUT_SECONDS')
+    # Tries per call, spaced by exponential backoff with full jitter
+    retry_attempts: int = Field(3, env='OKTA_RETRY_ATTEMPTS')
+    retry_max_wait_seconds: float = Field(1.0, env='OKTA_RETRY_MAX_WAIT_SECONDS')
+    # Failures in a row that open the circuit, and seconds it stays open
+    breaker_failure_threshold: int = Field(5, env='OKTA_BREAKER_FAILURE_THRESHOLD')
+    breaker_recovery_seconds: float = Field(30.0, env='OKTA_BREAKER_RECOVERY_SECONDS')
+    # Reads running past this latency percentile are sent a second time
+    hedging_enabled: bool = Field(False, env='OKTA_HEDGING_ENABLED')
+    hedging_percentile: float = Field(95.0, env='OKTA_HEDGING_PERCENTILE')
 
     class Config:
         env_prefix = "OKTA_"
@@ -62,6 +281,14 @@ class FeatureFlags(BaseSettings):
     """Feature flag settings."""
     metrics_enabled: bool = Field(True, env='METRICS_ENABLED')
     tracing_enabled: bool = Field(True, env='TRACING_ENABLED')
+    profiling_enabled: bool = Field(False, env='PROFILING_ENABLED')
+    loop_monitor_enabled: bool = Field(True, env='LOOP_MONITOR_ENABLED')
+    outbox_relay_enabled: bool = Field(True, env='OUTBOX_RELAY_ENABLED')
+    live_updates_enabled: bool = Field(True, env='LIVE_UPDATES_ENABLED')
+    rate_limit_enabled: bool = Field(True, env='RATE_LIMIT_ENABLED')
+    concurrency_limit_enabled: bool = Field(True, env='CONCURRENCY_LIMIT_ENABLED')
+    deadlines_enabled: bool = Field(True, env='DEADLINES_ENABLED')
+    idempotency_enabled: bool = Field(True, env='IDEMPOTENCY_ENABLED')
     profile_sync_enabled: bool = Field(True, env='PROFILE_SYNC_ENABLED')
     webhooks_enabled: bool = Field(True, env='WEBHOOKS_ENABLED')
 
@@ -71,10 +298,21 @@ class FeatureFlags(BaseSettings):
 class Settings(BaseSettings):
     """Application settings."""
     api: APISettings = Field(default_factory=APISettings)
+    server: ServerSettings = Field(default_factory=ServerSettings)
     db: DatabaseSettings = Field(default_factory=DatabaseSettings)
     redis: RedisSettings = Field(default_factory=RedisSettings)
     okta: OktaSettings = Field(default_factory=OktaSettings)
+    password_hashing: PasswordHashingSettings = Field(default_factory=PasswordHashingSettings)
     logging: LoggingSettings = Field(default_factory=LoggingSettings)
+    tracing: TracingSettings = Field(default_factory=TracingSettings)
+    profiling: ProfilingSettings = Field(default_factory=ProfilingSettings)
+    loop_monitor: LoopMonitorSettings = Field(default_factory=LoopMonitorSettings)
+    outbox: OutboxSettings = Field(default_factory=OutboxSettings)
+    live_updates: LiveUpdateSettings = Field(default_factory=LiveUpdateSettings)
+    rate_limit: RateLimitSettings = Field(default_factory=RateLimitSettings)
+    concurrency_limit: ConcurrencyLimitSettings = Field(default_factory=ConcurrencyLimitSettings)
+    deadline: DeadlineSettings = Field(default_factory=DeadlineSettings)
+    idempotency: IdempotencySettings = Field(default_factory=IdempotencySettings)
     features: FeatureFlags = Field(default_factory=FeatureFlags)
     cors_origins: List[str] = Field(["*"], env='CORS_ORIGINS')
 
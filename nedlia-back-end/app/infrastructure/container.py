@@ -0,0 +1,244 @@
+"""Application dependency container."""
+
+import asyncio
+from typing import Any, Awaitable, Dict, Optional, TypeVar, cast
+
+import structlog
+from fastapi import Request
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.application.dtos.user import UserResponseDTO
+from app.application.services.user_service import UserService
+from app.infrastructure.auth.password_hasher import ProcessPoolPasswordHasher
+from app.infrastructure.config.settings import Settings, get_settings
+from app.infrastructure.idempotency.store import IdempotencyStore, create_idempotency_store
+from app.infrastructure.outbox.relay import OutboxRelay, create_outbox_relay
+from app.infrastructure.persistence.database import open_connections
+from app.infrastructure.persistence.deadlines import DeadlineProxy
+from app.infrastructure.persistence.partitions import PartitionMap
+from app.infrastructure.persistence.repositories.partitioned_user import PartitionedUserRepository
+from app.infrastructure.persistence.repositories.user import MongoUserRepository
+from app.infrastructure.persistence.sessions import bulk_read_preference, supports_transactions
+from app.infrastructure.persistence.unit_of_work import MongoUnitOfWork
+from app.infrastructure.profiling.loop_monitor import EventLoopMonitor
+from app.infrastructure.profiling.profiler import RequestProfiler, create_request_profiler
+from app.infrastructure.ratelimit.concurrency import (
+    AdaptiveConcurrencyLimiter,
+    create_concurrency_limiter,
+)
+from app.infrastructure.ratelimit.limiter import RateLimiter, create_rate_limiter
+from app.infrastructure.streaming.hub import ProfileEventHub
+from app.infrastructure.tracing.exporters import SpanExporter, create_span_exporter
+from app.infrastructure.tracing.spans import TracedProxy
+
+logger = structlog.get_logger(__name__)
+
+T = TypeVar("T")
+
+class Container:
+    """Objects that live as long as the application.
+
+    Built once in the application lifespan and stored on ``app.state``.
+    Only the unit of work and the service bound to it are created per
+    request. Tests can pass their own collaborators, subclass the factory
+    methods, or assign a different container to ``app.state.container``.
+    """
+
+    def __init__(
+        self,
+        settings: Optional[Settings] = None,
+        mongo_client: Optional[AsyncIOMotorClient] = None,
+        user_repository: Optional[MongoUserRepository] = None,
+        password_hasher: Optional[ProcessPoolPasswordHasher] = None,
+        span_exporter: Optional[SpanExporter] = None,
+        partitions: Optional[PartitionMap] = None
+    ) -> None:
+        self.settings = settings or get_settings()
+        # Sessions need the client; without one requests run sessionless
+        self.mongo_client = mongo_client
+        # Deployments holding the profiles when they are partitioned
+        self.partitions = partitions
+        if user_repository is None:
+            if partitions is not None:
+                user_repository = PartitionedUserRepository(
+                    partitions,
+                    bulk_read_preference=bulk_read_preference(self.settings.db),
+                    count_cache_ttl=self.settings.db.count_cache_ttl_seconds
+                )
+            else:
+                user_repository = MongoUserRepository(
+                    bulk_read_preference=bulk_read_preference(self.settings.db),
+                    count_cache_ttl=self.settings.db.count_cache_ttl_seconds
+                )
+        self.user_repository = user_repository
+        if password_hasher is None:
+            hashing = self.settings.password_hashing
+            password_hasher = ProcessPoolPasswordHasher(
+                rounds=hashing.rounds,
+                workers=hashing.workers,
+                max_concurrency=hashing.max_concurrency
+            )
+        self.password_hasher = password_hasher
+        self.span_exporter = span_exporter or create_span_exporter(self.settings.tracing)
+        self.profiler: Optional[RequestProfiler] = (
+            create_request_profiler(self.settings.profiling)
+            if self.settings.features.profiling_enabled else None
+        )
+        loop_monitor = self.settings.loop_monitor
+        self.loop_monitor: Optional[EventLoopMonitor] = (
+            EventLoopMonitor(
+                interval=loop_monitor.interval_ms / 1000,
+                block_threshold=loop_monitor.block_threshold_ms / 1000
+            )
+            if self.settings.features.loop_monitor_enabled else None
+        )
+        self.outbox_relay: Optional[OutboxRelay] = (
+            create_outbox_relay(self.settings)
+            if self.settings.features.outbox_relay_enabled else None
+        )
+        live_updates = self.settings.live_updates
+        # Subscribers get the same fields as GET /users/{user_id}
+        self.profile_events: Optional[ProfileEventHub] = (
+            ProfileEventHub(
+                fields=UserResponseDTO.model_fields.keys(),
+                max_pending=live_updates.max_pending,
+                replay_size=live_updates.replay_size
+            )
+            if self.settings.features.live_updates_enabled else None
+        )
+        self.rate_limiter: Optional[RateLimiter] = (
+            create_rate_limiter(self.settings.rate_limit, self.settings.redis)
+            if self.settings.features.rate_limit_enabled else None
+        )
+        self.concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = (
+            create_concurrency_limiter(self.settings.concurrency_limit)
+            if self.settings.features.concurrency_limit_enabled else None
+        )
+        self.idempotency_store: Optional[IdempotencyStore] = (
+            create_idempotency_store(self.settings.idempotency, self.settings.redis)
+            if self.settings.features.idempotency_enabled else None
+        )
+
+        # Whether to take traffic: once warmed up, until draining starts
+        self.ready = False
+
+        # Collaborators as the service sees them; traced when tracing is on,
+        # and queries bounded by the request deadline when deadlines are on
+        self._tracing = self.settings.features.tracing_enabled
+        self._store = self._traced(self.user_repository, "repository")
+        if self.settings.features.deadlines_enabled:
+            self._store = cast(MongoUserRepository, DeadlineProxy(self._store))
+        self._hasher = self._traced(self.password_hasher, "password")
+
+    def unit_of_work(self) -> MongoUnitOfWork:
+        """Create a unit of work for one request."""
+        return MongoUnitOfWork(self._store)
+
+    def user_service(self) -> UserService:
+        """Create a user service bound to a new unit of work."""
+        return self._traced(UserService(self.unit_of_work(), self._hasher), "service")
+
+    async def start(self) -> None:
+        """Start background work; called once the event loop is running."""
+        if self.loop_monitor is not None:
+            self.loop_monitor.start()
+        if self.mongo_client is not None:
+            # Transactions and change streams both need a replica set
+            replica_set = await supports_transactions(self.mongo_client)
+            self.user_repository.transactions = replica_set
+            if not replica_set:
+                logger.warning(
+                    "outbox_not_transactional",
+                    reason="MongoDB is not a replica set; changes may miss the outbox"
+                )
+            watched = None
+            if self.partitions is not None:
+                # Profile changes happen on the partitions, so those are watched
+                watched = [partition.collection for partition in self.partitions]
+                for partition in self.partitions:
+                    replica_set = replica_set and await supports_transactions(partition.client)
+            if replica_set and self.profile_events is not None:
+                self.profile_events.start(watched)
+        if self.outbox_relay is not None:
+            self.outbox_relay.start()
+        await self.warm_up()
+        self.ready = True
+
+    async def warm_up(self) -> None:
+        """Open connections, start workers and fill caches ahead of traffic.
+
+        Steps failing or running past the warm-up timeout are logged, not
+        raised; the first requests then pay for them as before.
+        """
+        min_pool_size = self.settings.db.min_pool_size
+        steps: Dict[str, Awaitable[Any]] = {
+            "password_hasher": self.password_hasher.warm_up(),
+            # Fills the count cache for the first listings
+            "user_count": self.user_repository.count(),
+        }
+        if self.mongo_client is not None:
+            steps["mongodb"] = open_connections(self.mongo_client, min_pool_size)
+        if self.partitions is not None:
+            for partition in self.partitions:
+                steps[f"mongodb:{partition.name}"] = open_connections(
+                    partition.client, min_pool_size
+                )
+        if self.rate_limiter is not None:
+            steps["rate_limiter"] = self.rate_limiter.warm_up()
+        if self.idempotency_store is not None:
+            steps["idempotency_store"] = self.idempotency_store.warm_up()
+
+        tasks = {name: asyncio.ensure_future(step) for name, step in steps.items()}
+        _, pending = await asyncio.wait(
+            tasks.values(), timeout=self.settings.server.warm_up_timeout_seconds
+        )
+        for name, task in tasks.items():
+            if task in pending:
+                task.cancel()
+                logger.warning("warm_up_timed_out", step=name)
+            elif task.exception() is not None:
+                logger.warning("warm_up_failed", step=name, error=str(task.exception()))
+
+    async def drain(self) -> None:
+        """Stop taking new work ahead of shutdown.
+
+        Readiness checks fail from here on, and live update streams end so
+        that their clients reconnect elsewhere rather than hold up shutdown.
+        """
+        self.ready = False
+        if self.profile_events is not None:
+            await self.profile_events.stop()
+
+    async def close(self) -> None:
+        """Release resources held by the container."""
+        if self.profile_events is not None:
+            await self.profile_events.stop()
+        if self.loop_monitor is not None:
+            await self.loop_monitor.stop()
+        if self.outbox_relay is not None:
+            await self.outbox_relay.stop()
+        if self.rate_limiter is not None:
+            await self.rate_limiter.close()
+        if self.idempotency_store is not None:
+            await self.idempotency_store.close()
+        self.password_hasher.shutdown()
+        self.span_exporter.shutdown()
+        if self.profiler is not None:
+            self.profiler.shutdown()
+
+    def _traced(self, target: T, kind: str) -> T:
+        """Wrap an object so its calls are traced, if tracing is enabled."""
+        return cast(T, TracedProxy(target, kind)) if self._tracing else target
+
+# Dependencies take only the request, so FastAPI has no signatures to
+# inspect or sub-dependencies to resolve per call.
+
+async def get_container(request: Request) -> Container:
+    """Get the application's container."""
+    container: Container = request.app.state.container
+    return container
+
+async def get_user_service(request: Request) -> UserService:
+    """Get a user service for the current request."""
+    container: Container = request.app.state.container
+    return container.user_service()
@@ -2,7 +2,7 @@
 
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
-from sqlalchemy.exc import IntegrityError
+from pymongo.errors import DuplicateKeyError
 
 from app.domain.exceptions.base import (
     BusinessRuleViolation,
@@ -10,6 +10,7 @@ from app.domain.exceptions.base import (
     EntityNotFound,
     ValidationError
 )
+from app.infrastructure.resilience.deadline import DeadlineExceeded
 
 def register_error_handlers(app: FastAPI) -> None:
     """Register error handlers with the FastAPI application."""
@@ -74,10 +75,10 @@ def register_error_handlers(app: FastAPI) -> None:
             }
         )
 
-    @app.exception_handler(IntegrityError)
+    @app.exception_handler(DuplicateKeyError)
     async def integrity_error_handler(
         request: Request,
-        exc: IntegrityError
+        exc: DuplicateKeyError
     ) -> JSONResponse:
         """Handle database integrity errors."""
         return JSONResponse(
@@ -89,6 +90,21 @@ def register_error_handlers(app: FastAPI) -> None:
             }
         )
 
+    @app.exception_handler(DeadlineExceeded)
+    async def deadline_error_handler(
+        request: Request,
+        exc: DeadlineExceeded
+    ) -> JSONResponse:
+        """Handle requests that ran out of time."""
+        return JSONResponse(
+            status_code=504,
+            content={
+                "error": "Gateway Timeout",
+                "detail": str(exc),
+                "request_id": getattr(request.state, "request_id", None)
+            }
+        )
+
     @app.exception_handler(Exception)
     async def general_error_handler(
         request: Request,
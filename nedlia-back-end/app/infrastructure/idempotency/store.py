@@ -0,0 +1,130 @@
+"""Stored responses for requests retried with an idempotency key."""
+
+import base64
+import json
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from redis import asyncio as aioredis
+
+from app.infrastructure.config.settings import IdempotencySettings, RedisSettings
+
+@dataclass(frozen=True)
+class StoredResponse:
+    """A response kept for replay, or a marker while it is produced."""
+
+    # Identifies the request the key was first used with
+    fingerprint: str
+    # None while the first request is still running
+    status: Optional[int] = None
+    headers: Tuple[Tuple[bytes, bytes], ...] = ()
+    body: bytes = b""
+
+    @property
+    def pending(self) -> bool:
+        """Whether the first request has not finished yet."""
+        return self.status is None
+
+    def dumps(self) -> str:
+        """Serialize for storage."""
+        return json.dumps({
+            "fingerprint": self.fingerprint,
+            "status": self.status,
+            "headers": [
+                [name.decode("latin-1"), value.decode("latin-1")] for name, value in self.headers
+            ],
+            "body": base64.b64encode(self.body).decode("ascii"),
+        })
+
+    @classmethod
+    def loads(cls, data: bytes) -> "StoredResponse":
+        """Deserialize from storage."""
+        record = json.loads(data)
+        return cls(
+            fingerprint=record["fingerprint"],
+            status=record["status"],
+            headers=tuple(
+                (name.encode("latin-1"), value.encode("latin-1"))
+                for name, value in record["headers"]
+            ),
+            body=base64.b64decode(record["body"])
+        )
+
+# Return the stored record, or reserve the key if there is none, in one
+# round trip
+_RESERVE_SCRIPT = """
+local stored = redis.call('GET', KEYS[1])
+if stored then
+    return stored
+end
+redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+return false
+"""
+
+class IdempotencyStore:
+    """Responses by idempotency key, kept in Redis for ``ttl`` seconds.
+
+    A key is reserved with a pending marker while its first request runs.
+    The marker expires after ``lock_ttl`` seconds, so a key whose request
+    died with its worker can be used again.
+    """
+
+    def __init__(
+        self,
+        redis: aioredis.Redis,
+        key_prefix: str = "idempotency",
+        ttl: float = 86400.0,
+        lock_ttl: float = 60.0
+    ) -> None:
+        self._redis = redis
+        self._reserve = redis.register_script(_RESERVE_SCRIPT)
+        self._key_prefix = key_prefix
+        self._ttl = ttl
+        self._lock_ttl = lock_ttl
+
+    async def reserve(self, key: str, fingerprint: str) -> Optional[StoredResponse]:
+        """Reserve a key for a new request; return its record if it has one."""
+        stored = await self._reserve(
+            keys=[self._name(key)],
+            args=[StoredResponse(fingerprint).dumps(), int(self._lock_ttl * 1000)]
+        )
+        return StoredResponse.loads(stored) if stored else None
+
+    async def complete(self, key: str, response: StoredResponse) -> None:
+        """Store the response to the key's first request."""
+        await self._redis.set(self._name(key), response.dumps(), px=int(self._ttl * 1000))
+
+    async def release(self, key: str) -> None:
+        """Forget a reserved key, so the request can be tried again."""
+        await self._redis.delete(self._name(key))
+
+    async def warm_up(self) -> None:
+        """Connect, and load the script so the first request need not send it."""
+        await self._redis.script_load(_RESERVE_SCRIPT)
+
+    async def close(self) -> None:
+        """Close the Redis connection pool."""
+        await self._redis.aclose()
+
+    def _name(self, key: str) -> str:
+        """The Redis key holding a record."""
+        return f"{self._key_prefix}:{key}"
+
+def create_idempotency_store(
+    settings: IdempotencySettings,
+    redis: RedisSettings
+) -> IdempotencyStore:
+    """Create a store on the configured Redis."""
+    timeout = settings.redis_timeout_ms / 1000
+    client = aioredis.from_url(
+        str(redis.url),
+        max_connections=redis.pool_size,
+        socket_timeout=timeout,
+        socket_connect_timeout=timeout
+    )
+    return IdempotencyStore(
+        client,
+        key_prefix=settings.key_prefix,
+        ttl=settings.ttl_seconds,
+        lock_ttl=settings.lock_seconds
+    )
@@ -6,7 +6,7 @@ from typing import Any, Dict
 
 import structlog
 
-from app.infrastructure.config import get_settings
+from app.infrastructure.config.settings import get_settings
 
 def configure_logging() -> None:
     """Configure logging for the application."""
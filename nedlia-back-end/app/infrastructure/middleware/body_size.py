@@ -0,0 +1,76 @@
+"""Request body size limiting middleware."""
+
+from typing import List, Sequence
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+class BodySizeLimitMiddleware:
+    """Middleware rejecting request bodies larger than ``max_bytes``.
+
+    Applies to requests using one of ``methods``. A larger declared
+    ``Content-Length`` is rejected before any of the body is read; other
+    bodies are read here, stopping as soon as they pass the limit, so the
+    application never parses one it would have to reject. Rejected requests
+    get 413.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        max_bytes: int,
+        methods: Sequence[str] = ("PATCH",)
+    ) -> None:
+        self.app = app
+        self.max_bytes = max_bytes
+        self.methods = frozenset(method.upper() for method in methods)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Read the body up to the limit, or reject the request."""
+        if scope["type"] != "http" or scope["method"] not in self.methods:
+            await self.app(scope, receive, send)
+            return
+
+        length = Headers(scope=scope).get("content-length", "")
+        if length.isdigit() and int(length) > self.max_bytes:
+            await self._reject(scope, receive, send)
+            return
+
+        chunks: List[bytes] = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                # The client went away before sending the whole request
+                return
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > self.max_bytes:
+                await self._reject(scope, receive, send)
+                return
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                break
+        await self.app(scope, _replay_body(b"".join(chunks), receive), send)
+
+    async def _reject(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Respond that the body is too large."""
+        response = JSONResponse(
+            {"detail": f"Request bodies are limited to {self.max_bytes} bytes"},
+            status_code=413
+        )
+        await response(scope, receive, send)
+
+def _replay_body(body: bytes, receive: Receive) -> Receive:
+    """A receive channel delivering an already read body first."""
+    delivered = False
+
+    async def replay() -> Message:
+        nonlocal delivered
+        if not delivered:
+            delivered = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return replay
@@ -0,0 +1,84 @@
+"""Load shedding middleware."""
+
+import time
+from typing import List, Mapping, Optional, Sequence, Tuple
+
+from prometheus_client import Counter
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.infrastructure.ratelimit.concurrency import NORMAL, PRIORITIES
+
+SHED_REQUESTS = Counter(
+    "shed_requests_total",
+    "Total count of requests rejected by the concurrency limit",
+    ["priority"]
+)
+
+class ConcurrencyLimitMiddleware:
+    """Middleware shedding requests a worker has no room for.
+
+    Each request takes a slot of the container's adaptive concurrency
+    limiter, by the priority class of the longest matching prefix in
+    ``priorities`` or normal priority otherwise. Requests finding no room
+    get 503 with ``Retry-After`` at once, so the ones admitted keep their
+    latency instead of all of them slowing down together. Requests pass
+    unlimited without a limiter, and on ``exempt_paths``.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        priorities: Optional[Mapping[str, str]] = None,
+        exempt_paths: Sequence[str] = (),
+        retry_after: int = 1
+    ) -> None:
+        self.app = app
+        self.exempt_paths = tuple(exempt_paths)
+        self.retry_after = retry_after
+        for priority in (priorities or {}).values():
+            if priority not in PRIORITIES:
+                raise ValueError(f"Unknown request priority: {priority}")
+        # Longest prefixes first, so more specific paths win
+        self._priorities: List[Tuple[str, str]] = sorted(
+            (priorities or {}).items(), key=lambda item: len(item[0]), reverse=True
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run the request if there is room for it, or reject it."""
+        limiter = (
+            scope["app"].state.container.concurrency_limiter if scope["type"] == "http" else None
+        )
+        if limiter is None or scope["path"].startswith(self.exempt_paths):
+            await self.app(scope, receive, send)
+            return
+
+        priority = self._priority(scope["path"])
+        if not limiter.try_acquire(priority):
+            SHED_REQUESTS.labels(priority=priority).inc()
+            response = JSONResponse(
+                {"detail": "Server is busy, retry later"},
+                status_code=503,
+                headers={"Retry-After": str(self.retry_after)}
+            )
+            await response(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        latency = None
+        try:
+            await self.app(scope, receive, send)
+            latency = time.perf_counter() - started
+        except Exception:
+            latency = time.perf_counter() - started
+            raise
+        finally:
+            # Cancelled requests, such as those of departed clients, are not timed
+            limiter.release(latency)
+
+    def _priority(self, path: str) -> str:
+        """Priority class of a request path."""
+        for prefix, priority in self._priorities:
+            if path.startswith(prefix):
+                return priority
+        return NORMAL
@@ -0,0 +1,53 @@
+"""Read-your-writes consistency middleware."""
+
+from typing import Awaitable, Callable
+
+from fastapi import FastAPI, Request, Response
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.infrastructure.persistence.sessions import (
+    CONSISTENCY_TOKEN_HEADER,
+    encode_token,
+    reset_session,
+    resume_session,
+    use_session,
+)
+
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+class CausalConsistencyMiddleware(BaseHTTPMiddleware):
+    """Middleware giving each client read-your-writes consistency.
+
+    Writes run in a causally consistent session, and the position they
+    reached is returned in the ``X-Consistency-Token`` header. Requests that
+    send the token back resume from that position, so their reads, including
+    those routed to secondaries, wait until the node has applied the
+    client's writes. Reads without a token skip the session entirely.
+    """
+
+    def __init__(self, app: FastAPI) -> None:
+        super().__init__(app)
+
+    async def dispatch(
+        self,
+        request: Request,
+        call_next: Callable[[Request], Awaitable[Response]]
+    ) -> Response:
+        """Run the request inside a session when consistency is needed."""
+        token = request.headers.get(CONSISTENCY_TOKEN_HEADER)
+        client = request.app.state.container.mongo_client
+        if client is None or (token is None and request.method in SAFE_METHODS):
+            return await call_next(request)
+
+        async with await client.start_session(causal_consistency=True) as session:
+            resume_session(session, token)
+            previous = use_session(session)
+            try:
+                response = await call_next(request)
+            finally:
+                reset_session(previous)
+
+            new_token = encode_token(session)
+            if new_token:
+                response.headers[CONSISTENCY_TOKEN_HEADER] = new_token
+        return response
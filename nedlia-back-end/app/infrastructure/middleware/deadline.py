@@ -0,0 +1,145 @@
+"""Request deadline middleware."""
+
+import asyncio
+import contextlib
+from typing import Dict, List, Mapping, Optional, Pattern, Sequence, Tuple
+
+from prometheus_client import Counter
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.routing import compile_path
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.infrastructure.resilience.deadline import (
+    REQUEST_TIMEOUT_HEADER,
+    reset_deadline,
+    set_deadline,
+)
+
+ABANDONED_REQUESTS = Counter(
+    "abandoned_requests_total",
+    "Total count of requests cancelled before they finished",
+    ["reason"]
+)
+
+class DeadlineMiddleware:
+    """Middleware bounding how long each request may run.
+
+    A request's deadline is the ``X-Request-Timeout`` header, in seconds and
+    capped at ``max_timeout``, or else its route's entry in
+    ``route_timeouts``, keyed like ``GET /api/v1/users/search``, or else
+    ``default_timeout``. It is made current for the code serving the
+    request, which bounds its MongoDB and Okta calls by it.
+
+    The request is cancelled once the deadline passes, getting 504 if no
+    response was started, or as soon as the client disconnects before the
+    whole response was sent. Disconnects after that are expected, so the
+    request still runs until it finishes or its deadline passes. To notice
+    disconnects while the request runs, the middleware reads the request
+    body on the application's behalf and hands it over a chunk at a time.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        default_timeout: float,
+        route_timeouts: Optional[Mapping[str, float]] = None,
+        max_timeout: Optional[float] = None,
+        exempt_paths: Sequence[str] = ()
+    ) -> None:
+        self.app = app
+        self.default_timeout = default_timeout
+        self.max_timeout = max_timeout
+        self.exempt_paths = tuple(exempt_paths)
+        # Route timeouts by method, with the pattern matching their paths
+        self._route_timeouts: Dict[str, List[Tuple[Pattern[str], float]]] = {}
+        for route, timeout in (route_timeouts or {}).items():
+            method, _, path = route.partition(" ")
+            pattern = compile_path(path)[0]
+            self._route_timeouts.setdefault(method.upper(), []).append((pattern, timeout))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run the request until it finishes, runs out of time or is abandoned."""
+        if scope["type"] != "http" or scope["path"].startswith(self.exempt_paths):
+            await self.app(scope, receive, send)
+            return
+
+        timeout = self._timeout(scope)
+        messages: "asyncio.Queue[Message]" = asyncio.Queue(maxsize=1)
+        disconnected = asyncio.Event()
+        response_started = False
+        response_complete = False
+
+        async def listen() -> None:
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    disconnected.set()
+                    return
+                await messages.put(message)
+
+        async def receive_forwarded() -> Message:
+            if disconnected.is_set() and messages.empty():
+                return {"type": "http.disconnect"}
+            return await messages.get()
+
+        async def send_tracking(message: Message) -> None:
+            nonlocal response_started, response_complete
+            if message["type"] == "http.response.start":
+                response_started = True
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                response_complete = True
+            await send(message)
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        # Tasks copy the context they are created in, deadline included
+        token = set_deadline(timeout)
+        try:
+            handler = asyncio.ensure_future(self.app(scope, receive_forwarded, send_tracking))
+        finally:
+            reset_deadline(token)
+        # Returns only once the client disconnects
+        listener = asyncio.ensure_future(listen())
+        try:
+            await asyncio.wait(
+                {handler, listener}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            if listener.done() and response_complete and not handler.done():
+                # The client has its answer; the rest is the request's cleanup,
+                # such as storing an idempotent response or running background tasks
+                await asyncio.wait({handler}, timeout=max(deadline - loop.time(), 0.0))
+        finally:
+            listener.cancel()
+            unfinished = not handler.done()
+            if unfinished:
+                handler.cancel()
+                with contextlib.suppress(BaseException):
+                    await handler
+
+        if not unfinished:
+            # Errors are raised for the outer middleware to see
+            handler.result()
+            return
+        if disconnected.is_set() and not response_complete:
+            ABANDONED_REQUESTS.labels(reason="disconnect").inc()
+            return
+        ABANDONED_REQUESTS.labels(reason="deadline").inc()
+        if not response_started:
+            response = JSONResponse({"detail": "Request deadline exceeded"}, status_code=504)
+            await response(scope, receive, send)
+
+    def _timeout(self, scope: Scope) -> float:
+        """Seconds the request may take."""
+        requested = Headers(scope=scope).get(REQUEST_TIMEOUT_HEADER)
+        if requested:
+            try:
+                timeout = float(requested)
+            except ValueError:
+                timeout = 0.0
+            if timeout > 0:
+                return min(timeout, self.max_timeout) if self.max_timeout else timeout
+        for pattern, timeout in self._route_timeouts.get(scope["method"], ()):
+            if pattern.match(scope["path"]):
+                return timeout
+        return self.default_timeout
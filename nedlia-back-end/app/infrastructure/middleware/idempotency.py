@@ -0,0 +1,282 @@
+"""Idempotency key middleware."""
+
+import asyncio
+import hashlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import structlog
+from prometheus_client import Counter
+from redis.exceptions import RedisError
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.infrastructure.idempotency.store import IdempotencyStore, StoredResponse
+
+logger = structlog.get_logger(__name__)
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+IDEMPOTENT_REPLAYED_HEADER = "Idempotent-Replayed"
+
+MUTATING_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+
+MAX_KEY_LENGTH = 255
+
+# Set by the CORS middleware for each request's own origin, so never stored
+_CORS_HEADER_PREFIX = b"access-control-"
+
+IDEMPOTENT_REPLAYS = Counter(
+    "idempotent_replays_total",
+    "Total count of responses replayed for a repeated idempotency key"
+)
+
+IDEMPOTENCY_STORE_FAILURES = Counter(
+    "idempotency_store_failures_total",
+    "Total count of requests run without idempotency because Redis failed"
+)
+
+class _StillRunning(Exception):
+    """The key's first request did not finish within the wait timeout."""
+
+# Polling for a first request running in another worker
+_POLL_INITIAL = 0.025
+_POLL_MAX = 0.5
+
+class IdempotencyMiddleware:
+    """Middleware replaying the response to requests sent again with a key.
+
+    Mutating requests under ``paths`` that carry an ``Idempotency-Key``
+    run once; later requests with the same key get the stored response,
+    marked with ``Idempotent-Replayed: true``, without reaching the route.
+    Requests arriving while the first is still running wait up to
+    ``wait_timeout`` seconds for its response, on a future when the first
+    runs in this worker and by polling Redis otherwise, and get 409 if it
+    takes longer. Server errors are not stored, so those requests can be
+    retried. A key reused with a different request gets 422.
+
+    Keys are scoped to the request's credentials, so one client cannot read
+    another's responses. If Redis fails, requests run as if they had no key.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        paths: Sequence[str] = (),
+        wait_timeout: float = 10.0,
+        max_response_bytes: int = 1 << 20
+    ) -> None:
+        self.app = app
+        self.paths = tuple(paths)
+        self.wait_timeout = wait_timeout
+        self.max_response_bytes = max_response_bytes
+        # Responses of first requests running in this worker, by scoped key;
+        # None if the request failed and was not stored
+        self._inflight: Dict[str, "asyncio.Future[Optional[StoredResponse]]"] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run the request once per key, replaying the response afterwards."""
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in MUTATING_METHODS
+            or not scope["path"].startswith(self.paths)
+        ):
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        key = headers.get(IDEMPOTENCY_KEY_HEADER)
+        store = scope["app"].state.container.idempotency_store
+        if key is None or store is None:
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            response = JSONResponse(
+                {"detail": f"{IDEMPOTENCY_KEY_HEADER} must be 1 to {MAX_KEY_LENGTH} characters"},
+                status_code=400
+            )
+            await response(scope, receive, send)
+            return
+
+        body = await _read_body(receive)
+        if body is None:
+            # The client went away before sending the whole request
+            return
+        fingerprint = _fingerprint(scope, body)
+        scoped_key = _scoped_key(key, headers)
+        try:
+            stored = await self._claim(store, scoped_key, fingerprint)
+        except (RedisError, OSError) as error:
+            logger.warning("idempotency_store_failed", error=str(error))
+            IDEMPOTENCY_STORE_FAILURES.inc()
+            await self.app(scope, _replay_body(body, receive), send)
+            return
+        except _StillRunning:
+            response = JSONResponse(
+                {"detail": "A request with this Idempotency-Key is still in progress"},
+                status_code=409,
+                headers={"Retry-After": "1"}
+            )
+            await response(scope, receive, send)
+            return
+
+        if stored is not None:
+            await self._replay(stored, fingerprint, scope, receive, send)
+            return
+        await self._run_first(store, scoped_key, fingerprint, scope, body, receive, send)
+
+    async def _claim(
+        self,
+        store: IdempotencyStore,
+        key: str,
+        fingerprint: str
+    ) -> Optional[StoredResponse]:
+        """Reserve the key, or wait for its first request's response.
+
+        Returns None once the key is reserved for this request. Raises
+        ``_StillRunning`` if the first request runs too long.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.wait_timeout
+        poll = _POLL_INITIAL
+        while True:
+            remaining = deadline - loop.time()
+            inflight = self._inflight.get(key)
+            if inflight is not None:
+                # Duplicates in this worker wait without asking Redis
+                try:
+                    stored = await asyncio.wait_for(asyncio.shield(inflight), max(remaining, 0))
+                except asyncio.TimeoutError:
+                    raise _StillRunning() from None
+                if stored is not None:
+                    return stored
+                # The first request failed; this one can take the key
+                continue
+            stored = await store.reserve(key, fingerprint)
+            if stored is None:
+                self._inflight[key] = loop.create_future()
+                return None
+            if not stored.pending:
+                return stored
+            if remaining <= 0:
+                raise _StillRunning()
+            await asyncio.sleep(min(poll, remaining))
+            poll = min(poll * 2, _POLL_MAX)
+
+    async def _run_first(
+        self,
+        store: IdempotencyStore,
+        key: str,
+        fingerprint: str,
+        scope: Scope,
+        body: bytes,
+        receive: Receive,
+        send: Send
+    ) -> None:
+        """Run the key's first request and store its response."""
+        status: Optional[int] = None
+        response_headers: List[Tuple[bytes, bytes]] = []
+        chunks: List[bytes] = []
+        size = 0
+
+        async def send_capturing(message: Message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_headers.extend(
+                    (name, value) for name, value in message.get("headers", [])
+                    if not name.lower().startswith(_CORS_HEADER_PREFIX)
+                )
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                size += len(chunk)
+                if size <= self.max_response_bytes:
+                    chunks.append(chunk)
+            await send(message)
+
+        stored: Optional[StoredResponse] = None
+        try:
+            await self.app(scope, _replay_body(body, receive), send_capturing)
+            if status is not None and status < 500 and size <= self.max_response_bytes:
+                stored = StoredResponse(
+                    fingerprint=fingerprint,
+                    status=status,
+                    headers=tuple(response_headers),
+                    body=b"".join(chunks)
+                )
+        finally:
+            self._inflight.pop(key).set_result(stored)
+            try:
+                if stored is not None:
+                    await store.complete(key, stored)
+                else:
+                    await store.release(key)
+            except (RedisError, OSError) as error:
+                # A pending key left behind expires with its lock
+                logger.warning("idempotency_store_failed", error=str(error))
+                IDEMPOTENCY_STORE_FAILURES.inc()
+
+    async def _replay(
+        self,
+        stored: StoredResponse,
+        fingerprint: str,
+        scope: Scope,
+        receive: Receive,
+        send: Send
+    ) -> None:
+        """Send a stored response again."""
+        if stored.fingerprint != fingerprint:
+            response = JSONResponse(
+                {"detail": "Idempotency-Key was already used for a different request"},
+                status_code=422
+            )
+            await response(scope, receive, send)
+            return
+        IDEMPOTENT_REPLAYS.inc()
+        await send({
+            "type": "http.response.start",
+            "status": stored.status,
+            "headers": [
+                *stored.headers,
+                (IDEMPOTENT_REPLAYED_HEADER.lower().encode("latin-1"), b"true"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": stored.body})
+
+async def _read_body(receive: Receive) -> Optional[bytes]:
+    """Read the whole request body; None if the client disconnected."""
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            return None
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+def _replay_body(body: bytes, receive: Receive) -> Receive:
+    """A receive channel delivering an already read body first."""
+    delivered = False
+
+    async def replay() -> Message:
+        nonlocal delivered
+        if not delivered:
+            delivered = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return replay
+
+def _fingerprint(scope: Scope, body: bytes) -> str:
+    """Identify a request by its method, target and body."""
+    digest = hashlib.sha256()
+    for part in (scope["method"].encode(), scope["path"].encode(), scope["query_string"], body):
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+def _scoped_key(key: str, headers: Headers) -> str:
+    """Scope a client's key to the credentials it was sent with."""
+    digest = hashlib.sha256()
+    digest.update(headers.get("authorization", "").encode("latin-1"))
+    digest.update(b"\0")
+    digest.update(key.encode("utf-8"))
+    return digest.hexdigest()
@@ -0,0 +1,60 @@
+"""On-demand request profiling middleware."""
+
+import hmac
+import uuid
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+PROFILE_TOKEN_HEADER = "X-Profile-Token"
+PROFILE_ID_HEADER = "X-Profile-Id"
+
+class ProfilingMiddleware:
+    """Middleware profiling requests that ask for it or run slow.
+
+    Requests whose ``X-Profile-Token`` header matches the configured token
+    are profiled from the start. Others start being profiled once they run
+    past the profiler's latency threshold. Profiled responses carry the
+    profile's name in ``X-Profile-Id``. Must run inside
+    ``RequestLoggingMiddleware`` so profiles are named after the request ID.
+
+    Plain ASGI, so requests that are not profiled only pay for registering
+    with the sampler.
+    """
+
+    def __init__(self, app: ASGIApp, token: Optional[str] = None) -> None:
+        self.app = app
+        self.token = token.encode() if token else None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Run the request, profiling it if requested or slow."""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profiler = scope["app"].state.container.profiler
+        request_id = scope.get("state", {}).get("request_id") or str(uuid.uuid4())
+        session = profiler.begin(request_id, requested=self._is_requested(scope))
+        if session is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_profile_id(message: Message) -> None:
+            if message["type"] == "http.response.start" and session.active:
+                MutableHeaders(scope=message).append(
+                    PROFILE_ID_HEADER, profiler.profile_id(session)
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            await profiler.finish(session)
+
+    def _is_requested(self, scope: Scope) -> bool:
+        """Whether the request carries the profiling token."""
+        if self.token is None:
+            return False
+        value = Headers(scope=scope).get(PROFILE_TOKEN_HEADER)
+        return value is not None and hmac.compare_digest(value.encode(), self.token)
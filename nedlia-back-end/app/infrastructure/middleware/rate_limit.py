@@ -0,0 +1,119 @@
+"""Request rate limiting middleware."""
+
+import math
+from typing import Dict, List, Mapping, Optional, Pattern, Sequence, Tuple
+
+from prometheus_client import Counter
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.routing import compile_path
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.infrastructure.ratelimit.limiter import RateLimit, RateLimitDecision
+
+RATE_LIMIT_LIMIT_HEADER = "RateLimit-Limit"
+RATE_LIMIT_REMAINING_HEADER = "RateLimit-Remaining"
+RATE_LIMIT_RESET_HEADER = "RateLimit-Reset"
+RATE_LIMIT_HEADERS = (
+    RATE_LIMIT_LIMIT_HEADER,
+    RATE_LIMIT_REMAINING_HEADER,
+    RATE_LIMIT_RESET_HEADER,
+)
+
+RATE_LIMITED_REQUESTS = Counter(
+    "rate_limited_requests_total",
+    "Total count of requests rejected by the rate limiter",
+    ["route"]
+)
+
+class RateLimitMiddleware:
+    """Middleware limiting how often each client can call the API.
+
+    Every client gets ``default_limit`` across all routes, and, on routes
+    listed in ``route_limits``, that route's limit as well. Route limits are
+    keyed by method and route path, such as ``POST /api/v1/users``, and
+    matched here because routing has not run yet. Clients are told by
+    address, or, behind trusted proxies, by the ``X-Forwarded-For`` entry
+    the outermost of ``forwarded_for_hops`` proxies appended; entries left
+    of it come from the client and could be anything. Credentials are not
+    verified at this point, so they cannot be used to tell clients apart.
+
+    Responses carry the ``RateLimit-*`` headers of the most restrictive
+    limit; rejected requests get 429 with ``Retry-After``. Counting uses the
+    container's rate limiter, and requests pass unlimited without one.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        default_limit: RateLimit,
+        route_limits: Optional[Mapping[str, RateLimit]] = None,
+        exempt_paths: Sequence[str] = (),
+        trust_forwarded_for: bool = False,
+        forwarded_for_hops: int = 1
+    ) -> None:
+        self.app = app
+        self.default_limit = default_limit
+        self.exempt_paths = tuple(exempt_paths)
+        self.trust_forwarded_for = trust_forwarded_for
+        self.forwarded_for_hops = max(1, forwarded_for_hops)
+        # Route limits by method, with the pattern matching their paths
+        self._route_limits: Dict[str, List[Tuple[Pattern[str], str, RateLimit]]] = {}
+        for route, limit in (route_limits or {}).items():
+            method, _, path = route.partition(" ")
+            pattern = compile_path(path)[0]
+            self._route_limits.setdefault(method.upper(), []).append((pattern, route, limit))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Count the request and reject it if the client is over a limit."""
+        limiter = scope["app"].state.container.rate_limiter if scope["type"] == "http" else None
+        if limiter is None or scope["path"].startswith(self.exempt_paths):
+            await self.app(scope, receive, send)
+            return
+
+        client = self._client(scope)
+        keys = [client]
+        limits = [self.default_limit]
+        limited_route = "default"
+        for pattern, route, limit in self._route_limits.get(scope["method"], ()):
+            if pattern.match(scope["path"]):
+                keys.append(f"{client}:{route}")
+                limits.append(limit)
+                limited_route = route
+                break
+        decision = await limiter.acquire(keys, limits)
+
+        if not decision.allowed:
+            RATE_LIMITED_REQUESTS.labels(route=limited_route).inc()
+            response = JSONResponse(
+                {"detail": "Too many requests"},
+                status_code=429,
+                headers={"Retry-After": str(math.ceil(decision.retry_after))}
+            )
+            self._add_headers(response.headers, decision)
+            await response(scope, receive, send)
+            return
+
+        async def send_with_limits(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                self._add_headers(MutableHeaders(scope=message), decision)
+            await send(message)
+
+        await self.app(scope, receive, send_with_limits)
+
+    def _client(self, scope: Scope) -> str:
+        """Identify the client making the request."""
+        if self.trust_forwarded_for:
+            forwarded = Headers(scope=scope).get("x-forwarded-for")
+            if forwarded:
+                # Each proxy appends the address it received the request from
+                entries = forwarded.split(",")
+                return entries[max(0, len(entries) - self.forwarded_for_hops)].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    def _add_headers(self, headers: MutableHeaders, decision: RateLimitDecision) -> None:
+        """Describe the most restrictive limit in the response headers."""
+        headers[RATE_LIMIT_LIMIT_HEADER] = str(decision.limit)
+        headers[RATE_LIMIT_REMAINING_HEADER] = str(decision.remaining)
+        headers[RATE_LIMIT_RESET_HEADER] = str(math.ceil(decision.reset_after))
@@ -0,0 +1,62 @@
+"""Request tracing middleware."""
+
+import random
+import uuid
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.infrastructure.tracing.spans import Trace, end_trace, span, start_trace
+
+SERVER_TIMING_HEADER = "Server-Timing"
+
+class TracingMiddleware:
+    """Middleware tracing a sample of requests.
+
+    Sampled requests get a trace keyed by the request ID that
+    ``RequestLoggingMiddleware`` assigns, so it must run inside that
+    middleware. The trace is exported through the container's span exporter
+    and summarized in the ``Server-Timing`` response header.
+
+    Written as plain ASGI rather than ``BaseHTTPMiddleware``: unsampled
+    requests then cost one random draw instead of an extra task and
+    response stream.
+    """
+
+    def __init__(self, app: ASGIApp, sample_rate: float = 1.0, max_spans: int = 256) -> None:
+        self.app = app
+        self.sample_rate = sample_rate
+        self.max_spans = max_spans
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Trace the request if it is sampled."""
+        if scope["type"] != "http" or (
+            self.sample_rate < 1.0 and random.random() >= self.sample_rate
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = scope.get("state", {}).get("request_id") or str(uuid.uuid4())
+        trace = Trace(request_id, max_spans=self.max_spans)
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # No root span only when the trace may hold none at all
+                if root is not None:
+                    root.attributes["status_code"] = message["status"]
+                    # Headers go out now, so the reported total is time to first byte
+                    trace.finish_span(root)
+                MutableHeaders(scope=message).append(SERVER_TIMING_HEADER, trace.server_timing())
+            await send(message)
+
+        token = start_trace(trace)
+        try:
+            with span(f"{scope['method']} {scope['path']}", kind="http") as root:
+                await self.app(scope, receive, send_with_timing)
+        finally:
+            end_trace(token)
+            # Routing has run by now, so name the span after the route template
+            route = scope.get("route")
+            if route is not None and root is not None:
+                root.name = f"{scope['method']} {route.path}"
+            scope["app"].state.container.span_exporter.export(trace)
@@ -0,0 +1,155 @@
+"""Background relay publishing the user change outbox."""
+
+import asyncio
+import os
+import socket
+from dataclasses import replace
+from datetime import datetime, timedelta
+from typing import Optional
+from uuid import uuid4
+
+import structlog
+from prometheus_client import Counter, Histogram
+
+from app.infrastructure.config.settings import Settings
+from app.infrastructure.outbox.sinks import ChangeSink, create_change_sink
+from app.infrastructure.persistence.outbox import OutboxStore
+
+logger = structlog.get_logger(__name__)
+
+OUTBOX_CHANGES_PUBLISHED = Counter(
+    "outbox_changes_published_total",
+    "Total count of user changes published by the outbox relay"
+)
+
+OUTBOX_PUBLISH_FAILURES = Counter(
+    "outbox_publish_failures_total",
+    "Total count of outbox relay batches that failed to publish"
+)
+
+OUTBOX_PUBLISH_DELAY = Histogram(
+    "outbox_publish_delay_seconds",
+    "Time from a user change to its publication",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+)
+
+class OutboxRelay:
+    """Publishes outbox changes to a sink, in batches and in order.
+
+    Every worker runs a relay, but only the one holding the outbox lease
+    publishes; the others keep trying to take it over. Each batch is first
+    given feed positions, then sent to the sink, then marked published. A
+    failure after numbering leaves a gap in the feed positions, and one
+    after sending makes the batch go out again with new positions, so
+    consumers should ignore changes whose ID they have seen.
+    """
+
+    def __init__(
+        self,
+        store: OutboxStore,
+        sink: ChangeSink,
+        batch_size: int = 100,
+        poll_interval: float = 0.5,
+        lease_duration: float = 10.0
+    ) -> None:
+        self._store = store
+        self._sink = sink
+        self._batch_size = batch_size
+        self._poll_interval = poll_interval
+        self._lease_duration = timedelta(seconds=lease_duration)
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+        # Whether the lease was held as of the last batch
+        self._leased = False
+
+    def start(self) -> None:
+        """Start relaying in the background."""
+        if self._task is None:
+            self._stopping.clear()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self, timeout: float = 5.0) -> None:
+        """Stop relaying, publish what is pending, hand the lease over and close the sink.
+
+        A batch being published gets ``timeout`` seconds to finish, rather
+        than being cut off between numbering and marking it published.
+        """
+        if self._task is not None:
+            self._stopping.set()
+            try:
+                await asyncio.wait_for(self._task, timeout)
+            except asyncio.TimeoutError:
+                # wait_for cancelled the task
+                pass
+            self._task = None
+        if self._leased:
+            try:
+                # Changes of the last requests go out before the lease does
+                await asyncio.wait_for(self.relay_once(), timeout)
+            except Exception as error:
+                OUTBOX_PUBLISH_FAILURES.inc()
+                logger.warning(
+                    "outbox_flush_failed", error=str(error), error_type=type(error).__name__
+                )
+            try:
+                await self._store.release_lease()
+            except Exception as error:
+                logger.warning("outbox_lease_release_failed", error=str(error))
+            self._leased = False
+        await self._sink.close()
+
+    async def relay_once(self) -> int:
+        """Publish one batch if this relay holds the lease; return its size."""
+        last_seq = await self._store.acquire_lease(self._lease_duration)
+        self._leased = last_seq is not None
+        if last_seq is None:
+            return 0
+        pending = await self._store.pending(self._batch_size)
+        if not pending:
+            return 0
+
+        changes = [
+            replace(change, seq=seq) for seq, change in enumerate(pending, last_seq + 1)
+        ]
+        if not await self._store.advance(last_seq, last_seq + len(changes)):
+            logger.warning("outbox_lease_lost")
+            self._leased = False
+            return 0
+        await self._sink.publish(changes)
+        await self._store.mark_published(changes)
+
+        now = datetime.utcnow()
+        for change in changes:
+            OUTBOX_PUBLISH_DELAY.observe((now - change.occurred_at).total_seconds())
+        OUTBOX_CHANGES_PUBLISHED.inc(len(changes))
+        return len(changes)
+
+    async def _run(self) -> None:
+        """Relay batches until stopped, polling while the outbox is drained."""
+        while not self._stopping.is_set():
+            try:
+                published = await self.relay_once()
+            except Exception as error:
+                OUTBOX_PUBLISH_FAILURES.inc()
+                logger.error(
+                    "outbox_relay_failed", error=str(error), error_type=type(error).__name__
+                )
+                published = 0
+            # A full batch suggests more are waiting
+            if published < self._batch_size:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), self._poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+def create_outbox_relay(settings: Settings) -> OutboxRelay:
+    """Create a relay publishing to the sink selected in the settings."""
+    outbox = settings.outbox
+    owner = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+    return OutboxRelay(
+        store=OutboxStore(owner),
+        sink=create_change_sink(outbox, settings.redis),
+        batch_size=outbox.batch_size,
+        poll_interval=outbox.poll_interval_ms / 1000,
+        lease_duration=outbox.lease_seconds
+    )
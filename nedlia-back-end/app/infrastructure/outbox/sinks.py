@@ -0,0 +1,102 @@
+"""Destinations for published user changes."""
+
+from abc import ABC, abstractmethod
+from typing import Dict, List
+
+import structlog
+from redis import asyncio as aioredis
+from redis.typing import EncodableT, FieldT
+
+from app.domain.events.user import UserChange
+from app.infrastructure.config.settings import OutboxSettings, RedisSettings
+
+logger = structlog.get_logger(__name__)
+
+class ChangeSink(ABC):
+    """Destination the outbox relay publishes changes to."""
+
+    @abstractmethod
+    async def publish(self, changes: List[UserChange]) -> None:
+        """Publish a batch of changes, in order.
+
+        Raising leaves the batch unpublished; the relay retries it, so a
+        sink may see the same change more than once.
+        """
+        pass
+
+    async def close(self) -> None:
+        """Release resources."""
+        pass
+
+class NoopChangeSink(ChangeSink):
+    """Sink that discards changes; the change feed still serves them."""
+
+    async def publish(self, changes: List[UserChange]) -> None:
+        """Discard changes."""
+        pass
+
+class LoggingChangeSink(ChangeSink):
+    """Sink writing each change as a structured log entry."""
+
+    async def publish(self, changes: List[UserChange]) -> None:
+        """Log changes."""
+        for change in changes:
+            logger.info(
+                "user_change",
+                change_id=change.id,
+                seq=change.seq,
+                user_id=change.user_id,
+                type=change.type,
+                occurred_at=change.occurred_at.isoformat()
+            )
+
+class RedisStreamSink(ChangeSink):
+    """Sink appending changes to a Redis stream.
+
+    Each batch is sent in one pipeline. Stream entries carry the feed
+    position as ``seq``, so consumers can continue from the change feed.
+    """
+
+    def __init__(self, redis: aioredis.Redis, stream: str, max_length: int) -> None:
+        self._redis = redis
+        self._stream = stream
+        self._max_length = max_length
+
+    async def publish(self, changes: List[UserChange]) -> None:
+        """Append changes to the stream."""
+        pipeline = self._redis.pipeline(transaction=False)
+        for change in changes:
+            pipeline.xadd(
+                self._stream,
+                self._fields(change),
+                maxlen=self._max_length,
+                approximate=True
+            )
+        await pipeline.execute()
+
+    async def close(self) -> None:
+        """Close the Redis connection pool."""
+        await self._redis.aclose()
+
+    def _fields(self, change: UserChange) -> Dict[FieldT, EncodableT]:
+        """Stream entry fields for a change."""
+        return {
+            "id": change.id,
+            "seq": str(change.seq),
+            "user_id": change.user_id,
+            "type": change.type,
+            "occurred_at": change.occurred_at.isoformat(),
+        }
+
+def create_change_sink(settings: OutboxSettings, redis: RedisSettings) -> ChangeSink:
+    """Create the sink selected in the settings."""
+    if settings.sink == "redis":
+        client = aioredis.from_url(str(redis.url), max_connections=redis.pool_size)
+        return RedisStreamSink(client, settings.stream, settings.stream_max_length)
+    sinks = {
+        "none": NoopChangeSink,
+        "log": LoggingChangeSink,
+    }
+    if settings.sink not in sinks:
+        raise ValueError(f"Unknown change sink: {settings.sink}")
+    return sinks[settings.sink]()
@@ -0,0 +1,56 @@
+"""Short-lived cache for collection counts."""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Hashable, Tuple
+
+class CountCache:
+    """Caches counts for a few seconds and shares concurrent lookups.
+
+    Concurrent misses for the same key wait on a single query, which runs as
+    its own task so one caller giving up does not cancel it for the rest.
+    Counts are invalidated when documents are added or removed; a query that
+    was already running when that happened is not cached, and later callers
+    start a new one instead of waiting on it. The cache is per process, so
+    other workers see a change once their entries expire.
+    """
+
+    def __init__(self, ttl: float = 5.0, max_entries: int = 1024) -> None:
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[float, int]] = {}
+        self._pending: Dict[Hashable, "asyncio.Task[int]"] = {}
+        self._generation = 0
+
+    async def get(self, key: Hashable, count: Callable[[], Awaitable[int]]) -> int:
+        """Get a cached count, running ``count`` on a miss."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+
+        task = self._pending.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, count))
+            self._pending[key] = task
+        return await asyncio.shield(task)
+
+    def invalidate(self) -> None:
+        """Forget all counts, including those being queried."""
+        self._entries.clear()
+        self._pending.clear()
+        self._generation += 1
+
+    async def _load(self, key: Hashable, count: Callable[[], Awaitable[int]]) -> int:
+        """Run a count and cache it unless invalidated meanwhile."""
+        generation = self._generation
+        try:
+            value = await count()
+        finally:
+            # Invalidation may have replaced this query with a newer one
+            if self._pending.get(key) is asyncio.current_task():
+                del self._pending[key]
+        if generation == self._generation:
+            if len(self._entries) >= self._max_entries:
+                self._entries.clear()
+            self._entries[key] = (time.monotonic() + self._ttl, value)
+        return value
@@ -1,43 +1,71 @@
 """MongoDB database configuration and initialization."""
 
+import asyncio
+from typing import Optional
+
 from motor.motor_asyncio import AsyncIOMotorClient
 from beanie import init_beanie
 
-from app.application.services.user_service import UserService
-from app.infrastructure.config import get_settings
+from app.infrastructure.config.settings import get_settings
+from app.infrastructure.persistence.models.outbox import UserChangeModel
+from app.infrastructure.persistence.models.route import UserRouteModel
 from app.infrastructure.persistence.models.user import UserModel
-from app.infrastructure.persistence.repositories.user import MongoUserRepository
+from app.infrastructure.persistence.monitoring import mongodb_event_listeners
+from app.infrastructure.persistence.partitions import Partition, PartitionMap
 
 settings = get_settings()
 
-async def init_mongodb():
-    """Initialize MongoDB connection and Beanie ODM."""
-    # Create motor client
-    client = AsyncIOMotorClient(
-        settings.database.url,
-        minPoolSize=settings.database.min_pool_size,
-        maxPoolSize=settings.database.max_pool_size,
-        maxIdleTimeMS=settings.database.max_idle_time_ms,
-        connectTimeoutMS=settings.database.connect_timeout_ms,
-        serverSelectionTimeoutMS=settings.database.server_selection_timeout_ms
+def create_client(url: str) -> AsyncIOMotorClient:
+    """Create a client with the configured pool and monitoring."""
+    # Driver metrics are exported alongside the HTTP ones
+    event_listeners = (
+        mongodb_event_listeners(settings.db) if settings.features.metrics_enabled else []
     )
-    
+    return AsyncIOMotorClient(
+        url,
+        minPoolSize=settings.db.min_pool_size,
+        maxPoolSize=settings.db.max_pool_size,
+        maxIdleTimeMS=settings.db.max_idle_time_ms,
+        connectTimeoutMS=settings.db.connect_timeout_ms,
+        serverSelectionTimeoutMS=settings.db.server_selection_timeout_ms,
+        event_listeners=event_listeners
+    )
+
+async def open_connections(client: AsyncIOMotorClient, count: int) -> None:
+    """Open up to ``count`` pooled connections before requests need them.
+
+    The driver only fills the pool to ``minPoolSize`` in the background, so
+    concurrent pings make it connect now.
+    """
+    await asyncio.gather(*(client.admin.command("ping") for _ in range(max(count, 1))))
+
+async def init_mongodb() -> AsyncIOMotorClient:
+    """Initialize MongoDB connection and Beanie ODM."""
+    client = create_client(settings.db.url)
+
     # Initialize Beanie with the document models
     await init_beanie(
-        database=client[settings.database.db_name],
+        database=client[settings.db.name],
         document_models=[
-            UserModel
+            UserModel,
+            UserChangeModel,
+            UserRouteModel
         ]
     )
+    return client
 
-async def get_user_repository() -> MongoUserRepository:
-    """Get user repository instance."""
-    return MongoUserRepository()
-
-async def get_user_service(
-    repository: MongoUserRepository = None
-) -> UserService:
-    """Get user service instance."""
-    if repository is None:
-        repository = await get_user_repository()
-    return UserService(repository)
+async def init_partitions() -> Optional[PartitionMap]:
+    """Connect to the configured profile partitions, if there are any."""
+    if not settings.db.partitions:
+        return None
+    members = []
+    for name, url in settings.db.partitions.items():
+        client = create_client(url)
+        members.append(Partition(
+            name=name,
+            client=client,
+            collection=client[settings.db.name][UserModel.Settings.name]
+        ))
+    partitions = PartitionMap(members)
+    await partitions.ensure_indexes()
+    return partitions
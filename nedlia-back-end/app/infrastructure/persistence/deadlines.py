@@ -0,0 +1,49 @@
+"""Request deadlines applied to MongoDB operations."""
+
+import functools
+import inspect
+from typing import Any, Awaitable, Callable, TypeVar
+
+import pymongo
+from pymongo.errors import PyMongoError
+
+from app.infrastructure.resilience.deadline import DeadlineExceeded, check_deadline
+
+T = TypeVar("T")
+
+class DeadlineProxy:
+    """Proxy running each coroutine method of a repository within the deadline.
+
+    Calls run under the driver's client side operation timeout, set to the
+    time left, so every command they send carries it as ``maxTimeMS`` and
+    the server stops working on requests given up on. Timeouts surface as
+    ``DeadlineExceeded``. Calls made without a deadline are unaffected.
+    """
+
+    def __init__(self, target: Any) -> None:
+        self._target = target
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._target, name)
+        if not inspect.iscoroutinefunction(attribute):
+            return attribute
+        wrapped = _bounded(attribute)
+        # Cache on the proxy so later lookups skip __getattr__
+        self.__dict__[name] = wrapped
+        return wrapped
+
+def _bounded(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+    """Wrap a coroutine function to run within the current deadline."""
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        left = check_deadline()
+        if left is None:
+            return await func(*args, **kwargs)
+        try:
+            with pymongo.timeout(left):
+                return await func(*args, **kwargs)
+        except PyMongoError as error:
+            if error.timeout:
+                raise DeadlineExceeded() from error
+            raise
+    return wrapper
@@ -0,0 +1,39 @@
+"""Outbox of user profile changes for MongoDB using Beanie ODM."""
+
+from datetime import datetime, timedelta
+from typing import Optional
+from pymongo import ASCENDING, IndexModel
+
+from app.infrastructure.persistence.models.base import BaseDocument
+
+# Published changes stay in the feed this long
+CHANGE_RETENTION = timedelta(days=7)
+
+class UserChangeModel(BaseDocument):
+    """A user profile change, written in the same transaction as the change."""
+
+    # The change's own ID, so republished changes can be recognized
+    id: str  # type: ignore[assignment]
+    user_id: str
+    type: str
+    occurred_at: datetime
+
+    # Feed position and publish time; unset until the relay publishes it
+    seq: Optional[int] = None
+    published_at: Optional[datetime] = None
+
+    class Settings:
+        name = "user_changes"
+        indexes = [
+            # Pending changes are those with no seq, relayed oldest first;
+            # the feed reads published ones by seq
+            IndexModel(
+                [("seq", ASCENDING), ("occurred_at", ASCENDING)],
+                name="seq_occurred_at"
+            ),
+            IndexModel(
+                [("published_at", ASCENDING)],
+                name="published_at_ttl",
+                expireAfterSeconds=int(CHANGE_RETENTION.total_seconds())
+            ),
+        ]
@@ -0,0 +1,24 @@
+"""Lookup table of partitioned user profiles for MongoDB using Beanie ODM."""
+
+from pymongo import ASCENDING, IndexModel
+
+from app.infrastructure.persistence.models.base import BaseDocument
+
+class UserRouteModel(BaseDocument):
+    """The user holding a unique attribute, such as ``email:ada@example.com``.
+
+    Profiles are partitioned by ID, so lookups by any other unique attribute
+    go through this table. Its ``_id`` doubles as the uniqueness constraint
+    across partitions.
+    """
+
+    # Attribute name and value, such as email:ada@example.com
+    id: str  # type: ignore[assignment]
+    user_id: str
+
+    class Settings:
+        name = "user_routes"
+        indexes = [
+            # Routes left behind by changed attributes are found by user
+            IndexModel([("user_id", ASCENDING)], name="user_id"),
+        ]
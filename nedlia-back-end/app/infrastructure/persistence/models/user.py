@@ -1,21 +1,34 @@
 """User profile model for MongoDB using Beanie ODM."""
 
 from datetime import datetime
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Union
+from uuid import uuid4
 from pydantic import EmailStr, Field
-from beanie import Document, Indexed
+from beanie import Indexed
+from pymongo import ASCENDING, TEXT, IndexModel
 
-class UserModel(Document):
+from app.infrastructure.persistence.models.base import BaseDocument
+
+class UserModel(BaseDocument):
     """User profile model synchronized with Okta."""
     
+    # Domain entities carry string UUIDs, so documents use them as _id
+    id: str = Field(default_factory=lambda: str(uuid4()))  # type: ignore[assignment]
+    
     # Core fields
     email: Indexed(EmailStr, unique=True)
-    first_name: str
-    last_name: str
+    hashed_password: Optional[str] = None
+    first_name: str = ""
+    last_name: str = ""
     
-    # Okta integration
-    okta_id: Indexed(str, unique=True)
+    # Okta integration; users created through the API have no Okta ID yet
+    okta_id: Optional[Indexed(
+        str,
+        unique=True,
+        partialFilterExpression={"okta_id": {"$type": "string"}}
+    )] = None
     is_active: bool = Field(default=True)
+    is_verified: bool = Field(default=False)
     last_sync: datetime = Field(default_factory=datetime.utcnow)
     
     # Extended profile
@@ -31,13 +44,54 @@ class UserModel(Document):
     # Timestamps
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
+
+    # Search keys: case folded and accent free, maintained by the repository
+    email_normalized: str = ""
+    first_name_normalized: str = ""
+    last_name_normalized: str = ""
+    email_domain: str = ""
     
     class Settings:
         name = "user_profiles"
-        indexes = [
-            "email",
-            "okta_id",
-            "phone"
+        # email and okta_id are indexed through their Indexed() annotations
+        indexes: List[Union[str, IndexModel]] = [
+            "phone",
+            # Prefix ranges with keyset ordering on _id for ties
+            IndexModel(
+                [("email_normalized", ASCENDING), ("_id", ASCENDING)],
+                name="email_normalized_id"
+            ),
+            IndexModel(
+                [("last_name_normalized", ASCENDING), ("_id", ASCENDING)],
+                name="last_name_normalized_id"
+            ),
+            IndexModel(
+                [("first_name_normalized", ASCENDING), ("_id", ASCENDING)],
+                name="first_name_normalized_id"
+            ),
+            IndexModel(
+                [("email_domain", ASCENDING), ("_id", ASCENDING)],
+                name="email_domain_id"
+            ),
+            # Searches filtering on nothing else, in keyset order
+            IndexModel(
+                [("is_active", ASCENDING), ("_id", ASCENDING)],
+                name="is_active_id"
+            ),
+            IndexModel(
+                [("locale", ASCENDING), ("_id", ASCENDING)],
+                name="locale_id"
+            ),
+            # Names are not words, so no stemming or stop words
+            IndexModel(
+                [
+                    ("first_name_normalized", TEXT),
+                    ("last_name_normalized", TEXT),
+                    ("email_normalized", TEXT),
+                ],
+                name="user_search_text",
+                default_language="none"
+            ),
         ]
     
     def to_entity(self) -> "User":
@@ -0,0 +1,237 @@
+"""MongoDB driver instrumentation.
+
+PyMongo event listeners that export command latency, connection pool and
+server state to Prometheus, and log slow commands. Motor runs PyMongo in
+worker threads, so listeners are called from those threads.
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional, Tuple, Union
+
+import structlog
+from prometheus_client import Counter, Gauge, Histogram
+from pymongo import monitoring
+
+from app.infrastructure.config.settings import DatabaseSettings
+
+logger = structlog.get_logger(__name__)
+
+MONGODB_COMMAND_DURATION = Histogram(
+    "mongodb_command_duration_seconds",
+    "MongoDB command latency in seconds, as measured by the driver",
+    ["command", "collection"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
+MONGODB_COMMAND_FAILURES = Counter(
+    "mongodb_command_failures_total",
+    "Total count of failed MongoDB commands",
+    ["command", "collection"]
+)
+
+MONGODB_POOL_CHECKOUT_WAIT = Histogram(
+    "mongodb_pool_checkout_wait_seconds",
+    "Time spent waiting to check a connection out of the pool",
+    ["address"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+)
+
+MONGODB_POOL_CHECKOUT_FAILURES = Counter(
+    "mongodb_pool_checkout_failures_total",
+    "Total count of failed connection checkouts",
+    ["address", "reason"]
+)
+
+MONGODB_POOL_CHECKED_OUT = Gauge(
+    "mongodb_pool_checked_out_connections",
+    "Connections currently checked out of the pool",
+    ["address"]
+)
+
+MONGODB_POOL_CONNECTIONS = Gauge(
+    "mongodb_pool_connections",
+    "Open connections in the pool, idle or checked out",
+    ["address"]
+)
+
+MONGODB_POOL_CLEARED = Counter(
+    "mongodb_pool_cleared_total",
+    "Total count of pool clears, e.g. after a network error or failover",
+    ["address"]
+)
+
+MONGODB_SERVER_AVAILABLE = Gauge(
+    "mongodb_server_available",
+    "Whether the server is known and reachable, by address",
+    ["address"]
+)
+
+def _address(address: Tuple[str, Optional[int]]) -> str:
+    """Format a server address as a label value."""
+    host, port = address
+    return f"{host}:{port}" if port is not None else host
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """Records per-command latency and logs slow commands."""
+
+    def __init__(self, slow_command_ms: int = 100) -> None:
+        self._slow_command_seconds = slow_command_ms / 1000
+        # (request_id, connection) -> (database, collection), while in flight
+        self._targets: Dict[Tuple[int, Tuple[str, Optional[int]]], Tuple[str, str]] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        """Remember which collection a command targets."""
+        # getMore names its cursor first and the collection separately
+        target = event.command.get("collection", event.command.get(event.command_name))
+        collection = target if isinstance(target, str) else ""
+        self._targets[(event.request_id, event.connection_id)] = (
+            event.database_name,
+            collection
+        )
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        """Record a successful command."""
+        self._record(event, failed=False)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        """Record a failed command."""
+        self._record(event, failed=True)
+
+    def _record(
+        self,
+        event: Union[monitoring.CommandSucceededEvent, monitoring.CommandFailedEvent],
+        failed: bool
+    ) -> None:
+        """Observe the command's duration and log it if slow."""
+        database, collection = self._targets.pop(
+            (event.request_id, event.connection_id), ("", "")
+        )
+        seconds = event.duration_micros / 1_000_000
+        MONGODB_COMMAND_DURATION.labels(
+            command=event.command_name,
+            collection=collection
+        ).observe(seconds)
+        if failed:
+            MONGODB_COMMAND_FAILURES.labels(
+                command=event.command_name,
+                collection=collection
+            ).inc()
+        if seconds >= self._slow_command_seconds:
+            logger.warning(
+                "slow_mongodb_command",
+                command=event.command_name,
+                collection=collection,
+                database=database,
+                duration_ms=round(seconds * 1000, 2),
+                server=_address(event.connection_id),
+                failed=failed
+            )
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Records connection pool checkouts and occupancy."""
+
+    def __init__(self) -> None:
+        # Checkout start times for drivers whose events carry no duration
+        self._local = threading.local()
+
+    def pool_created(self, event: monitoring.PoolCreatedEvent) -> None:
+        """Start reporting an empty pool."""
+        address = _address(event.address)
+        MONGODB_POOL_CONNECTIONS.labels(address=address).set(0)
+        MONGODB_POOL_CHECKED_OUT.labels(address=address).set(0)
+
+    def pool_ready(self, event: monitoring.PoolReadyEvent) -> None:
+        """Nothing to record."""
+        pass
+
+    def pool_cleared(self, event: monitoring.PoolClearedEvent) -> None:
+        """Count pool clears."""
+        MONGODB_POOL_CLEARED.labels(address=_address(event.address)).inc()
+
+    def pool_closed(self, event: monitoring.PoolClosedEvent) -> None:
+        """Report a closed pool as empty."""
+        address = _address(event.address)
+        MONGODB_POOL_CONNECTIONS.labels(address=address).set(0)
+        MONGODB_POOL_CHECKED_OUT.labels(address=address).set(0)
+
+    def connection_created(self, event: monitoring.ConnectionCreatedEvent) -> None:
+        """Count an opened connection."""
+        MONGODB_POOL_CONNECTIONS.labels(address=_address(event.address)).inc()
+
+    def connection_ready(self, event: monitoring.ConnectionReadyEvent) -> None:
+        """Nothing to record."""
+        pass
+
+    def connection_closed(self, event: monitoring.ConnectionClosedEvent) -> None:
+        """Count a closed connection."""
+        MONGODB_POOL_CONNECTIONS.labels(address=_address(event.address)).dec()
+
+    def connection_check_out_started(
+        self,
+        event: monitoring.ConnectionCheckOutStartedEvent
+    ) -> None:
+        """Note when this thread started waiting for a connection."""
+        self._local.started = time.perf_counter()
+
+    def connection_check_out_failed(
+        self,
+        event: monitoring.ConnectionCheckOutFailedEvent
+    ) -> None:
+        """Record a failed checkout and how long it waited."""
+        address = _address(event.address)
+        MONGODB_POOL_CHECKOUT_FAILURES.labels(address=address, reason=event.reason).inc()
+        MONGODB_POOL_CHECKOUT_WAIT.labels(address=address).observe(self._waited(event))
+
+    def connection_checked_out(self, event: monitoring.ConnectionCheckedOutEvent) -> None:
+        """Record a checkout and how long it waited."""
+        address = _address(event.address)
+        MONGODB_POOL_CHECKED_OUT.labels(address=address).inc()
+        MONGODB_POOL_CHECKOUT_WAIT.labels(address=address).observe(self._waited(event))
+
+    def connection_checked_in(self, event: monitoring.ConnectionCheckedInEvent) -> None:
+        """Record a connection returned to the pool."""
+        MONGODB_POOL_CHECKED_OUT.labels(address=_address(event.address)).dec()
+
+    def _waited(self, event: monitoring._ConnectionEvent) -> float:
+        """Seconds between checkout start and ``event``."""
+        # PyMongo 4.7+ measures this itself
+        duration: Optional[float] = getattr(event, "duration", None)
+        if duration is not None:
+            return duration
+        started = getattr(self._local, "started", None)
+        return time.perf_counter() - started if started is not None else 0.0
+
+class ServerMetricsListener(monitoring.ServerListener):
+    """Tracks server availability and logs role changes such as failovers."""
+
+    def opened(self, event: monitoring.ServerOpeningEvent) -> None:
+        """Nothing to record until the server is first checked."""
+        pass
+
+    def description_changed(self, event: monitoring.ServerDescriptionChangedEvent) -> None:
+        """Record availability and log changes of server type."""
+        previous = event.previous_description.server_type_name
+        current = event.new_description.server_type_name
+        MONGODB_SERVER_AVAILABLE.labels(address=_address(event.server_address)).set(
+            1 if event.new_description.is_server_type_known else 0
+        )
+        if previous != current:
+            logger.info(
+                "mongodb_server_changed",
+                server=_address(event.server_address),
+                previous_type=previous,
+                new_type=current
+            )
+
+    def closed(self, event: monitoring.ServerClosedEvent) -> None:
+        """Report a removed server as unavailable."""
+        MONGODB_SERVER_AVAILABLE.labels(address=_address(event.server_address)).set(0)
+
+def mongodb_event_listeners(settings: DatabaseSettings) -> List[monitoring._EventListener]:
+    """Create the listeners to register on the MongoDB client."""
+    return [
+        CommandMetricsListener(slow_command_ms=settings.slow_command_ms),
+        PoolMetricsListener(),
+        ServerMetricsListener(),
+    ]
@@ -0,0 +1,117 @@
+"""Outbox storage: pending changes, the relay lease and the change feed."""
+
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Mapping, Optional
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from app.domain.events.user import UserChange
+from app.infrastructure.persistence.models.outbox import UserChangeModel
+
+# One lease per outbox; whoever holds it numbers and publishes changes
+_LEASE_ID = UserChangeModel.Settings.name
+
+def change_document(change: UserChange) -> Dict[str, Any]:
+    """Convert a change to an outbox document awaiting publication."""
+    return {
+        "_id": change.id,
+        "user_id": change.user_id,
+        "type": change.type,
+        "occurred_at": change.occurred_at,
+        "seq": None,
+        "published_at": None,
+    }
+
+def change_from_document(document: Mapping[str, Any]) -> UserChange:
+    """Convert an outbox document to a change."""
+    return UserChange(
+        user_id=document["user_id"],
+        type=document["type"],
+        occurred_at=document["occurred_at"],
+        id=document["_id"],
+        seq=document.get("seq")
+    )
+
+class OutboxStore:
+    """Reads and publishes the outbox on behalf of the relay.
+
+    Feed positions are handed out only by the holder of a lease, so they
+    increase strictly even with a relay running in every worker. The last
+    position is kept on the lease and advanced with a compare-and-set, so a
+    relay that lost its lease cannot publish under numbers already reused.
+    """
+
+    def __init__(self, owner: str) -> None:
+        self._owner = owner
+
+    async def acquire_lease(self, duration: timedelta) -> Optional[int]:
+        """Take or renew the lease; return the last feed position if held."""
+        now = datetime.utcnow()
+        try:
+            lease = await self._leases().find_one_and_update(
+                {
+                    "_id": _LEASE_ID,
+                    "$or": [{"owner": self._owner}, {"expires_at": {"$lte": now}}],
+                },
+                {
+                    "$set": {"owner": self._owner, "expires_at": now + duration},
+                    "$setOnInsert": {"last_seq": 0},
+                },
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # Held by another relay; the filter missed and the upsert collided
+            return None
+        last_seq: int = lease["last_seq"]
+        return last_seq
+
+    async def release_lease(self) -> None:
+        """Give up the lease so another relay can take over at once."""
+        await self._leases().update_one(
+            {"_id": _LEASE_ID, "owner": self._owner},
+            {"$set": {"expires_at": datetime.utcnow()}}
+        )
+
+    async def pending(self, limit: int) -> List[UserChange]:
+        """Changes not yet published, oldest first."""
+        cursor = self._changes().find(
+            {"seq": None}, sort=[("occurred_at", 1)], limit=limit
+        )
+        return [change_from_document(document) async for document in cursor]
+
+    async def advance(self, last_seq: int, new_seq: int) -> bool:
+        """Claim feed positions up to ``new_seq``; False if the lease was lost."""
+        result = await self._leases().update_one(
+            {"_id": _LEASE_ID, "owner": self._owner, "last_seq": last_seq},
+            {"$set": {"last_seq": new_seq}}
+        )
+        return result.modified_count == 1
+
+    async def mark_published(self, changes: List[UserChange]) -> None:
+        """Record the feed positions of published changes, in order."""
+        now = datetime.utcnow()
+        await self._changes().bulk_write(
+            [
+                UpdateOne({"_id": change.id}, {"$set": {"seq": change.seq, "published_at": now}})
+                for change in changes
+            ],
+            ordered=True
+        )
+
+    def _changes(self) -> AsyncIOMotorCollection:
+        """The outbox collection."""
+        return UserChangeModel.get_motor_collection()
+
+    def _leases(self) -> AsyncIOMotorCollection:
+        """The collection holding relay leases."""
+        return UserChangeModel.get_motor_collection().database["outbox_leases"]
+
+async def published_changes(since: int, limit: int) -> List[UserChange]:
+    """Published changes after feed position ``since``, oldest first."""
+    cursor = UserChangeModel.get_motor_collection().find(
+        {"seq": {"$gt": since}}, sort=[("seq", 1)], limit=limit
+    )
+    return [change_from_document(document) async for document in cursor]
@@ -0,0 +1,106 @@
+"""Hash partitioning of user profiles across several MongoDB deployments."""
+
+import hashlib
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Sequence
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
+from pymongo import ASCENDING, IndexModel
+
+from app.infrastructure.persistence.models.user import UserModel
+
+def partition_name(user_id: str, names: Sequence[str]) -> str:
+    """Name of the partition a user lives on, by rendezvous hashing of its ID.
+
+    Every partition scores the ID and the highest score wins. The result
+    depends only on the ID and the partition names, so adding a partition
+    moves only the users it now wins, about ``1/n`` of them, and removing
+    one moves only the users it held.
+    """
+    return max(names, key=lambda name: _score(name, user_id))
+
+def _score(name: str, user_id: str) -> int:
+    """A partition's stable pseudo-random score for a user."""
+    digest = hashlib.blake2b(f"{name}\0{user_id}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+def route_keys(email: str, okta_id: Optional[str]) -> List[str]:
+    """Lookup table keys of a user's unique attributes."""
+    keys = [email_route(email)]
+    if okta_id:
+        keys.append(okta_route(okta_id))
+    return keys
+
+def email_route(email: str) -> str:
+    """Lookup table key of an email address."""
+    return f"email:{email}"
+
+def okta_route(okta_id: str) -> str:
+    """Lookup table key of an Okta user ID."""
+    return f"okta:{okta_id}"
+
+def user_indexes() -> List[IndexModel]:
+    """The indexes Beanie creates on ``user_profiles``, for each partition.
+
+    Beanie only manages the collection at ``DB_URL``. Uniqueness within a
+    partition backs up the lookup table, which enforces it across them.
+    """
+    indexes = [
+        # As declared through the Indexed() annotations on UserModel
+        IndexModel([("email", ASCENDING)], name="email_1", unique=True),
+        IndexModel(
+            [("okta_id", ASCENDING)],
+            name="okta_id_1",
+            unique=True,
+            partialFilterExpression={"okta_id": {"$type": "string"}}
+        ),
+    ]
+    for index in UserModel.Settings.indexes:
+        indexes.append(index if isinstance(index, IndexModel) else IndexModel(index))
+    return indexes
+
+async def create_user_indexes(collection: AsyncIOMotorCollection) -> None:
+    """Create the profile indexes on a partition's collection, if missing."""
+    await collection.create_indexes(user_indexes())
+
+@dataclass(frozen=True)
+class Partition:
+    """One MongoDB deployment holding part of the user profiles."""
+
+    name: str
+    client: AsyncIOMotorClient
+    collection: AsyncIOMotorCollection
+
+class PartitionMap:
+    """The configured partitions, and which one each user lives on."""
+
+    def __init__(self, partitions: Sequence[Partition]) -> None:
+        if not partitions:
+            raise ValueError("At least one partition is required")
+        self._partitions: Dict[str, Partition] = {
+            partition.name: partition for partition in partitions
+        }
+        self.names = tuple(sorted(self._partitions))
+
+    def __iter__(self) -> Iterator[Partition]:
+        return iter(self._partitions[name] for name in self.names)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __getitem__(self, name: str) -> Partition:
+        return self._partitions[name]
+
+    def for_user(self, user_id: str) -> Partition:
+        """The partition holding a user's profile."""
+        return self._partitions[partition_name(user_id, self.names)]
+
+    async def ensure_indexes(self) -> None:
+        """Create the profile indexes on every partition."""
+        for partition in self:
+            await create_user_indexes(partition.collection)
+
+    def close(self) -> None:
+        """Close every partition's client."""
+        for partition in self:
+            partition.client.close()
@@ -0,0 +1,329 @@
+"""Query plan inspection for repository queries."""
+
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+
+from app.infrastructure.persistence.models.outbox import UserChangeModel
+from app.infrastructure.persistence.models.route import UserRouteModel
+from app.infrastructure.persistence.models.user import UserModel
+
+USERS = UserModel.Settings.name
+CHANGES = UserChangeModel.Settings.name
+ROUTES = UserRouteModel.Settings.name
+
+# Stages that read through an index instead of scanning the collection
+INDEX_STAGES = frozenset({
+    "IXSCAN",
+    "IDHACK",
+    "EXPRESS_IXSCAN",
+    "EXPRESS_IDHACK",
+    "COUNT_SCAN",
+    "DISTINCT_SCAN",
+})
+
+@dataclass(frozen=True)
+class QueryShape:
+    """A query issued by the user repository, expressed as raw MongoDB arguments.
+
+    ``build_filter`` receives a seeded sample document from the shape's
+    ``collection`` so that equality lookups target a value that actually
+    exists. Counts are checked as a find with the same filter, which is what
+    ``count_documents`` runs through its ``$match`` stage.
+    """
+
+    name: str
+    build_filter: Callable[[Dict[str, Any]], Dict[str, Any]]
+    sort: Optional[List[Tuple[str, int]]] = None
+    skip: int = 0
+    limit: int = 0
+    max_docs_ratio: Optional[float] = None
+    collection: str = USERS
+
+@dataclass
+class PlanReport:
+    """Summary of the winning plan and execution stats for one query shape."""
+
+    shape: str
+    stages: List[str]
+    index_names: List[str]
+    keys_examined: int
+    docs_examined: int
+    returned: int
+    violations: List[str] = field(default_factory=list)
+
+    @property
+    def passed(self) -> bool:
+        """Whether the query satisfied every plan rule."""
+        return not self.violations
+
+    @property
+    def docs_ratio(self) -> float:
+        """Documents examined per document returned."""
+        return self.docs_examined / max(self.returned, 1)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert report to dictionary."""
+        return {
+            "shape": self.shape,
+            "stages": self.stages,
+            "index_names": self.index_names,
+            "keys_examined": self.keys_examined,
+            "docs_examined": self.docs_examined,
+            "returned": self.returned,
+            "docs_ratio": round(self.docs_ratio, 2),
+            "violations": self.violations,
+        }
+
+def _prefix_filter(field: str, length: int = 6) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """Build a prefix search on ``field`` from the sample's value."""
+    def build(doc: Dict[str, Any]) -> Dict[str, Any]:
+        return {field: {"$regex": f"^{re.escape(doc[field][:length])}"}}
+    return build
+
+# Every query shape issued by the user repositories and the outbox, plus the
+# indexed lookups declared on UserModel. Keep this list in sync with them.
+USER_QUERY_SHAPES: List[QueryShape] = [
+    QueryShape("get_by_id", lambda doc: {"_id": doc["_id"]}, limit=1),
+    QueryShape("get_by_email", lambda doc: {"email": doc["email"]}, limit=1),
+    QueryShape("email_exists", lambda doc: {"email": doc["email"]}, limit=1),
+    QueryShape("get_by_okta_id", lambda doc: {"okta_id": doc["okta_id"]}, limit=1),
+    QueryShape("get_by_phone", lambda doc: {"phone": doc["phone"]}),
+    # Skip pagination walks skip + limit entries, so allow that many per page
+    QueryShape(
+        "list",
+        lambda doc: {},
+        sort=[("_id", 1)],
+        skip=100,
+        limit=100,
+        max_docs_ratio=2.0,
+    ),
+    QueryShape(
+        "search_email",
+        _prefix_filter("email_normalized"),
+        sort=[("email_normalized", 1), ("_id", 1)],
+        limit=21,
+    ),
+    QueryShape(
+        "search_last_name",
+        _prefix_filter("last_name_normalized"),
+        sort=[("last_name_normalized", 1), ("_id", 1)],
+        limit=21,
+    ),
+    QueryShape(
+        "search_domain",
+        lambda doc: {"email_domain": doc["email_domain"], "is_active": True},
+        sort=[("_id", 1)],
+        limit=21,
+        # Inactive users are filtered after the index scan
+        max_docs_ratio=1.5,
+    ),
+    QueryShape(
+        "search_active",
+        lambda doc: {"is_active": True},
+        sort=[("_id", 1)],
+        limit=21,
+    ),
+    QueryShape(
+        "search_locale",
+        lambda doc: {"locale": doc["locale"]},
+        sort=[("_id", 1)],
+        limit=21,
+    ),
+    QueryShape(
+        "search_text",
+        lambda doc: {"$text": {"$search": doc["first_name_normalized"]}},
+        limit=21,
+    ),
+    # Filtered counts match every user the search would page through
+    QueryShape("count_email", _prefix_filter("email_normalized")),
+    QueryShape(
+        "count_domain",
+        lambda doc: {"email_domain": doc["email_domain"], "is_active": True},
+        max_docs_ratio=1.5,
+    ),
+    QueryShape("count_active", lambda doc: {"is_active": True}),
+    QueryShape("count_locale", lambda doc: {"locale": doc["locale"]}),
+    # The outbox relay reads pending changes oldest first, the feed by seq
+    QueryShape(
+        "outbox_pending",
+        lambda doc: {"seq": None},
+        sort=[("occurred_at", 1)],
+        limit=100,
+        collection=CHANGES,
+    ),
+    QueryShape(
+        "change_feed",
+        lambda doc: {"seq": {"$gt": doc["seq"]}},
+        sort=[("seq", 1)],
+        limit=100,
+        collection=CHANGES,
+    ),
+    # Partitioned profiles are found by unique attribute through their routes
+    QueryShape("route_by_key", lambda doc: {"_id": doc["_id"]}, limit=1, collection=ROUTES),
+    QueryShape(
+        "routes_by_keys",
+        lambda doc: {"_id": {"$in": [doc["_id"]]}},
+        collection=ROUTES,
+    ),
+    QueryShape("routes_by_user", lambda doc: {"user_id": doc["user_id"]}, collection=ROUTES),
+]
+
+LOCALES = ("en-US", "en-GB", "de-DE", "fr-FR", "es-ES")
+
+def build_seed_documents(count: int) -> Iterator[Dict[str, Any]]:
+    """Generate user profile documents shaped like ``UserModel``."""
+    now = datetime.utcnow()
+    for i in range(count):
+        yield {
+            "email": f"user{i}@example.com",
+            "first_name": f"First{i}",
+            "last_name": f"Last{i}",
+            "okta_id": f"00u{i:012d}",
+            "is_active": i % 10 != 0,
+            "last_sync": now,
+            "phone": f"+1555{i:07d}",
+            "avatar_url": None,
+            "locale": LOCALES[i % len(LOCALES)],
+            "timezone": "UTC",
+            "preferences": {},
+            "metadata": {},
+            "created_at": now,
+            "updated_at": now,
+            "email_normalized": f"user{i}@example.com",
+            "first_name_normalized": f"first{i}",
+            "last_name_normalized": f"last{i}",
+            "email_domain": "example.com",
+        }
+
+def build_seed_changes(count: int) -> Iterator[Dict[str, Any]]:
+    """Generate outbox documents, all published but the last tenth."""
+    now = datetime.utcnow()
+    published = count - count // 10
+    for i in range(count):
+        yield {
+            "_id": f"change{i:09d}",
+            "user_id": f"user{i}",
+            "type": "user.updated",
+            "occurred_at": now,
+            "seq": i + 1 if i < published else None,
+            "published_at": now if i < published else None,
+        }
+
+def build_seed_routes(count: int) -> Iterator[Dict[str, Any]]:
+    """Generate lookup table documents, an email and an Okta route per user."""
+    for i in range(count):
+        yield {"_id": f"email:user{i}@example.com", "user_id": f"user{i}"}
+        yield {"_id": f"okta:00u{i:012d}", "user_id": f"user{i}"}
+
+async def seed_collection(
+    collection: AsyncIOMotorCollection,
+    documents: Iterator[Dict[str, Any]],
+    batch_size: int = 1000
+) -> Dict[str, Any]:
+    """Insert seed documents and return one from the middle to build lookups from."""
+    batch: List[Dict[str, Any]] = []
+    count = 0
+    for document in documents:
+        batch.append(document)
+        count += 1
+        if len(batch) >= batch_size:
+            await collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await collection.insert_many(batch, ordered=False)
+
+    # Pick a document from the middle so lookups are not trivially first
+    sample: Optional[Dict[str, Any]] = await collection.find_one(
+        {}, sort=[("_id", 1)], skip=count // 2
+    )
+    if sample is None:
+        raise RuntimeError(f"Seeding produced an empty {collection.name} collection")
+    return sample
+
+async def seed_database(database: AsyncIOMotorDatabase, count: int) -> Dict[str, Dict[str, Any]]:
+    """Seed every collection the query shapes read; samples keyed by collection."""
+    return {
+        USERS: await seed_collection(database[USERS], build_seed_documents(count)),
+        # Changes are sorted by _id in seeding order, so the sample has a seq
+        CHANGES: await seed_collection(database[CHANGES], build_seed_changes(count)),
+        ROUTES: await seed_collection(database[ROUTES], build_seed_routes(count)),
+    }
+
+def _iter_stages(plan: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """Walk a plan tree depth-first."""
+    yield plan
+    if "inputStage" in plan:
+        yield from _iter_stages(plan["inputStage"])
+    for child in plan.get("inputStages", []):
+        yield from _iter_stages(child)
+
+def summarize_explain(
+    shape: QueryShape,
+    explain: Dict[str, Any],
+    max_docs_ratio: float
+) -> PlanReport:
+    """Build a report from ``explain`` output and apply the plan rules."""
+    winning_plan = explain["queryPlanner"]["winningPlan"]
+    # Slot-based execution nests the classic plan under ``queryPlan``
+    winning_plan = winning_plan.get("queryPlan", winning_plan)
+    stages = list(_iter_stages(winning_plan))
+    stats = explain.get("executionStats", {})
+
+    report = PlanReport(
+        shape=shape.name,
+        stages=[stage["stage"] for stage in stages],
+        index_names=[
+            stage["indexName"] for stage in stages if "indexName" in stage
+        ],
+        keys_examined=stats.get("totalKeysExamined", 0),
+        docs_examined=stats.get("totalDocsExamined", 0),
+        returned=stats.get("nReturned", 0),
+    )
+
+    if "COLLSCAN" in report.stages:
+        report.violations.append("collection scan")
+    elif not INDEX_STAGES.intersection(report.stages):
+        report.violations.append("no index used")
+
+    allowed_ratio = shape.max_docs_ratio or max_docs_ratio
+    if report.docs_ratio > allowed_ratio:
+        report.violations.append(
+            f"examined {report.docs_ratio:.1f} docs per result "
+            f"(limit {allowed_ratio:.1f})"
+        )
+
+    return report
+
+async def explain_shape(
+    collection: AsyncIOMotorCollection,
+    shape: QueryShape,
+    sample: Dict[str, Any],
+    max_docs_ratio: float = 1.0
+) -> PlanReport:
+    """Run ``explain`` for a query shape and report on its winning plan."""
+    cursor = collection.find(
+        shape.build_filter(sample),
+        sort=shape.sort,
+        skip=shape.skip,
+        limit=shape.limit,
+    )
+    explain = await cursor.explain()
+    return summarize_explain(shape, explain, max_docs_ratio)
+
+async def check_query_plans(
+    database: AsyncIOMotorDatabase,
+    samples: Dict[str, Dict[str, Any]],
+    shapes: Optional[List[QueryShape]] = None,
+    max_docs_ratio: float = 1.0
+) -> List[PlanReport]:
+    """Explain every query shape against a seeded database."""
+    return [
+        await explain_shape(
+            database[shape.collection], shape, samples[shape.collection], max_docs_ratio
+        )
+        for shape in (shapes or USER_QUERY_SHAPES)
+    ]
@@ -0,0 +1,398 @@
+"""MongoDB implementation of user repository across hash partitions."""
+
+import asyncio
+import heapq
+from datetime import datetime
+from itertools import islice
+from typing import (
+    AbstractSet,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import DeleteMany, DeleteOne, InsertOne, ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError
+from pymongo.read_preferences import _ServerMode
+
+from app.domain.entities.user import User
+from app.domain.events.user import UserChange
+from app.domain.repositories.user import UserSearchCriteria
+from app.domain.value_objects.common import Email
+from app.domain.value_objects.patch import AttributePatch
+from app.infrastructure.persistence.models.outbox import UserChangeModel
+from app.infrastructure.persistence.models.route import UserRouteModel
+from app.infrastructure.persistence.outbox import change_document
+from app.infrastructure.persistence.partitions import (
+    Partition,
+    PartitionMap,
+    email_route,
+    okta_route,
+    route_keys,
+)
+from app.infrastructure.persistence.repositories.user import (
+    MongoUserRepository,
+    document_fields,
+    duplicate_key_error,
+    field_projection,
+)
+from app.infrastructure.persistence.search import (
+    apply_cursor,
+    build_search_query,
+    encode_cursor,
+    sort_keys,
+)
+from app.infrastructure.persistence.sessions import current_session
+
+Document = Mapping[str, Any]
+
+class PartitionedUserRepository(MongoUserRepository):
+    """User repository with profiles hash partitioned across deployments.
+
+    Each profile lives on the partition its ID hashes to, so reads and
+    writes by ID go to a single partition. Email addresses and Okta IDs are
+    resolved through the lookup table at ``DB_URL``, whose keys also keep
+    them unique across partitions. Lists, searches and counts go to every
+    partition concurrently, and the results are merged into the order one
+    collection would return them in.
+
+    A save spans deployments, so it cannot be one transaction. Lookup
+    entries are claimed first, then the partitions are written, then the
+    outbox; entries of attributes users no longer hold are dropped last. A
+    failure in between can leave entries blocking an email address until
+    the rebalancing script repairs them, or lose the outbox record. The
+    request's causally consistent session belongs to the ``DB_URL`` client,
+    so it covers the lookup table and outbox but not the partitions.
+    """
+
+    def __init__(
+        self,
+        partitions: PartitionMap,
+        bulk_read_preference: Optional[_ServerMode] = None,
+        count_cache_ttl: float = 5.0
+    ) -> None:
+        super().__init__(
+            bulk_read_preference=bulk_read_preference,
+            count_cache_ttl=count_cache_ttl
+        )
+        self._partitions = partitions
+
+    async def add(self, entity: User) -> User:
+        """Add a new user."""
+        await self.save_changes(added=[entity])
+        return entity
+
+    async def get_by_id(self, entity_id: str) -> Optional[User]:
+        """Get user by ID."""
+        document = await self._collection(entity_id).find_one({"_id": entity_id})
+        return self._from_document(document) if document else None
+
+    async def get_by_email(self, email: Email) -> Optional[User]:
+        """Get user by email."""
+        document = await self._find_routed(email_route(email.value), {"email": email.value})
+        return self._from_document(document) if document else None
+
+    async def get_by_okta_id(self, okta_id: str) -> Optional[User]:
+        """Get user by Okta user ID."""
+        document = await self._find_routed(okta_route(okta_id), {"okta_id": okta_id})
+        return self._from_document(document) if document else None
+
+    async def list(self, skip: int = 0, limit: int = 100) -> List[User]:
+        """List users with pagination."""
+        # Each partition returns its first skip + limit; the merge keeps the
+        # overall first ones, so deep pages cost more than on one collection
+        documents = await self._gather_sorted(
+            lambda collection: collection.find({}, sort=[("_id", 1)], limit=skip + limit),
+            _merge_key("_id"),
+            skip + limit
+        )
+        return [self._from_document(document) for document in documents[skip:]]
+
+    async def get_fields(
+        self,
+        entity_id: str,
+        fields: AbstractSet[str]
+    ) -> Optional[Dict[str, Any]]:
+        """Get some of a user's attributes, loading only those."""
+        document = await self._collection(entity_id).find_one(
+            {"_id": entity_id}, projection=field_projection(fields)
+        )
+        return document_fields(document, fields) if document else None
+
+    async def list_fields(
+        self,
+        fields: AbstractSet[str],
+        skip: int = 0,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """List some of each user's attributes, loading only those."""
+        projection = field_projection(fields)
+        documents = await self._gather_sorted(
+            lambda collection: collection.find(
+                {}, projection=projection, sort=[("_id", 1)], limit=skip + limit
+            ),
+            _merge_key("_id"),
+            skip + limit
+        )
+        return [document_fields(document, fields) for document in documents[skip:]]
+
+    async def search(
+        self,
+        criteria: UserSearchCriteria,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[User], Optional[str]]:
+        """Search users with keyset pagination.
+
+        Cursors hold a position in the merged order, which every partition
+        can resume from.
+        """
+        query, sort_field = build_search_query(criteria)
+        query = apply_cursor(query, sort_field, cursor)
+        documents = await self._gather_sorted(
+            lambda collection: collection.find(
+                query, sort=sort_keys(sort_field), limit=limit + 1
+            ),
+            _merge_key(sort_field),
+            limit + 1
+        )
+        next_cursor = None
+        if len(documents) > limit:
+            next_cursor = encode_cursor(sort_field, documents[limit - 1])
+        return [self._from_document(document) for document in documents[:limit]], next_cursor
+
+    async def update(self, entity: User) -> User:
+        """Update an existing user."""
+        if await self.exists(entity.id):
+            await self.save_changes(updated=[entity])
+        return entity
+
+    async def patch(self, entity: User, changes: AttributePatch) -> User:
+        """Write only the given changes to an updated user, and its timestamp."""
+        await self._collection(entity.id).update_one(
+            {"_id": entity.id}, self._patch_update(entity, changes)
+        )
+        return entity
+
+    async def delete(self, entity_id: str) -> bool:
+        """Delete a user."""
+        result = await self._collection(entity_id).delete_one({"_id": entity_id})
+        if not result.deleted_count:
+            return False
+        self._counts.invalidate()
+        await self._routes().delete_many({"user_id": entity_id}, session=current_session())
+        return True
+
+    async def exists(self, entity_id: str) -> bool:
+        """Check if a user exists."""
+        document = await self._collection(entity_id).find_one(
+            {"_id": entity_id}, projection={"_id": 1}
+        )
+        return document is not None
+
+    async def email_exists(self, email: Email) -> bool:
+        """Check if email exists."""
+        route = await self._routes().find_one(
+            {"_id": email_route(email.value)}, projection={"_id": 1}, session=current_session()
+        )
+        return route is not None
+
+    async def save_changes(
+        self,
+        added: Sequence[User] = (),
+        updated: Sequence[User] = (),
+        deleted: Sequence[str] = (),
+        changes: Sequence[UserChange] = (),
+        patched: Sequence[Tuple[User, AttributePatch]] = ()
+    ) -> None:
+        """Write each partition's share of the changes in one bulk write per partition.
+
+        Partitions are written concurrently; ``changes`` go to the outbox
+        once all of them succeeded.
+        """
+        operations: Dict[str, List[Any]] = {}
+        for entity in added:
+            self._operations(operations, entity.id).append(InsertOne(self._to_document(entity)))
+        for entity in updated:
+            self._operations(operations, entity.id).append(
+                ReplaceOne({"_id": entity.id}, self._to_document(entity))
+            )
+        for entity, patch in patched:
+            self._operations(operations, entity.id).append(
+                UpdateOne({"_id": entity.id}, self._patch_update(entity, patch))
+            )
+        for entity_id in deleted:
+            self._operations(operations, entity_id).append(DeleteOne({"_id": entity_id}))
+        if not operations and not changes:
+            return
+
+        claimed = await self._claim_routes([*added, *updated])
+        partitions = [self._partitions[name] for name in operations]
+        try:
+            results = await asyncio.gather(
+                *(
+                    partition.collection.bulk_write(operations[partition.name], ordered=True)
+                    for partition in partitions
+                ),
+                return_exceptions=True
+            )
+        finally:
+            # Partially applied batches may still have changed the totals
+            if added or deleted:
+                self._counts.invalidate()
+        failed = {
+            partition.name for partition, result in zip(partitions, results)
+            if isinstance(result, BaseException)
+        }
+        if failed:
+            # Other partitions' writes stand, and keep their users' entries
+            await self._release_routes(
+                key for user_id, keys in claimed.items()
+                if self._partitions.for_user(user_id).name in failed
+                for key in keys
+            )
+            error = next(result for result in results if isinstance(result, BaseException))
+            if isinstance(error, BulkWriteError):
+                duplicate = duplicate_key_error(error)
+                if duplicate is not None:
+                    raise duplicate from error
+            raise error
+
+        await self._prune_routes(updated, deleted)
+        if changes:
+            await UserChangeModel.get_motor_collection().insert_many(
+                [change_document(change) for change in changes],
+                ordered=True,
+                session=current_session()
+            )
+
+    async def _estimate_total(self) -> int:
+        """Total number of users from each partition's collection metadata."""
+        counts = await asyncio.gather(
+            *(self._bulk(partition).estimated_document_count() for partition in self._partitions)
+        )
+        return sum(counts)
+
+    async def _count_matching(self, criteria: UserSearchCriteria) -> int:
+        """Count users matching search criteria on every partition."""
+        query, _ = build_search_query(criteria)
+        counts = await asyncio.gather(
+            *(self._bulk(partition).count_documents(query) for partition in self._partitions)
+        )
+        return sum(counts)
+
+    async def _gather_sorted(
+        self,
+        find: Callable[[AsyncIOMotorCollection], Any],
+        key: Callable[[Document], Any],
+        limit: int
+    ) -> List[Document]:
+        """Run a sorted query on every partition and merge the first results."""
+        results: Sequence[List[Document]] = await asyncio.gather(
+            *(find(self._bulk(partition)).to_list(length=None) for partition in self._partitions)
+        )
+        return list(islice(heapq.merge(*results, key=key), limit))
+
+    async def _find_routed(self, key: str, query: Mapping[str, Any]) -> Optional[Document]:
+        """Find the user a lookup table entry points to, if it still matches."""
+        route = await self._routes().find_one({"_id": key}, session=current_session())
+        if route is None:
+            return None
+        user_id = route["user_id"]
+        return await self._collection(user_id).find_one({"_id": user_id, **query})
+
+    async def _claim_routes(self, users: Sequence[User]) -> Dict[str, List[str]]:
+        """Point the lookup table at users for their unique attributes.
+
+        Raises ``DuplicateKeyError`` if another user holds one, after
+        releasing the entries claimed so far. Returns the entries created,
+        by user, as opposed to those the users already held.
+        """
+        operations: List[UpdateOne] = []
+        owners: List[Tuple[str, str]] = []
+        now = datetime.utcnow()
+        for user in users:
+            for key in route_keys(user.email.value, user.okta_id):
+                # Matches the user's own entry; another user's makes the
+                # upsert collide on _id
+                operations.append(UpdateOne(
+                    {"_id": key, "user_id": user.id},
+                    {"$setOnInsert": {"created_at": now}},
+                    upsert=True
+                ))
+                owners.append((user.id, key))
+        if not operations:
+            return {}
+        try:
+            result = await self._routes().bulk_write(
+                operations, ordered=True, session=current_session()
+            )
+        except BulkWriteError as error:
+            await self._release_routes(
+                upserted["_id"] for upserted in error.details.get("upserted", [])
+            )
+            duplicate = duplicate_key_error(error)
+            if duplicate is not None:
+                raise duplicate from error
+            raise
+        claimed: Dict[str, List[str]] = {}
+        # Only unacknowledged writes report no upserted IDs at all
+        for index in result.upserted_ids or {}:
+            user_id, key = owners[index]
+            claimed.setdefault(user_id, []).append(key)
+        return claimed
+
+    async def _release_routes(self, keys: Iterable[str]) -> None:
+        """Remove lookup table entries claimed for writes that failed."""
+        keys = list(keys)
+        if keys:
+            await self._routes().delete_many({"_id": {"$in": keys}}, session=current_session())
+
+    async def _prune_routes(self, updated: Sequence[User], deleted: Sequence[str]) -> None:
+        """Remove entries of attributes that users changed, or of deleted users."""
+        operations = [
+            DeleteMany({
+                "user_id": user.id,
+                "_id": {"$nin": route_keys(user.email.value, user.okta_id)}
+            })
+            for user in updated
+        ]
+        operations.extend(DeleteMany({"user_id": entity_id}) for entity_id in deleted)
+        if operations:
+            await self._routes().bulk_write(
+                operations, ordered=False, session=current_session()
+            )
+
+    def _operations(self, operations: Dict[str, List[Any]], entity_id: str) -> List[Any]:
+        """The bulk write operations for a user's partition."""
+        return operations.setdefault(self._partitions.for_user(entity_id).name, [])
+
+    def _collection(self, entity_id: str) -> AsyncIOMotorCollection:
+        """Collection of the partition holding a user."""
+        return self._partitions.for_user(entity_id).collection
+
+    def _bulk(self, partition: Partition) -> AsyncIOMotorCollection:
+        """A partition's collection for reads that may be served by secondaries."""
+        if self._bulk_read_preference is None:
+            return partition.collection
+        # Motor's stubs take the ReadPreference namespace rather than a mode
+        return partition.collection.with_options(
+            read_preference=self._bulk_read_preference  # type: ignore[arg-type]
+        )
+
+    def _routes(self) -> AsyncIOMotorCollection:
+        """The lookup table collection."""
+        return UserRouteModel.get_motor_collection()
+
+def _merge_key(sort_field: str) -> Callable[[Document], Any]:
+    """Key ordering documents the way ``sort_keys(sort_field)`` sorts them."""
+    if sort_field == "_id":
+        return lambda document: document["_id"]
+    return lambda document: (document.get(sort_field, ""), document["_id"])
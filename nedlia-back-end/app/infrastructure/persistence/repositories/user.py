@@ -1,36 +1,218 @@
 """MongoDB implementation of user repository."""
 
-from typing import List, Optional
-from uuid import uuid4
+import sys
+from typing import AbstractSet, Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorClientSession, AsyncIOMotorCollection
+from pymongo import DeleteOne, InsertOne, ReplaceOne, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from pymongo.read_preferences import _ServerMode
 
 from app.domain.entities.user import User
-from app.domain.repositories.user import UserRepository
+from app.domain.events.user import UserChange
+from app.domain.exceptions.base import ValidationError
+from app.domain.repositories.user import UserRepository, UserSearchCriteria
 from app.domain.value_objects.common import Email, Password, PhoneNumber
+from app.domain.value_objects.patch import AttributePatch
+from app.infrastructure.persistence.count_cache import CountCache
+from app.infrastructure.persistence.models.outbox import UserChangeModel
 from app.infrastructure.persistence.models.user import UserModel
+from app.infrastructure.persistence.outbox import change_document, published_changes
+from app.infrastructure.persistence.search import (
+    apply_cursor,
+    build_search_query,
+    encode_cursor,
+    search_fields,
+    sort_keys,
+)
+from app.infrastructure.persistence.sessions import current_session
+
+# User attributes readable with ``get_fields``, and the document key of each
+FIELD_KEYS: Dict[str, str] = {
+    "id": "_id",
+    "email": "email",
+    "first_name": "first_name",
+    "last_name": "last_name",
+    "okta_id": "okta_id",
+    "phone": "phone",
+    "is_active": "is_active",
+    "is_verified": "is_verified",
+    "last_sync": "last_sync",
+    "avatar_url": "avatar_url",
+    "locale": "locale",
+    "timezone": "timezone",
+    "preferences": "preferences",
+    "metadata": "metadata",
+    "created_at": "created_at",
+    "updated_at": "updated_at",
+}
+
+# Values for keys missing from a document, matching the entity defaults
+FIELD_DEFAULTS: Dict[str, Any] = {
+    "first_name": "",
+    "last_name": "",
+    "is_active": True,
+    "is_verified": False,
+    "locale": "en-US",
+    "timezone": "UTC",
+}
+
+def check_fields(fields: AbstractSet[str]) -> None:
+    """Raise if any of the given attributes cannot be read as a field."""
+    unknown = fields - FIELD_KEYS.keys()
+    if unknown:
+        raise ValidationError(f"Unknown user fields: {', '.join(sorted(unknown))}")
+
+def field_projection(fields: AbstractSet[str]) -> Dict[str, int]:
+    """MongoDB projection loading only the given attributes and ``_id``."""
+    check_fields(fields)
+    return {FIELD_KEYS[name]: 1 for name in fields}
+
+def document_fields(document: Mapping[str, Any], fields: AbstractSet[str]) -> Dict[str, Any]:
+    """Record of the given attributes from a projected document."""
+    record = {"id": document["_id"]}
+    for name in fields:
+        if name != "id":
+            record[name] = document.get(FIELD_KEYS[name], FIELD_DEFAULTS.get(name))
+    return record
+
+def entity_fields(entity: User, fields: AbstractSet[str]) -> Dict[str, Any]:
+    """Record of the given attributes from an entity, stored the same way."""
+    check_fields(fields)
+    record: Dict[str, Any] = {"id": entity.id}
+    for name in fields:
+        if name == "email":
+            record[name] = entity.email.value
+        elif name == "phone":
+            record[name] = str(entity.phone) if entity.phone else None
+        elif name != "id":
+            record[name] = getattr(entity, name)
+    return record
+
+def duplicate_key_error(error: BulkWriteError) -> Optional[DuplicateKeyError]:
+    """A bulk write's unique index violation, to raise the way single writes do."""
+    for write_error in error.details.get("writeErrors", []):
+        if write_error.get("code") == 11000:
+            return DuplicateKeyError(write_error.get("errmsg", "Duplicate key"), 11000, write_error)
+    return None
 
 class MongoUserRepository(UserRepository):
-    """MongoDB implementation of user repository using Beanie ODM."""
+    """MongoDB implementation of user repository using Beanie ODM.
+
+    Point reads and writes go to the primary. List and search queries use
+    ``bulk_read_preference`` when one is given, typically secondaries with a
+    staleness bound. Operations join the request's causally consistent
+    session, if it has one, so they observe the client's earlier writes.
+    Counts are cached for ``count_cache_ttl`` seconds and dropped whenever
+    users are added or deleted.
+
+    Saved changes go to the outbox along with the writes they describe, in
+    one transaction when ``transactions`` is set. Without transactions, on a
+    standalone server, a failure in between can lose the outbox record.
+    """
+
+    def __init__(
+        self,
+        bulk_read_preference: Optional[_ServerMode] = None,
+        count_cache_ttl: float = 5.0,
+        transactions: bool = False
+    ) -> None:
+        self._bulk_read_preference = bulk_read_preference
+        self._counts = CountCache(ttl=count_cache_ttl)
+        self.transactions = transactions
 
     async def add(self, entity: User) -> User:
         """Add a new user."""
         model = self._to_model(entity)
         await model.save_document()
+        self._counts.invalidate()
         return self._to_entity(model)
 
+    # Reads go straight to the collection and hydrate entities from the raw
+    # documents, skipping the Beanie model validation on the way.
+
     async def get_by_id(self, entity_id: str) -> Optional[User]:
         """Get user by ID."""
-        model = await UserModel.get(entity_id)
-        return self._to_entity(model) if model else None
+        document = await UserModel.get_motor_collection().find_one(
+            {"_id": entity_id}, session=current_session()
+        )
+        return self._from_document(document) if document else None
 
     async def get_by_email(self, email: Email) -> Optional[User]:
         """Get user by email."""
-        model = await UserModel.find_one(UserModel.email == email.value)
-        return self._to_entity(model) if model else None
+        document = await UserModel.get_motor_collection().find_one(
+            {"email": email.value}, session=current_session()
+        )
+        return self._from_document(document) if document else None
+
+    async def get_by_okta_id(self, okta_id: str) -> Optional[User]:
+        """Get user by Okta user ID."""
+        document = await UserModel.get_motor_collection().find_one(
+            {"okta_id": okta_id}, session=current_session()
+        )
+        return self._from_document(document) if document else None
 
     async def list(self, skip: int = 0, limit: int = 100) -> List[User]:
         """List users with pagination."""
-        models = await UserModel.find_all().skip(skip).limit(limit).to_list()
-        return [self._to_entity(model) for model in models]
+        # Sorting on _id keeps pagination stable and on the _id index
+        cursor = self._bulk_collection().find(
+            {}, sort=[("_id", 1)], skip=skip, limit=limit, session=current_session()
+        )
+        return [self._from_document(document) async for document in cursor]
+
+    async def get_fields(
+        self,
+        entity_id: str,
+        fields: AbstractSet[str]
+    ) -> Optional[Dict[str, Any]]:
+        """Get some of a user's attributes, loading only those."""
+        document = await UserModel.get_motor_collection().find_one(
+            {"_id": entity_id}, projection=field_projection(fields), session=current_session()
+        )
+        return document_fields(document, fields) if document else None
+
+    async def list_fields(
+        self,
+        fields: AbstractSet[str],
+        skip: int = 0,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """List some of each user's attributes, loading only those."""
+        cursor = self._bulk_collection().find(
+            {},
+            projection=field_projection(fields),
+            sort=[("_id", 1)],
+            skip=skip,
+            limit=limit,
+            session=current_session()
+        )
+        return [document_fields(document, fields) async for document in cursor]
+
+    async def search(
+        self,
+        criteria: UserSearchCriteria,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[User], Optional[str]]:
+        """Search users with keyset pagination."""
+        query, sort_field = build_search_query(criteria)
+        # One extra document tells whether there is a next page
+        documents = await self._bulk_collection().find(
+            apply_cursor(query, sort_field, cursor),
+            sort=sort_keys(sort_field),
+            limit=limit + 1,
+            session=current_session()
+        ).to_list(length=None)
+        next_cursor = None
+        if len(documents) > limit:
+            next_cursor = encode_cursor(sort_field, documents[limit - 1])
+        return [self._from_document(document) for document in documents[:limit]], next_cursor
+
+    async def count(self, criteria: Optional[UserSearchCriteria] = None) -> int:
+        """Count users, estimating the total from collection metadata."""
+        if criteria is None or criteria.is_empty:
+            return await self._counts.get(None, self._estimate_total)
+        return await self._counts.get(criteria, lambda: self._count_matching(criteria))
 
     async def update(self, entity: User) -> User:
         """Update an existing user."""
@@ -44,46 +226,201 @@ class MongoUserRepository(UserRepository):
             return self._to_entity(model)
         return entity
 
+    async def patch(self, entity: User, changes: AttributePatch) -> User:
+        """Write only the given changes to an updated user, and its timestamp."""
+        await UserModel.get_motor_collection().update_one(
+            {"_id": entity.id}, self._patch_update(entity, changes), session=current_session()
+        )
+        return entity
+
     async def delete(self, entity_id: str) -> bool:
         """Delete a user."""
         model = await UserModel.get(entity_id)
         if model:
             await model.delete()
+            self._counts.invalidate()
             return True
         return False
 
     async def exists(self, entity_id: str) -> bool:
         """Check if a user exists."""
-        model = await UserModel.get(entity_id)
-        return model is not None
+        document = await UserModel.get_motor_collection().find_one(
+            {"_id": entity_id}, projection={"_id": 1}, session=current_session()
+        )
+        return document is not None
 
     async def email_exists(self, email: Email) -> bool:
         """Check if email exists."""
-        model = await UserModel.find_one(UserModel.email == email.value)
-        return model is not None
+        document = await UserModel.get_motor_collection().find_one(
+            {"email": email.value}, projection={"_id": 1}, session=current_session()
+        )
+        return document is not None
+
+    async def changes(self, since: int = 0, limit: int = 100) -> List[UserChange]:
+        """Published changes after feed position ``since``, oldest first."""
+        return await published_changes(since, limit)
+
+    async def save_changes(
+        self,
+        added: Sequence[User] = (),
+        updated: Sequence[User] = (),
+        deleted: Sequence[str] = (),
+        changes: Sequence[UserChange] = (),
+        patched: Sequence[Tuple[User, AttributePatch]] = ()
+    ) -> None:
+        """Write inserts, replacements, patches and deletions in a single bulk write.
+
+        ``changes`` are added to the outbox in the same transaction.
+        """
+        operations: List[Any] = [InsertOne(self._to_document(entity)) for entity in added]
+        operations.extend(
+            ReplaceOne({"_id": entity.id}, self._to_document(entity)) for entity in updated
+        )
+        operations.extend(
+            UpdateOne({"_id": entity.id}, self._patch_update(entity, patch))
+            for entity, patch in patched
+        )
+        operations.extend(DeleteOne({"_id": entity_id}) for entity_id in deleted)
+        if not operations and not changes:
+            return
+        try:
+            if self.transactions:
+                await self._write_in_transaction(operations, changes)
+            else:
+                await self._write(operations, changes, current_session())
+        except BulkWriteError as error:
+            duplicate = duplicate_key_error(error)
+            if duplicate is not None:
+                raise duplicate from error
+            raise
+        finally:
+            # Partially applied batches may still have changed the totals
+            if added or deleted:
+                self._counts.invalidate()
+
+    async def _write(
+        self,
+        operations: List[Any],
+        changes: Sequence[UserChange],
+        session: Optional[AsyncIOMotorClientSession]
+    ) -> None:
+        """Apply user writes, then append their changes to the outbox."""
+        if operations:
+            await UserModel.get_motor_collection().bulk_write(
+                operations, ordered=True, session=session
+            )
+        if changes:
+            await UserChangeModel.get_motor_collection().insert_many(
+                [change_document(change) for change in changes], ordered=True, session=session
+            )
+
+    async def _write_in_transaction(
+        self,
+        operations: List[Any],
+        changes: Sequence[UserChange]
+    ) -> None:
+        """Apply user writes and outbox records atomically.
+
+        Runs in the request's session when it has one, so its consistency
+        token covers the commit. Transient errors are retried by the driver.
+        """
+        session = current_session()
+        if session is not None:
+            await session.with_transaction(lambda s: self._write(operations, changes, s))
+            return
+        client = UserModel.get_motor_collection().database.client
+        async with await client.start_session() as session:
+            await session.with_transaction(lambda s: self._write(operations, changes, s))
+
+    # Counts are shared between requests through the cache, so they run
+    # outside any request's session.
+
+    async def _estimate_total(self) -> int:
+        """Total number of users from collection metadata, without a scan."""
+        return await self._bulk_collection().estimated_document_count()
+
+    async def _count_matching(self, criteria: UserSearchCriteria) -> int:
+        """Count users matching search criteria through the search indexes."""
+        query, _ = build_search_query(criteria)
+        return await self._bulk_collection().count_documents(query)
+
+    def _bulk_collection(self) -> AsyncIOMotorCollection:
+        """Collection handle for reads that may be served by secondaries."""
+        collection = UserModel.get_motor_collection()
+        if self._bulk_read_preference is None:
+            return collection
+        # Motor's stubs take the ReadPreference namespace rather than a mode
+        return collection.with_options(
+            read_preference=self._bulk_read_preference  # type: ignore[arg-type]
+        )
 
     def _to_model(self, entity: User) -> UserModel:
         """Convert domain entity to database model."""
-        return UserModel(
-            id=entity.id,
-            email=entity.email.value,
-            hashed_password=entity.password.value,
-            phone=str(entity.phone) if entity.phone else None,
-            is_active=entity.is_active,
-            is_verified=entity.is_verified,
-            created_at=entity.created_at,
-            updated_at=entity.updated_at
-        )
+        model: UserModel = UserModel.model_validate(self._to_document(entity))
+        return model
+
+    def _to_document(self, entity: User) -> Dict[str, Any]:
+        """Convert domain entity to a raw MongoDB document."""
+        return {
+            "_id": entity.id,
+            "email": entity.email.value,
+            "hashed_password": entity.password.hashed if entity.password else None,
+            "first_name": entity.first_name,
+            "last_name": entity.last_name,
+            "okta_id": entity.okta_id,
+            "phone": str(entity.phone) if entity.phone else None,
+            "is_active": entity.is_active,
+            "is_verified": entity.is_verified,
+            "last_sync": entity.last_sync,
+            "avatar_url": entity.avatar_url,
+            "locale": entity.locale,
+            "timezone": entity.timezone,
+            "preferences": entity.preferences,
+            "metadata": entity.metadata,
+            "created_at": entity.created_at,
+            "updated_at": entity.updated_at,
+            **search_fields(entity)
+        }
+
+    def _patch_update(self, entity: User, changes: AttributePatch) -> Dict[str, Any]:
+        """A targeted update applying a patch, instead of replacing the document."""
+        update: Dict[str, Any] = {"$set": {**changes.updates, "updated_at": entity.updated_at}}
+        if changes.removals:
+            update["$unset"] = {path: "" for path in changes.removals}
+        return update
 
     def _to_entity(self, model: UserModel) -> User:
         """Convert database model to domain entity."""
+        return self._hydrate(model.__dict__, model.id)
+
+    def _from_document(self, document: Mapping[str, Any]) -> User:
+        """Convert a raw MongoDB document to domain entity."""
+        return self._hydrate(document, document["_id"])
+
+    def _hydrate(self, data: Mapping[str, Any], entity_id: str) -> User:
+        """Build an entity from stored data without re-validating it.
+
+        Everything in the collection was validated before it was written, so
+        value objects are created through their trusted constructors. Locale
+        and timezone repeat across most profiles, so they are interned.
+        """
+        phone = data.get("phone")
         return User(
-            email=Email(model.email),
-            password=Password("", model.hashed_password),
-            phone=PhoneNumber(model.phone) if model.phone else None,
-            is_active=model.is_active,
-            is_verified=model.is_verified,
-            entity_id=model.id,
-            created_at=model.created_at,
-            updated_at=model.updated_at
+            email=Email.from_trusted(data["email"]),
+            password=Password.from_trusted("", data.get("hashed_password")),
+            phone=PhoneNumber.from_trusted(phone) if phone else None,
+            is_active=data.get("is_active", True),
+            is_verified=data.get("is_verified", False),
+            first_name=data.get("first_name", ""),
+            last_name=data.get("last_name", ""),
+            okta_id=data.get("okta_id"),
+            last_sync=data.get("last_sync"),
+            avatar_url=data.get("avatar_url"),
+            locale=sys.intern(data.get("locale", "en-US")),
+            timezone=sys.intern(data.get("timezone", "UTC")),
+            preferences=data.get("preferences"),
+            metadata=data.get("metadata"),
+            entity_id=entity_id,
+            created_at=data.get("created_at"),
+            updated_at=data.get("updated_at")
         )
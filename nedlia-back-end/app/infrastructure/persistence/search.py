@@ -0,0 +1,101 @@
+"""User search: normalized fields, query building and keyset cursors."""
+
+import base64
+import re
+import sys
+import unicodedata
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import bson
+
+from app.domain.entities.user import User
+from app.domain.exceptions.base import ValidationError
+from app.domain.repositories.user import UserSearchCriteria
+
+# Prefix criteria and the stored field each one matches, in the order used
+# to pick the sort key when several are given. Each field has an index on
+# (field, _id), so a prefix range and keyset ordering share one index scan.
+PREFIX_FIELDS: List[Tuple[str, str]] = [
+    ("email_prefix", "email_normalized"),
+    ("last_name_prefix", "last_name_normalized"),
+    ("first_name_prefix", "first_name_normalized"),
+]
+
+def normalize(value: str) -> str:
+    """Fold case and strip accents, so "Élodie" and "elodie" match."""
+    decomposed = unicodedata.normalize("NFKD", value)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+def search_fields(entity: User) -> Dict[str, str]:
+    """Normalized copies of the searchable fields, stored with the document."""
+    return {
+        "email_normalized": normalize(entity.email.value),
+        "first_name_normalized": normalize(entity.first_name),
+        "last_name_normalized": normalize(entity.last_name),
+        # A handful of domains repeat across every user, so share one copy each
+        "email_domain": sys.intern(normalize(entity.email.domain)),
+    }
+
+def build_search_query(criteria: UserSearchCriteria) -> Tuple[Dict[str, Any], str]:
+    """Translate search criteria into a filter and the field to sort on.
+
+    Results are ordered by the first prefix field given, then ``_id``, or by
+    ``_id`` alone when there is no prefix.
+    """
+    query: Dict[str, Any] = {}
+    sort_field = "_id"
+    for attribute, field in PREFIX_FIELDS:
+        prefix = getattr(criteria, attribute)
+        if prefix:
+            # Anchored, case-sensitive regexes on normalized values become index ranges
+            query[field] = {"$regex": f"^{re.escape(normalize(prefix))}"}
+            if sort_field == "_id":
+                sort_field = field
+    if criteria.text:
+        query["$text"] = {"$search": criteria.text}
+    if criteria.is_active is not None:
+        query["is_active"] = criteria.is_active
+    if criteria.locale:
+        query["locale"] = criteria.locale
+    if criteria.email_domain:
+        query["email_domain"] = normalize(criteria.email_domain)
+    return query, sort_field
+
+def sort_keys(sort_field: str) -> List[Tuple[str, int]]:
+    """Sort specification for a sort field; ``_id`` breaks ties."""
+    if sort_field == "_id":
+        return [("_id", 1)]
+    return [(sort_field, 1), ("_id", 1)]
+
+def encode_cursor(sort_field: str, document: Mapping[str, Any]) -> str:
+    """Encode the position after ``document`` as an opaque cursor."""
+    position = {"f": sort_field, "id": document["_id"]}
+    if sort_field != "_id":
+        position["v"] = document.get(sort_field, "")
+    return base64.urlsafe_b64encode(bson.encode(position)).decode("ascii")
+
+def cursor_filter(sort_field: str, cursor: str) -> Dict[str, Any]:
+    """Filter selecting results after a cursor's position."""
+    try:
+        position = bson.decode(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except Exception:
+        raise ValidationError("Invalid search cursor")
+    if position.get("f") != sort_field or "id" not in position:
+        raise ValidationError("Search cursor does not match the search criteria")
+    if sort_field == "_id":
+        return {"_id": {"$gt": position["id"]}}
+    return {"$or": [
+        {sort_field: {"$gt": position.get("v")}},
+        {sort_field: position.get("v"), "_id": {"$gt": position["id"]}},
+    ]}
+
+def apply_cursor(
+    query: Dict[str, Any],
+    sort_field: str,
+    cursor: Optional[str]
+) -> Dict[str, Any]:
+    """Restrict a search filter to results after a cursor, if one is given."""
+    if not cursor:
+        return query
+    after = cursor_filter(sort_field, cursor)
+    return {"$and": [query, after]} if query else after
@@ -0,0 +1,87 @@
+"""Read routing and causally consistent sessions."""
+
+import base64
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+
+import bson
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorClientSession
+from pymongo.read_preferences import (
+    Nearest,
+    PrimaryPreferred,
+    Secondary,
+    SecondaryPreferred,
+    _ServerMode,
+)
+
+from app.infrastructure.config.settings import DatabaseSettings
+
+CONSISTENCY_TOKEN_HEADER = "X-Consistency-Token"
+
+# Modes that may read from secondaries and therefore accept a staleness bound
+_STALENESS_MODES = {
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+_current_session: ContextVar[Optional[AsyncIOMotorClientSession]] = ContextVar(
+    "mongo_session", default=None
+)
+
+def current_session() -> Optional[AsyncIOMotorClientSession]:
+    """Get the causally consistent session of the current request, if any."""
+    return _current_session.get()
+
+def bulk_read_preference(settings: DatabaseSettings) -> Optional[_ServerMode]:
+    """Read preference for list, search and export queries.
+
+    Returns ``None`` when bulk reads should stay on the primary.
+    """
+    mode = settings.bulk_read_preference
+    if mode == "primary":
+        return None
+    if mode not in _STALENESS_MODES:
+        raise ValueError(f"Unknown read preference: {mode}")
+    return _STALENESS_MODES[mode](max_staleness=settings.max_staleness_seconds)
+
+async def supports_transactions(client: AsyncIOMotorClient) -> bool:
+    """Whether the deployment is a replica set or sharded cluster."""
+    hello = await client.admin.command("hello")
+    return "setName" in hello or hello.get("msg") == "isdbgrid"
+
+def encode_token(session: AsyncIOMotorClientSession) -> Optional[str]:
+    """Encode how far a session has observed the cluster as an opaque token."""
+    if session.operation_time is None:
+        return None
+    position: Dict[str, Any] = {"operationTime": session.operation_time}
+    if session.cluster_time is not None:
+        # Includes the server's signature, so tokens cannot be forged
+        position["clusterTime"] = session.cluster_time
+    return base64.urlsafe_b64encode(bson.encode(position)).decode("ascii")
+
+def resume_session(session: AsyncIOMotorClientSession, token: Optional[str]) -> None:
+    """Advance a session to the position recorded in a token.
+
+    Malformed tokens are ignored; the request then gets the default,
+    possibly stale, reads rather than an error.
+    """
+    if not token:
+        return
+    try:
+        position = bson.decode(base64.urlsafe_b64decode(token.encode("ascii")))
+    except Exception:
+        return
+    if "clusterTime" in position:
+        session.advance_cluster_time(position["clusterTime"])
+    if "operationTime" in position:
+        session.advance_operation_time(position["operationTime"])
+
+def use_session(session: Optional[AsyncIOMotorClientSession]) -> Any:
+    """Make a session current; returns a token for ``reset_session``."""
+    return _current_session.set(session)
+
+def reset_session(token: Any) -> None:
+    """Restore the session that was current before ``use_session``."""
+    _current_session.reset(token)
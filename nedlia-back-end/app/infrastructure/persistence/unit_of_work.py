@@ -0,0 +1,227 @@
+"""MongoDB unit of work with an identity map."""
+
+from typing import AbstractSet, Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from app.domain.entities.user import User
+from app.domain.events.user import UserChange
+from app.domain.repositories.unit_of_work import UnitOfWork
+from app.domain.repositories.user import UserRepository, UserSearchCriteria
+from app.domain.value_objects.common import Email
+from app.domain.value_objects.patch import AttributePatch
+from app.infrastructure.persistence.repositories.user import MongoUserRepository, entity_fields
+
+class TrackingUserRepository(UserRepository):
+    """User repository that loads each document once and defers writes.
+
+    Loaded users are kept in an identity map, so repeated lookups within a
+    unit of work return the same instance without another query. ``None``
+    entries record users known to be missing or deleted, and IDs confirmed
+    by ``exists`` are remembered without loading the document.
+    """
+
+    def __init__(self, store: MongoUserRepository) -> None:
+        self._store = store
+        self._identity_map: Dict[str, Optional[User]] = {}
+        self._existing: Set[str] = set()
+        self._added: Dict[str, User] = {}
+        self._updated: Dict[str, User] = {}
+        # Users with a single patch, written as targeted updates
+        self._patched: Dict[str, Tuple[User, AttributePatch]] = {}
+        self._deleted: Set[str] = set()
+
+    @property
+    def has_changes(self) -> bool:
+        """Whether there are changes waiting to be flushed."""
+        return bool(self._added or self._updated or self._patched or self._deleted)
+
+    async def get_by_id(self, entity_id: str) -> Optional[User]:
+        """Get user by ID."""
+        if entity_id in self._identity_map:
+            return self._identity_map[entity_id]
+        user = await self._store.get_by_id(entity_id)
+        self._identity_map[entity_id] = user
+        return user
+
+    async def get_by_email(self, email: Email) -> Optional[User]:
+        """Get user by email."""
+        # Mapped users may carry changes the database has not seen yet
+        for user in self._identity_map.values():
+            if user is not None and user.email == email:
+                return user
+        user = self._merge(await self._store.get_by_email(email))
+        return user if user is not None and user.email == email else None
+
+    async def get_by_okta_id(self, okta_id: str) -> Optional[User]:
+        """Get user by Okta user ID."""
+        for user in self._identity_map.values():
+            if user is not None and user.okta_id == okta_id:
+                return user
+        user = self._merge(await self._store.get_by_okta_id(okta_id))
+        return user if user is not None and user.okta_id == okta_id else None
+
+    async def list(self, skip: int = 0, limit: int = 100) -> List[User]:
+        """List users with pagination."""
+        users = [self._merge(user) for user in await self._store.list(skip=skip, limit=limit)]
+        return [user for user in users if user is not None]
+
+    # Partial records are never mapped, but mapped users take precedence
+    # over them so that unflushed changes stay visible.
+
+    async def get_fields(
+        self,
+        entity_id: str,
+        fields: AbstractSet[str]
+    ) -> Optional[Dict[str, Any]]:
+        """Get some of a user's attributes."""
+        if entity_id in self._identity_map:
+            user = self._identity_map[entity_id]
+            return entity_fields(user, fields) if user is not None else None
+        return await self._store.get_fields(entity_id, fields)
+
+    async def list_fields(
+        self,
+        fields: AbstractSet[str],
+        skip: int = 0,
+        limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """List some of each user's attributes."""
+        records = await self._store.list_fields(fields, skip=skip, limit=limit)
+        if not self._identity_map:
+            return records
+        merged = []
+        for record in records:
+            if record["id"] not in self._identity_map:
+                merged.append(record)
+                continue
+            user = self._identity_map[record["id"]]
+            if user is not None:
+                merged.append(entity_fields(user, fields))
+        return merged
+
+    async def search(
+        self,
+        criteria: UserSearchCriteria,
+        limit: int = 20,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[User], Optional[str]]:
+        """Search users with keyset pagination."""
+        found, next_cursor = await self._store.search(criteria, limit=limit, cursor=cursor)
+        users = [self._merge(user) for user in found]
+        return [user for user in users if user is not None], next_cursor
+
+    async def count(self, criteria: Optional[UserSearchCriteria] = None) -> int:
+        """Count stored users; unflushed changes are not included."""
+        return await self._store.count(criteria)
+
+    async def changes(self, since: int = 0, limit: int = 100) -> List[UserChange]:
+        """Published changes after feed position ``since``, oldest first."""
+        return await self._store.changes(since=since, limit=limit)
+
+    async def add(self, entity: User) -> User:
+        """Record a new user."""
+        self._identity_map[entity.id] = entity
+        self._added[entity.id] = entity
+        self._deleted.discard(entity.id)
+        return entity
+
+    async def update(self, entity: User) -> User:
+        """Record changes to a user."""
+        self._identity_map[entity.id] = entity
+        self._patched.pop(entity.id, None)
+        if entity.id not in self._added:
+            self._updated[entity.id] = entity
+        return entity
+
+    async def patch(self, entity: User, changes: AttributePatch) -> User:
+        """Record targeted changes to a user."""
+        self._identity_map[entity.id] = entity
+        if entity.id in self._added or entity.id in self._updated:
+            # The whole document is written anyway
+            return entity
+        if entity.id in self._patched:
+            # Later patches may touch the paths of earlier ones
+            del self._patched[entity.id]
+            self._updated[entity.id] = entity
+            return entity
+        self._patched[entity.id] = (entity, changes)
+        return entity
+
+    async def delete(self, entity_id: str) -> bool:
+        """Record the deletion of a user."""
+        if not await self.exists(entity_id):
+            return False
+        self._identity_map[entity_id] = None
+        self._updated.pop(entity_id, None)
+        self._patched.pop(entity_id, None)
+        if self._added.pop(entity_id, None) is None:
+            self._deleted.add(entity_id)
+        return True
+
+    async def exists(self, entity_id: str) -> bool:
+        """Check if a user exists."""
+        if entity_id in self._identity_map:
+            return self._identity_map[entity_id] is not None
+        if entity_id in self._existing:
+            return True
+        if await self._store.exists(entity_id):
+            self._existing.add(entity_id)
+            return True
+        self._identity_map[entity_id] = None
+        return False
+
+    async def email_exists(self, email: Email) -> bool:
+        """Check if email exists."""
+        return await self.get_by_email(email) is not None
+
+    async def flush(self, changes: Sequence[UserChange] = ()) -> None:
+        """Write all recorded changes in one batch, with their outbox records."""
+        if self.has_changes or changes:
+            await self._store.save_changes(
+                added=list(self._added.values()),
+                updated=list(self._updated.values()),
+                deleted=list(self._deleted),
+                changes=changes,
+                patched=list(self._patched.values())
+            )
+        self._added.clear()
+        self._updated.clear()
+        self._patched.clear()
+        self._deleted.clear()
+
+    def clear(self) -> None:
+        """Forget recorded changes and every loaded user."""
+        self._identity_map.clear()
+        self._existing.clear()
+        self._added.clear()
+        self._updated.clear()
+        self._patched.clear()
+        self._deleted.clear()
+
+    def _merge(self, user: Optional[User]) -> Optional[User]:
+        """Return the mapped instance for a loaded user, mapping it if new."""
+        if user is None:
+            return None
+        return self._identity_map.setdefault(user.id, user)
+
+class MongoUnitOfWork(UnitOfWork):
+    """Unit of work for one request, backed by MongoDB."""
+
+    users: TrackingUserRepository
+
+    def __init__(self, repository: MongoUserRepository) -> None:
+        super().__init__()
+        self.users = TrackingUserRepository(repository)
+
+    async def commit(self) -> None:
+        """Write all recorded changes."""
+        changes, self._changes = self._changes, []
+        try:
+            await self.users.flush(changes)
+        except Exception:
+            self.rollback()
+            raise
+
+    def rollback(self) -> None:
+        """Discard recorded changes and loaded users."""
+        self._changes.clear()
+        self.users.clear()
@@ -0,0 +1,102 @@
+"""Event loop lag monitoring and blocked loop detection."""
+
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+import structlog
+from prometheus_client import Counter, Histogram
+
+logger = structlog.get_logger(__name__)
+
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "Delay between when a loop callback was due and when it ran",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+
+EVENT_LOOP_BLOCKS = Counter(
+    "event_loop_blocks_total",
+    "Total count of times the event loop was blocked beyond the threshold"
+)
+
+class EventLoopMonitor:
+    """Measures event loop lag and reports what blocks the loop.
+
+    A task on the loop sleeps for ``interval`` and records how late it wakes
+    up; any lateness is time some callback held the loop. A watchdog thread
+    checks that the task keeps waking up. When it has been silent for longer
+    than ``block_threshold``, the watchdog logs the loop thread's stack, which
+    is the code blocking it, once per blocked episode.
+    """
+
+    def __init__(self, interval: float = 0.1, block_threshold: float = 0.25) -> None:
+        self._interval = interval
+        self._block_threshold = block_threshold
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        # Monotonic time the loop task is next expected to wake up
+        self._due = 0.0
+
+    def start(self) -> None:
+        """Start monitoring the running loop."""
+        if self._task is not None:
+            return
+        self._due = time.monotonic() + self._interval
+        self._stopped.clear()
+        self._task = asyncio.get_running_loop().create_task(self._measure())
+        self._watchdog = threading.Thread(
+            target=self._watch,
+            args=(threading.get_ident(),),
+            name="event-loop-watchdog",
+            daemon=True
+        )
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Stop monitoring."""
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+    async def _measure(self) -> None:
+        """Record how late the loop wakes this task up."""
+        while True:
+            await asyncio.sleep(self._interval)
+            now = time.monotonic()
+            EVENT_LOOP_LAG.observe(max(0.0, now - self._due))
+            self._due = now + self._interval
+
+    def _watch(self, loop_thread_id: int) -> None:
+        """Log the loop thread's stack when the loop stops waking up."""
+        # Check often enough to catch a block soon after it crosses the threshold
+        check_interval = self._block_threshold / 2
+        reported_due = None
+        while not self._stopped.wait(check_interval):
+            due = self._due
+            blocked_for = time.monotonic() - due
+            if blocked_for < self._block_threshold or due == reported_due:
+                continue
+            reported_due = due
+            frame = sys._current_frames().get(loop_thread_id)
+            # "stack" is reserved by structlog's renderers
+            blocking_stack = "".join(traceback.format_stack(frame)) if frame is not None else ""
+            del frame
+            EVENT_LOOP_BLOCKS.inc()
+            logger.warning(
+                "event_loop_blocked",
+                blocked_for_ms=round(blocked_for * 1000, 1),
+                blocking_stack=blocking_stack
+            )
@@ -0,0 +1,139 @@
+"""On-demand request profiling."""
+
+import asyncio
+import os
+import re
+import time
+from pathlib import Path
+from typing import Optional
+
+import structlog
+from prometheus_client import Counter
+
+from app.infrastructure.config.settings import ProfilingSettings
+from app.infrastructure.profiling.sampler import ProfileSession, StackSampler
+
+logger = structlog.get_logger(__name__)
+
+PROFILES_CAPTURED = Counter(
+    "profiles_captured_total",
+    "Total count of request profiles written to disk",
+    ["reason"]
+)
+
+PROFILE_SUFFIX = ".folded"
+
+_UNSAFE_CHARACTERS = re.compile(r"[^A-Za-z0-9_-]")
+
+class ProfileStore:
+    """Directory of collapsed-stack profiles with retention limits."""
+
+    def __init__(self, directory: str, max_profiles: int = 100, max_age_hours: int = 24) -> None:
+        self._directory = Path(directory)
+        self._max_profiles = max_profiles
+        self._max_age_seconds = max_age_hours * 3600
+
+    def profile_id(self, session: ProfileSession) -> str:
+        """Name under which a session's profile is stored."""
+        started = time.strftime("%Y%m%dT%H%M%S", time.gmtime(session.started_at))
+        request_id = _UNSAFE_CHARACTERS.sub("", session.request_id)
+        return f"{started}-{session.reason}-{request_id}"
+
+    def save(self, session: ProfileSession) -> Path:
+        """Write a profile and remove profiles beyond the retention limits."""
+        self._directory.mkdir(parents=True, exist_ok=True)
+        path = self._directory / f"{self.profile_id(session)}{PROFILE_SUFFIX}"
+        path.write_text(session.folded())
+        self._prune()
+        return path
+
+    def _prune(self) -> None:
+        """Delete expired profiles, then the oldest beyond the count limit."""
+        cutoff = time.time() - self._max_age_seconds
+        profiles = []
+        for path in self._directory.glob(f"*{PROFILE_SUFFIX}"):
+            try:
+                modified = path.stat().st_mtime
+            except FileNotFoundError:
+                continue
+            if modified < cutoff:
+                path.unlink(missing_ok=True)
+            else:
+                profiles.append((modified, path))
+        profiles.sort()
+        for _, path in profiles[:max(0, len(profiles) - self._max_profiles)]:
+            path.unlink(missing_ok=True)
+
+class RequestProfiler:
+    """Profiles individual requests on demand.
+
+    A request is profiled from the start when it asks for it, or from the
+    moment it exceeds the latency threshold, if one is set.
+    """
+
+    def __init__(
+        self,
+        sampler: StackSampler,
+        store: ProfileStore,
+        latency_threshold: Optional[float] = None
+    ) -> None:
+        self._sampler = sampler
+        self._store = store
+        self._latency_threshold = latency_threshold
+
+    def begin(self, request_id: str, requested: bool) -> Optional[ProfileSession]:
+        """Start or arm profiling for a request.
+
+        Returns ``None`` when the request will not be profiled.
+        """
+        if requested:
+            session = self._sampler.start_session(request_id, "requested")
+            if session is not None:
+                return session
+        if self._latency_threshold is None:
+            return None
+        return self._sampler.watch(request_id, "slow", self._latency_threshold)
+
+    def profile_id(self, session: ProfileSession) -> str:
+        """Name under which a session's profile will be stored."""
+        return self._store.profile_id(session)
+
+    async def finish(self, session: ProfileSession) -> None:
+        """Stop profiling a request and write its profile off the loop."""
+        self._sampler.stop_session(session)
+        if not session.samples:
+            return
+        path = await asyncio.get_running_loop().run_in_executor(None, self._store.save, session)
+        PROFILES_CAPTURED.labels(reason=session.reason).inc()
+        logger.info(
+            "request_profiled",
+            request_id=session.request_id,
+            reason=session.reason,
+            samples=session.sample_count,
+            profile=os.fspath(path)
+        )
+
+    def shutdown(self) -> None:
+        """Stop sampling."""
+        self._sampler.shutdown()
+
+def create_request_profiler(settings: ProfilingSettings) -> RequestProfiler:
+    """Create a profiler from the settings."""
+    interval = settings.interval_ms / 1000
+    threshold = (
+        settings.latency_threshold_ms / 1000 if settings.latency_threshold_ms else None
+    )
+    return RequestProfiler(
+        StackSampler(
+            interval=interval,
+            max_active=settings.max_concurrent,
+            # Deadlines are noticed within a tenth of the threshold
+            poll_interval=max(threshold / 10, interval) if threshold else None
+        ),
+        ProfileStore(
+            settings.output_dir,
+            max_profiles=settings.max_profiles,
+            max_age_hours=settings.max_age_hours
+        ),
+        latency_threshold=threshold
+    )
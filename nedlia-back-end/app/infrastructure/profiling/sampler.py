@@ -0,0 +1,160 @@
+"""Statistical stack sampling of the event loop thread."""
+
+import sys
+import threading
+import time
+from collections import Counter
+from types import CodeType, FrameType
+from typing import Dict, List, Optional
+
+# Deeper frames are cut off, keeping the outermost ones
+MAX_STACK_DEPTH = 128
+
+class ProfileSession:
+    """Stack samples collected while one request was in flight.
+
+    Samples come from the whole event loop thread, so work of concurrent
+    requests on the same worker shows up too, which is often exactly what
+    made this one slow. Time the loop spends waiting on I/O appears under
+    the selector's ``select`` frame.
+    """
+
+    def __init__(self, request_id: str, reason: str, deadline: Optional[float] = None) -> None:
+        self.request_id = request_id
+        self.reason = reason
+        self.started_at = time.time()
+        # Monotonic time at which a watched session starts sampling
+        self.deadline = deadline
+        self.active = deadline is None
+        self.samples: Counter = Counter()
+
+    @property
+    def sample_count(self) -> int:
+        """Number of samples taken."""
+        return sum(self.samples.values())
+
+    def folded(self) -> str:
+        """Samples in collapsed-stack format, as read by flamegraph tools."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+class StackSampler:
+    """Samples the event loop thread's stack while sessions are active.
+
+    Sessions are either active from the start or watched: a watched session
+    becomes active once its deadline passes. Deadlines are checked by the
+    sampling thread rather than a loop timer, so a request that blocks the
+    loop is still caught. Between profiles the thread sleeps, waking only
+    every ``poll_interval`` to check deadlines. Sessions must be created on
+    the event loop thread, which is the thread sampled.
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.005,
+        max_active: int = 4,
+        poll_interval: Optional[float] = None
+    ) -> None:
+        self._interval = interval
+        self._max_active = max_active
+        self._poll_interval = poll_interval
+        self._sessions: Dict[int, ProfileSession] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._target_thread_id: Optional[int] = None
+        self._stopped = False
+        # Formatted frame names, by code object
+        self._names: Dict[CodeType, str] = {}
+
+    def start_session(self, request_id: str, reason: str) -> Optional[ProfileSession]:
+        """Start sampling for a request, or return ``None`` if at capacity."""
+        with self._lock:
+            if self._stopped or self._active_count() >= self._max_active:
+                return None
+            session = ProfileSession(request_id, reason)
+            self._add(session)
+        self._wakeup.set()
+        return session
+
+    def watch(self, request_id: str, reason: str, delay: float) -> ProfileSession:
+        """Start sampling for a request if it is still running after ``delay``."""
+        session = ProfileSession(request_id, reason, deadline=time.monotonic() + delay)
+        with self._lock:
+            if not self._stopped:
+                self._add(session)
+        return session
+
+    def stop_session(self, session: ProfileSession) -> None:
+        """Stop sampling for a request."""
+        with self._lock:
+            self._sessions.pop(id(session), None)
+
+    def shutdown(self) -> None:
+        """Stop the sampling thread."""
+        with self._lock:
+            self._stopped = True
+            self._sessions.clear()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def _add(self, session: ProfileSession) -> None:
+        """Register a session, starting the thread on first use; needs the lock."""
+        self._sessions[id(session)] = session
+        self._target_thread_id = threading.get_ident()
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+            self._thread.start()
+
+    def _active_count(self) -> int:
+        """Number of sampling sessions; needs the lock."""
+        return sum(1 for session in self._sessions.values() if session.active)
+
+    def _run(self) -> None:
+        """Sample while sessions are active, otherwise wait for one."""
+        while not self._stopped:
+            with self._lock:
+                self._activate_due()
+                active = [session for session in self._sessions.values() if session.active]
+            if not active:
+                self._wakeup.wait(self._poll_interval)
+                self._wakeup.clear()
+                continue
+
+            target = self._target_thread_id
+            frame = sys._current_frames().get(target) if target is not None else None
+            if frame is not None:
+                stack = self._fold(frame)
+                with self._lock:
+                    # Stopped sessions may be read concurrently, so skip them
+                    for session in active:
+                        if self._sessions.get(id(session)) is session:
+                            session.samples[stack] += 1
+            del frame
+            time.sleep(self._interval)
+
+    def _activate_due(self) -> None:
+        """Activate watched sessions past their deadline; needs the lock."""
+        now = time.monotonic()
+        available = self._max_active - self._active_count()
+        for session in self._sessions.values():
+            if available <= 0:
+                return
+            if not session.active and session.deadline is not None and session.deadline <= now:
+                session.active = True
+                available -= 1
+
+    def _fold(self, frame: Optional[FrameType]) -> str:
+        """Format a stack, outermost frame first."""
+        names: List[str] = []
+        while frame is not None and len(names) < MAX_STACK_DEPTH:
+            code = frame.f_code
+            name = self._names.get(code)
+            if name is None:
+                name = f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+                self._names[code] = name
+            names.append(name)
+            frame = frame.f_back
+        names.reverse()
+        return ";".join(names)
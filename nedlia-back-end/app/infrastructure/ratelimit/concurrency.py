@@ -0,0 +1,115 @@
+"""Adaptive limit on the requests a worker serves at once."""
+
+import math
+from typing import Optional
+
+from prometheus_client import Gauge
+
+from app.infrastructure.config.settings import ConcurrencyLimitSettings
+
+# Priority classes, from never shed to shed first
+CRITICAL = "critical"
+HIGH = "high"
+NORMAL = "normal"
+PRIORITIES = (CRITICAL, HIGH, NORMAL)
+
+CONCURRENCY_LIMIT = Gauge(
+    "concurrency_limit",
+    "Requests this worker currently lets run at once"
+)
+
+CONCURRENCY_IN_FLIGHT = Gauge(
+    "concurrency_in_flight",
+    "Requests running in this worker under the concurrency limit"
+)
+
+class AdaptiveConcurrencyLimiter:
+    """In-flight request limit following latency, by the gradient method.
+
+    Each finished request's latency updates a short and a long moving
+    average. While the short one stays within ``tolerance`` times the long
+    one the limit grows by about its square root per request; when it rises
+    past that, the limit shrinks in proportion, by at most half. Updates are
+    smoothed, kept between ``min_limit`` and ``max_limit``, and skipped
+    while fewer than half the allowed requests are running, as latency then
+    says nothing about the limit.
+
+    Critical requests are always let in. High priority ones may fill the
+    limit, and normal ones all but its ``headroom`` share, which stays free
+    for the others when normal traffic spikes. State is per worker; as the
+    event loop runs one thing at a time, no locking is needed.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 20,
+        min_limit: int = 4,
+        max_limit: int = 200,
+        tolerance: float = 1.5,
+        smoothing: float = 0.2,
+        headroom: float = 0.1,
+        short_window: int = 10,
+        long_window: int = 500
+    ) -> None:
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(min(max(initial_limit, min_limit), max_limit))
+        self.in_flight = 0
+        self._tolerance = tolerance
+        self._smoothing = smoothing
+        self._headroom = headroom
+        self._short_window = short_window
+        self._long_window = long_window
+        self._short_latency: Optional[float] = None
+        self._long_latency: Optional[float] = None
+        CONCURRENCY_LIMIT.set(self.limit)
+
+    def try_acquire(self, priority: str = NORMAL) -> bool:
+        """Take a slot for a request, unless its priority class is full."""
+        if priority == NORMAL:
+            allowed = self.in_flight < self.limit * (1 - self._headroom)
+        else:
+            allowed = priority == CRITICAL or self.in_flight < self.limit
+        if allowed:
+            self.in_flight += 1
+            CONCURRENCY_IN_FLIGHT.inc()
+        return allowed
+
+    def release(self, latency: Optional[float] = None) -> None:
+        """Free a request's slot, learning from its latency if it finished."""
+        in_flight = self.in_flight
+        self.in_flight -= 1
+        CONCURRENCY_IN_FLIGHT.dec()
+        if latency is not None:
+            self._update(latency, in_flight)
+
+    def _update(self, latency: float, in_flight: int) -> None:
+        """Move the limit by how latency compares with its long-term average."""
+        latency = max(latency, 1e-6)
+        if self._short_latency is None or self._long_latency is None:
+            self._short_latency = self._long_latency = latency
+            return
+        self._short_latency += (latency - self._short_latency) / self._short_window
+        self._long_latency += (latency - self._long_latency) / self._long_window
+        # Once a spike drains, let the long average catch up with recovery
+        if self._long_latency > 2 * self._short_latency:
+            self._long_latency *= 0.95
+        if in_flight < self.limit / 2:
+            return
+
+        gradient = max(0.5, min(1.0, self._tolerance * self._long_latency / self._short_latency))
+        target = self.limit * gradient + math.sqrt(self.limit)
+        limit = (1 - self._smoothing) * self.limit + self._smoothing * target
+        self.limit = min(max(limit, self.min_limit), self.max_limit)
+        CONCURRENCY_LIMIT.set(self.limit)
+
+def create_concurrency_limiter(settings: ConcurrencyLimitSettings) -> AdaptiveConcurrencyLimiter:
+    """Create the limiter described by the settings."""
+    return AdaptiveConcurrencyLimiter(
+        initial_limit=settings.initial_limit,
+        min_limit=settings.min_limit,
+        max_limit=settings.max_limit,
+        tolerance=settings.tolerance,
+        smoothing=settings.smoothing,
+        headroom=settings.headroom
+    )
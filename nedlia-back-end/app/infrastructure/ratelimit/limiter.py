@@ -0,0 +1,267 @@
+"""Rate limiters shared across workers through Redis, or local to one."""
+
+import re
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Sequence, Tuple
+
+import structlog
+from prometheus_client import Counter
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+from app.infrastructure.config.settings import RateLimitSettings, RedisSettings
+
+logger = structlog.get_logger(__name__)
+
+RATE_LIMIT_FALLBACKS = Counter(
+    "rate_limit_fallbacks_total",
+    "Total count of rate limit checks made locally because Redis failed"
+)
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+_LIMIT_PATTERN = re.compile(r"^\s*(\d+)\s*/\s*(\d*)\s*(second|minute|hour|day)s?\s*$")
+
+@dataclass(frozen=True)
+class RateLimit:
+    """At most ``count`` requests per ``period`` seconds, in bursts or spread out."""
+
+    count: int
+    period: float
+
+    @property
+    def interval(self) -> float:
+        """Seconds each request adds to the client's schedule."""
+        return self.period / self.count
+
+def parse_rate_limit(value: str) -> RateLimit:
+    """Parse a limit such as ``100/minute`` or ``10/30seconds``."""
+    match = _LIMIT_PATTERN.match(value.lower())
+    if match is None or int(match.group(1)) == 0:
+        raise ValueError(f"Invalid rate limit: {value}")
+    count, multiple, unit = match.groups()
+    return RateLimit(int(count), int(multiple or 1) * _PERIODS[unit])
+
+@dataclass(frozen=True)
+class RateLimitDecision:
+    """Outcome of a rate limit check, for the most restrictive limit."""
+
+    allowed: bool
+    limit: int
+    remaining: int
+    # Seconds until the limit is fully available again
+    reset_after: float
+    # Seconds until a request would be allowed; zero when allowed
+    retry_after: float = 0.0
+
+def _decision(
+    allowed: bool,
+    limits: Sequence[RateLimit],
+    states: Sequence[Tuple[int, float]],
+    retry_after: float
+) -> RateLimitDecision:
+    """Report the limit with the fewest requests remaining."""
+    index = min(range(len(limits)), key=lambda i: states[i][0])
+    remaining, reset_after = states[index]
+    return RateLimitDecision(
+        allowed=allowed,
+        limit=limits[index].count,
+        remaining=remaining,
+        reset_after=reset_after,
+        retry_after=retry_after
+    )
+
+class RateLimiter(ABC):
+    """Checks requests against several limits at once."""
+
+    @abstractmethod
+    async def acquire(
+        self,
+        keys: Sequence[str],
+        limits: Sequence[RateLimit]
+    ) -> RateLimitDecision:
+        """Count a request against each key's limit.
+
+        The request is counted against all keys or, if any limit is
+        exhausted, against none of them.
+        """
+        pass
+
+    async def warm_up(self) -> None:
+        """Prepare for the first check, such as by connecting."""
+        pass
+
+    async def close(self) -> None:
+        """Release resources."""
+        pass
+
+class LocalRateLimiter(RateLimiter):
+    """Token buckets held in this worker's memory.
+
+    Each bucket holds up to the limit's count and refills continuously over
+    its period, which allows the same bursts as the shared limiter. The
+    least recently used buckets are dropped beyond ``max_keys``; a dropped
+    bucket starts again full.
+    """
+
+    def __init__(self, max_keys: int = 10000) -> None:
+        self._max_keys = max_keys
+        # Key to (tokens, time of last refill)
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def acquire(
+        self,
+        keys: Sequence[str],
+        limits: Sequence[RateLimit]
+    ) -> RateLimitDecision:
+        """Take a token from each key's bucket if all have one."""
+        now = time.monotonic()
+        tokens: List[float] = []
+        for key, limit in zip(keys, limits):
+            available, updated = self._buckets.get(key, (limit.count, now))
+            tokens.append(min(limit.count, available + (now - updated) / limit.interval))
+
+        allowed = all(available >= 1 for available in tokens)
+        retry_after = 0.0
+        if allowed:
+            tokens = [available - 1 for available in tokens]
+        else:
+            retry_after = max(
+                (1 - available) * limit.interval
+                for available, limit in zip(tokens, limits) if available < 1
+            )
+        for key, available in zip(keys, tokens):
+            self._buckets[key] = (available, now)
+            self._buckets.move_to_end(key)
+        while len(self._buckets) > self._max_keys:
+            self._buckets.popitem(last=False)
+
+        states = [
+            (int(available), (limit.count - available) * limit.interval)
+            for available, limit in zip(tokens, limits)
+        ]
+        return _decision(allowed, limits, states, retry_after)
+
+# GCRA over several keys in one round trip. Each key holds the theoretical
+# arrival time (TAT) in milliseconds: when the client's schedule would be
+# clear again. A request fits if the TAT it pushes out stays within one
+# period of now. Redis' clock is used so that every pod agrees.
+_GCRA_SCRIPT = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) * 1000 + math.floor(tonumber(clock[2]) / 1000)
+local allowed = 1
+local retry = 0
+local tats = {}
+for i, key in ipairs(KEYS) do
+    local interval = tonumber(ARGV[2 * i - 1])
+    local period = tonumber(ARGV[2 * i])
+    local tat = math.max(tonumber(redis.call('GET', key) or now), now)
+    tats[i] = tat
+    local wait = tat + interval - now - period
+    if wait > 0 then
+        allowed = 0
+        retry = math.max(retry, wait)
+    end
+end
+-- Numbers are returned truncated to integers
+local result = {allowed, math.ceil(retry)}
+for i, key in ipairs(KEYS) do
+    local interval = tonumber(ARGV[2 * i - 1])
+    local period = tonumber(ARGV[2 * i])
+    local tat = tats[i]
+    if allowed == 1 then
+        tat = tat + interval
+        redis.call('SET', key, string.format('%.3f', tat), 'PX', math.ceil(tat - now))
+    end
+    table.insert(result, math.floor((period - (tat - now)) / interval + 1e-9))
+    table.insert(result, math.ceil(tat - now))
+end
+return result
+"""
+
+class RedisRateLimiter(RateLimiter):
+    """Limits shared by every worker and pod through Redis.
+
+    State is updated by a script, so concurrent checks from any number of
+    workers are atomic. When Redis fails, checks fall back to a local
+    limiter for ``fallback_seconds`` before Redis is tried again, so an
+    outage costs one timeout per interval rather than one per request.
+    Local limits apply per worker, so they are looser while Redis is down.
+    """
+
+    def __init__(
+        self,
+        redis: aioredis.Redis,
+        fallback: RateLimiter,
+        key_prefix: str = "ratelimit",
+        fallback_seconds: float = 5.0
+    ) -> None:
+        self._redis = redis
+        self._script = redis.register_script(_GCRA_SCRIPT)
+        self._fallback = fallback
+        self._key_prefix = key_prefix
+        self._fallback_seconds = fallback_seconds
+        # Monotonic time until which checks stay local
+        self._fallback_until = 0.0
+
+    async def acquire(
+        self,
+        keys: Sequence[str],
+        limits: Sequence[RateLimit]
+    ) -> RateLimitDecision:
+        """Count the request in Redis, or locally while Redis is failing."""
+        if time.monotonic() < self._fallback_until:
+            RATE_LIMIT_FALLBACKS.inc()
+            return await self._fallback.acquire(keys, limits)
+        arguments: List[float] = []
+        for limit in limits:
+            arguments.extend((limit.interval * 1000, limit.period * 1000))
+        try:
+            result = await self._script(
+                keys=[f"{self._key_prefix}:{key}" for key in keys],
+                args=arguments
+            )
+        except (RedisError, OSError) as error:
+            logger.warning("rate_limit_redis_failed", error=str(error))
+            self._fallback_until = time.monotonic() + self._fallback_seconds
+            RATE_LIMIT_FALLBACKS.inc()
+            return await self._fallback.acquire(keys, limits)
+
+        allowed, retry_ms = int(result[0]), int(result[1])
+        states = [
+            (max(int(result[i]), 0), int(result[i + 1]) / 1000)
+            for i in range(2, len(result), 2)
+        ]
+        return _decision(allowed == 1, limits, states, retry_ms / 1000)
+
+    async def warm_up(self) -> None:
+        """Connect, and load the script so the first check need not send it."""
+        await self._redis.script_load(_GCRA_SCRIPT)
+
+    async def close(self) -> None:
+        """Close the Redis connection pool."""
+        await self._redis.aclose()
+
+def create_rate_limiter(settings: RateLimitSettings, redis: RedisSettings) -> RateLimiter:
+    """Create the limiter selected in the settings."""
+    local = LocalRateLimiter(max_keys=settings.local_max_keys)
+    if settings.backend == "local":
+        return local
+    if settings.backend != "redis":
+        raise ValueError(f"Unknown rate limit backend: {settings.backend}")
+    timeout = settings.redis_timeout_ms / 1000
+    client = aioredis.from_url(
+        str(redis.url),
+        max_connections=redis.pool_size,
+        socket_timeout=timeout,
+        socket_connect_timeout=timeout
+    )
+    return RedisRateLimiter(
+        client,
+        fallback=local,
+        key_prefix=settings.key_prefix,
+        fallback_seconds=settings.fallback_seconds
+    )
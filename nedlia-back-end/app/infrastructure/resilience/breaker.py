@@ -0,0 +1,156 @@
+"""Circuit breaker failing calls fast while a dependency is unhealthy."""
+
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Tuple, Type
+
+import structlog
+from prometheus_client import Counter, Gauge
+
+logger = structlog.get_logger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+CIRCUIT_STATE = Gauge(
+    "circuit_breaker_state",
+    "Circuit breaker state: 0 closed, 1 half open, 2 open",
+    ["breaker"]
+)
+
+CIRCUIT_TRANSITIONS = Counter(
+    "circuit_breaker_transitions_total",
+    "Total count of circuit breaker state changes",
+    ["breaker", "from_state", "to_state"]
+)
+
+CIRCUIT_OPEN_SECONDS = Counter(
+    "circuit_breaker_open_seconds_total",
+    "Total seconds circuit breakers have spent open",
+    ["breaker"]
+)
+
+CIRCUIT_REJECTIONS = Counter(
+    "circuit_breaker_rejections_total",
+    "Total count of calls failed fast by an open circuit breaker",
+    ["breaker"]
+)
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency while its circuit is open."""
+
+    def __init__(self, breaker: str, retry_after: float) -> None:
+        super().__init__(f"Circuit {breaker} is open")
+        self.breaker = breaker
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    """Opens after consecutive failures and probes for recovery.
+
+    While closed, calls go through and ``failure_threshold`` failures in a
+    row open the circuit. While open, calls fail fast with
+    ``CircuitOpenError`` for ``recovery_timeout`` seconds. The circuit then
+    half opens and lets ``half_open_calls`` calls through at a time: one
+    success closes it, one failure opens it again. Only exceptions of the
+    ``included`` types count as failures; others say nothing about the
+    dependency and count as neither. State is per process.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_calls: int = 1,
+        included: Tuple[Type[BaseException], ...] = (Exception,)
+    ) -> None:
+        self.name = name
+        self._included = included
+        self._failure_threshold = max(failure_threshold, 1)
+        self._recovery_timeout = recovery_timeout
+        self._half_open_calls = max(half_open_calls, 1)
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trials = 0
+        CIRCUIT_STATE.labels(name).set(_STATE_VALUES[CLOSED])
+
+    @property
+    def state(self) -> str:
+        """Current state, half opening once the recovery timeout has passed."""
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self._recovery_timeout:
+            self._transition(HALF_OPEN)
+        return self._state
+
+    @asynccontextmanager
+    async def guard(self) -> AsyncIterator[None]:
+        """Run the enclosed call through the breaker, recording its outcome.
+
+        Raises ``CircuitOpenError`` without running it while the circuit is
+        open, or half open with enough trial calls already in flight.
+        """
+        self._admit()
+        trial = self._state == HALF_OPEN
+        try:
+            yield
+        except BaseException as error:
+            self._end_trial(trial)
+            if isinstance(error, self._included):
+                self.record_failure()
+            raise
+        else:
+            self._end_trial(trial)
+            self.record_success()
+
+    def record_success(self) -> None:
+        """Count a successful call."""
+        self._failures = 0
+        if self._state == HALF_OPEN:
+            self._transition(CLOSED)
+
+    def record_failure(self) -> None:
+        """Count a failed call, opening the circuit if it was one too many."""
+        self._failures += 1
+        if self._state == HALF_OPEN or (
+            self._state == CLOSED and self._failures >= self._failure_threshold
+        ):
+            self._transition(OPEN)
+
+    def _admit(self) -> None:
+        """Let a call through or fail it fast."""
+        state = self.state
+        if state == CLOSED:
+            return
+        if state == HALF_OPEN and self._trials < self._half_open_calls:
+            self._trials += 1
+            return
+        CIRCUIT_REJECTIONS.labels(self.name).inc()
+        retry_after = max(self._opened_at + self._recovery_timeout - time.monotonic(), 0.0)
+        raise CircuitOpenError(self.name, retry_after)
+
+    def _end_trial(self, trial: bool) -> None:
+        """Free a trial call's slot, unless the circuit has moved on since."""
+        if trial and self._state == HALF_OPEN:
+            self._trials -= 1
+
+    def _transition(self, state: str) -> None:
+        """Move to another state and export the change."""
+        now = time.monotonic()
+        previous = self._state
+        if previous == OPEN:
+            CIRCUIT_OPEN_SECONDS.labels(self.name).inc(now - self._opened_at)
+        if state == OPEN:
+            self._opened_at = now
+        if state != HALF_OPEN:
+            self._trials = 0
+        if state == CLOSED:
+            self._failures = 0
+        self._state = state
+        CIRCUIT_STATE.labels(self.name).set(_STATE_VALUES[state])
+        CIRCUIT_TRANSITIONS.labels(self.name, previous, state).inc()
+        logger.warning(
+            "circuit_breaker_transition", breaker=self.name, from_state=previous, to_state=state
+        )
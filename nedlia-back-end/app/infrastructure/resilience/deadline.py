@@ -0,0 +1,42 @@
+"""Request deadlines, carried through a context variable.
+
+The deadline middleware sets one for each request. Calls to MongoDB and
+Okta made on the request's behalf read the time left from here, so that
+they give up when the client no longer waits for an answer.
+"""
+
+import time
+from contextvars import ContextVar, Token
+from typing import Optional
+
+REQUEST_TIMEOUT_HEADER = "X-Request-Timeout"
+
+_deadline: ContextVar[Optional[float]] = ContextVar("deadline", default=None)
+
+class DeadlineExceeded(Exception):
+    """Raised when work continues past the current request's deadline."""
+
+    def __init__(self) -> None:
+        super().__init__("Request deadline exceeded")
+
+def set_deadline(timeout: float) -> Token:
+    """Give the current context ``timeout`` seconds, or less if it had less."""
+    deadline = time.monotonic() + timeout
+    current = _deadline.get()
+    return _deadline.set(deadline if current is None else min(deadline, current))
+
+def reset_deadline(token: Token) -> None:
+    """Restore the deadline in place before ``set_deadline``."""
+    _deadline.reset(token)
+
+def time_left() -> Optional[float]:
+    """Seconds until the current deadline, negative once passed; ``None`` without one."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+def check_deadline() -> Optional[float]:
+    """Seconds until the current deadline, raising ``DeadlineExceeded`` if none are left."""
+    left = time_left()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded()
+    return left
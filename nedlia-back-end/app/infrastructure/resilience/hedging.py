@@ -0,0 +1,75 @@
+"""Hedged requests: a second try when the first is slower than usual."""
+
+import asyncio
+import bisect
+from collections import deque
+from typing import Awaitable, Callable, Deque, List, Optional, TypeVar
+
+from prometheus_client import Counter
+
+T = TypeVar("T")
+
+HEDGED_REQUESTS = Counter(
+    "hedged_requests_total",
+    "Total count of hedged requests sent, by operation and which try answered first",
+    ["operation", "winner"]
+)
+
+class LatencyTracker:
+    """Recent latencies of an operation, to tell when a call is running late.
+
+    Keeps the last ``window`` samples; percentiles are unknown until
+    ``min_samples`` have been seen.
+    """
+
+    def __init__(self, window: int = 200, min_samples: int = 20) -> None:
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._sorted: List[float] = []
+        self._min_samples = min_samples
+
+    def record(self, seconds: float) -> None:
+        """Add a latency sample."""
+        if len(self._samples) == self._samples.maxlen:
+            oldest = self._samples[0]
+            del self._sorted[bisect.bisect_left(self._sorted, oldest)]
+        self._samples.append(seconds)
+        bisect.insort(self._sorted, seconds)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """Latency below which ``percent`` percent of recent calls finished."""
+        if len(self._sorted) < self._min_samples:
+            return None
+        index = min(int(len(self._sorted) * percent / 100), len(self._sorted) - 1)
+        return self._sorted[index]
+
+async def hedge(operation: str, call: Callable[[], Awaitable[T]], delay: Optional[float]) -> T:
+    """Run ``call``, and once more if it has not finished after ``delay``.
+
+    Returns the first try to succeed and cancels the other. If one try
+    fails, the other is still waited for. Only for idempotent calls; with
+    no delay, ``call`` simply runs once.
+    """
+    if delay is None:
+        return await call()
+    tries = [asyncio.ensure_future(call())]
+    try:
+        done, _ = await asyncio.wait(tries, timeout=delay)
+        if done:
+            return tries[0].result()
+
+        tries.append(asyncio.ensure_future(call()))
+        pending = set(tries)
+        while True:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    winner = "first" if task is tries[0] else "second"
+                    HEDGED_REQUESTS.labels(operation, winner).inc()
+                    return task.result()
+            if not pending:
+                HEDGED_REQUESTS.labels(operation, "none").inc()
+                # Both failed: raises the error of the one to fail last
+                return task.result()
+    finally:
+        for task in tries:
+            task.cancel()
@@ -0,0 +1,269 @@
+"""Live profile updates fanned out from one MongoDB change stream."""
+
+import asyncio
+from collections import deque
+from dataclasses import dataclass
+from typing import AbstractSet, Any, Deque, Dict, Iterable, List, Mapping, Optional, Sequence, Set
+
+import structlog
+from motor.motor_asyncio import AsyncIOMotorCollection
+from prometheus_client import Counter, Gauge
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.infrastructure.persistence.models.user import UserModel
+from app.infrastructure.persistence.repositories.user import FIELD_KEYS, document_fields
+
+logger = structlog.get_logger(__name__)
+
+LIVE_UPDATE_SUBSCRIBERS = Gauge(
+    "live_update_subscribers",
+    "Number of open live profile update subscriptions"
+)
+
+LIVE_UPDATE_EVENTS = Counter(
+    "live_update_events_total",
+    "Total count of profile changes read from the change stream"
+)
+
+LIVE_UPDATE_OVERFLOWS = Counter(
+    "live_update_overflows_total",
+    "Total count of subscriptions closed for falling too far behind"
+)
+
+# Event types sent to subscribers
+PROFILE_UPDATED = "updated"
+PROFILE_DELETED = "deleted"
+# The subscriber may have missed events and should fetch the profiles again
+PROFILE_RESET = "reset"
+
+# MongoDB cannot resume from a token that has left the oplog
+_CHANGE_STREAM_HISTORY_LOST = 286
+
+_WATCHED_OPERATIONS = ["insert", "update", "replace", "delete"]
+
+@dataclass(frozen=True)
+class ProfileEvent:
+    """A change to one user profile, as sent to subscribers."""
+
+    # The change stream resume token, usable as Last-Event-ID
+    id: str
+    type: str
+    user_id: Optional[str] = None
+    # The profile's fields after the change; None for deletions and resets
+    profile: Optional[Dict[str, Any]] = None
+
+class Subscription:
+    """Profile events for a set of users, buffered for one client.
+
+    At most ``max_pending`` events are buffered. A subscriber that falls
+    further behind is closed rather than slowing the others down, and is
+    expected to reconnect and resume from its last event.
+    """
+
+    def __init__(self, user_ids: AbstractSet[str], max_pending: int) -> None:
+        self.user_ids = frozenset(user_ids)
+        self.overflowed = False
+        self._max_pending = max_pending
+        self._pending: Deque[ProfileEvent] = deque()
+        self._ready = asyncio.Event()
+        self._closed = False
+
+    @property
+    def closed(self) -> bool:
+        """Whether no more events will be delivered."""
+        return self._closed and not self._pending
+
+    def push(self, event: ProfileEvent) -> None:
+        """Buffer an event, closing the subscription if it is too far behind."""
+        if self._closed:
+            return
+        if len(self._pending) >= self._max_pending:
+            self.overflowed = True
+            self._pending.clear()
+            self.close()
+            return
+        self._pending.append(event)
+        self._ready.set()
+
+    def close(self) -> None:
+        """Stop delivering events once the buffered ones are taken."""
+        self._closed = True
+        self._ready.set()
+
+    async def next(self, timeout: float) -> Optional[ProfileEvent]:
+        """Wait for the next event; None on timeout or once closed."""
+        if not self._pending and not self._closed:
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        if not self._pending:
+            self._ready.clear()
+            return None
+        event = self._pending.popleft()
+        if not self._pending and not self._closed:
+            self._ready.clear()
+        return event
+
+class ProfileEventHub:
+    """Reads the profile change stream once and fans it out to subscribers.
+
+    Each worker watches ``user_profiles`` through a single change stream,
+    whatever the number of subscribers. The most recent events are kept so
+    that a client reconnecting with its last event ID, to this or another
+    worker, gets what it missed; resume tokens are the same cluster-wide.
+    Clients whose last event is no longer kept get a reset event instead.
+    With partitioned profiles, each partition's collection is watched.
+    Change streams need a replica set; until started, the hub is unavailable.
+    """
+
+    def __init__(
+        self,
+        fields: AbstractSet[str],
+        max_pending: int = 100,
+        replay_size: int = 1000,
+        retry_interval: float = 1.0
+    ) -> None:
+        self._fields = frozenset(fields) & FIELD_KEYS.keys()
+        self._max_pending = max_pending
+        self._retry_interval = retry_interval
+        self._recent: Deque[ProfileEvent] = deque(maxlen=replay_size)
+        self._subscriptions: Set[Subscription] = set()
+        # Subscriptions by the user IDs they follow
+        self._by_user: Dict[str, Set[Subscription]] = {}
+        # One change stream reader per watched collection
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def available(self) -> bool:
+        """Whether the change stream is being read."""
+        return bool(self._tasks)
+
+    def start(self, collections: Optional[Sequence[AsyncIOMotorCollection]] = None) -> None:
+        """Start reading the change streams of ``user_profiles`` or the given collections."""
+        if self._tasks:
+            return
+        loop = asyncio.get_running_loop()
+        for collection in collections or [UserModel.get_motor_collection()]:
+            self._tasks.append(loop.create_task(self._run(collection)))
+
+    async def stop(self) -> None:
+        """Stop reading and close every subscription."""
+        for task in self._tasks:
+            task.cancel()
+        for task in self._tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._tasks = []
+        for subscription in list(self._subscriptions):
+            self.unsubscribe(subscription)
+
+    def subscribe(
+        self,
+        user_ids: Iterable[str],
+        last_event_id: Optional[str] = None
+    ) -> Subscription:
+        """Subscribe to users' events, replaying those after ``last_event_id``."""
+        subscription = Subscription(frozenset(user_ids), self._max_pending)
+        if last_event_id:
+            missed = [
+                event for event in self._missed(last_event_id)
+                if event.user_id is None or event.user_id in subscription.user_ids
+            ]
+            if len(missed) >= self._max_pending:
+                # Too many to buffer; replaying would only overflow again
+                missed = [ProfileEvent(id=missed[-1].id, type=PROFILE_RESET)]
+            for event in missed:
+                subscription.push(event)
+        self._subscriptions.add(subscription)
+        for user_id in subscription.user_ids:
+            self._by_user.setdefault(user_id, set()).add(subscription)
+        LIVE_UPDATE_SUBSCRIBERS.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Stop delivering events to a subscription and close it."""
+        if subscription not in self._subscriptions:
+            return
+        self._subscriptions.discard(subscription)
+        for user_id in subscription.user_ids:
+            subscriptions = self._by_user.get(user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._by_user[user_id]
+        subscription.close()
+        LIVE_UPDATE_SUBSCRIBERS.dec()
+
+    def publish(self, event: ProfileEvent) -> None:
+        """Deliver an event to its subscribers and keep it for replay."""
+        self._recent.append(event)
+        if event.user_id is None:
+            targets = list(self._subscriptions)
+        else:
+            targets = list(self._by_user.get(event.user_id, ()))
+        for subscription in targets:
+            subscription.push(event)
+            if subscription.overflowed:
+                LIVE_UPDATE_OVERFLOWS.inc()
+                self.unsubscribe(subscription)
+
+    def _missed(self, last_event_id: str) -> List[ProfileEvent]:
+        """Kept events after ``last_event_id``, or a reset if it is not kept."""
+        recent = list(self._recent)
+        for index in range(len(recent) - 1, -1, -1):
+            if recent[index].id == last_event_id:
+                return recent[index + 1:]
+        return [ProfileEvent(id=last_event_id, type=PROFILE_RESET)]
+
+    def _pipeline(self) -> List[Dict[str, Any]]:
+        """Change stream stages: watched operations and only the sent fields."""
+        projection: Dict[str, Any] = {"operationType": 1, "documentKey": 1}
+        projection.update({f"fullDocument.{FIELD_KEYS[name]}": 1 for name in self._fields})
+        return [
+            {"$match": {"operationType": {"$in": _WATCHED_OPERATIONS}}},
+            {"$project": projection},
+        ]
+
+    def _event(self, change: Mapping[str, Any]) -> ProfileEvent:
+        """Convert a change stream document to a profile event."""
+        event_id = change["_id"]["_data"]
+        user_id = change["documentKey"]["_id"]
+        document = change.get("fullDocument")
+        if change["operationType"] == "delete" or document is None:
+            # Updated documents deleted before the lookup have no full document
+            return ProfileEvent(id=event_id, type=PROFILE_DELETED, user_id=user_id)
+        return ProfileEvent(
+            id=event_id,
+            type=PROFILE_UPDATED,
+            user_id=user_id,
+            profile=document_fields(document, self._fields)
+        )
+
+    async def _run(self, collection: AsyncIOMotorCollection) -> None:
+        """Read a collection's change stream, resuming after errors."""
+        resume_token: Optional[Mapping[str, Any]] = None
+        while True:
+            try:
+                async with collection.watch(
+                    self._pipeline(),
+                    full_document="updateLookup",
+                    resume_after=resume_token
+                ) as stream:
+                    async for change in stream:
+                        resume_token = stream.resume_token
+                        LIVE_UPDATE_EVENTS.inc()
+                        self.publish(self._event(change))
+            except OperationFailure as error:
+                if error.code != _CHANGE_STREAM_HISTORY_LOST:
+                    logger.error("change_stream_failed", error=str(error))
+                else:
+                    # Events in between are gone; subscribers must refetch
+                    logger.warning("change_stream_history_lost")
+                    resume_token = None
+                    self.publish(ProfileEvent(id="", type=PROFILE_RESET))
+            except PyMongoError as error:
+                logger.error("change_stream_failed", error=str(error))
+            await asyncio.sleep(self._retry_interval)
@@ -0,0 +1,78 @@
+"""Span exporters."""
+
+from abc import ABC, abstractmethod
+from collections import deque
+from dataclasses import asdict
+from typing import Callable, Deque, Dict, List
+
+import structlog
+
+from app.infrastructure.config.settings import TracingSettings
+from app.infrastructure.tracing.spans import Span, Trace
+
+logger = structlog.get_logger(__name__)
+
+class SpanExporter(ABC):
+    """Destination for finished traces."""
+
+    @abstractmethod
+    def export(self, trace: Trace) -> None:
+        """Export a finished trace.
+
+        Called on the event loop once per sampled request, so it must not
+        block.
+        """
+        pass
+
+    def shutdown(self) -> None:
+        """Flush and release resources."""
+        pass
+
+class NoopSpanExporter(SpanExporter):
+    """Exporter that discards traces; Server-Timing headers are still sent."""
+
+    def export(self, trace: Trace) -> None:
+        """Discard a trace."""
+        pass
+
+class InMemorySpanExporter(SpanExporter):
+    """Exporter keeping the most recent traces in memory, for tests."""
+
+    def __init__(self, max_traces: int = 1000) -> None:
+        self.traces: Deque[Trace] = deque(maxlen=max_traces)
+
+    def export(self, trace: Trace) -> None:
+        """Keep a trace."""
+        self.traces.append(trace)
+
+    def spans(self) -> List[Span]:
+        """Get the spans of all kept traces."""
+        return [span for trace in self.traces for span in trace.spans]
+
+    def clear(self) -> None:
+        """Forget all kept traces."""
+        self.traces.clear()
+
+class LoggingSpanExporter(SpanExporter):
+    """Exporter writing each trace as one structured log entry."""
+
+    def export(self, trace: Trace) -> None:
+        """Log a trace."""
+        logger.info(
+            "trace",
+            request_id=trace.trace_id,
+            started_at=trace.started_at,
+            dropped_spans=trace.dropped,
+            spans=[asdict(span) for span in trace.spans]
+        )
+
+def create_span_exporter(settings: TracingSettings) -> SpanExporter:
+    """Create the exporter selected in the settings."""
+    exporters: Dict[str, Callable[[], SpanExporter]] = {
+        "none": NoopSpanExporter,
+        "memory": InMemorySpanExporter,
+        "log": LoggingSpanExporter,
+    }
+    if settings.exporter not in exporters:
+        raise ValueError(f"Unknown span exporter: {settings.exporter}")
+    return exporters[settings.exporter]()
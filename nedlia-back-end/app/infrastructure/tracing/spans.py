@@ -0,0 +1,174 @@
+"""Lightweight span tracing for sampled requests.
+
+A ``Trace`` is started by the tracing middleware for each sampled request
+and made current through a context variable. ``span`` and the ``traced``
+helpers record timed spans into the current trace, and do nothing but a
+context variable lookup when there is none, so unsampled requests and
+disabled tracing pay almost nothing.
+"""
+
+import functools
+import inspect
+import time
+from contextvars import ContextVar, Token
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("trace", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("span", default=None)
+
+@dataclass
+class Span:
+    """A timed operation within a trace."""
+    name: str
+    kind: str
+    span_id: int
+    parent_id: Optional[int]
+    # Seconds since the start of the trace
+    start: float
+    duration: float = 0.0
+    error: Optional[str] = None
+    attributes: Dict[str, Any] = field(default_factory=dict)
+
+class Trace:
+    """Spans recorded for one sampled request.
+
+    The trace ID is the request ID, so spans can be matched with the
+    request's log entries. At most ``max_spans`` spans are kept.
+    """
+
+    def __init__(self, trace_id: str, max_spans: int = 256) -> None:
+        self.trace_id = trace_id
+        self.started_at = time.time()
+        self.spans: List[Span] = []
+        self.dropped = 0
+        self._origin = time.perf_counter()
+        self._max_spans = max_spans
+
+    def start_span(self, name: str, kind: str, parent: Optional[Span]) -> Optional[Span]:
+        """Start a span, or return ``None`` if the trace is full."""
+        if len(self.spans) >= self._max_spans:
+            self.dropped += 1
+            return None
+        span = Span(
+            name=name,
+            kind=kind,
+            span_id=len(self.spans) + 1,
+            parent_id=parent.span_id if parent is not None else None,
+            start=time.perf_counter() - self._origin
+        )
+        self.spans.append(span)
+        return span
+
+    def finish_span(self, span: Span, error: Optional[BaseException] = None) -> None:
+        """Record a span's duration."""
+        span.duration = time.perf_counter() - self._origin - span.start
+        if error is not None:
+            span.error = type(error).__name__
+
+    def server_timing(self) -> str:
+        """Summarize the trace as a ``Server-Timing`` header value.
+
+        The root span is reported as ``total``; other spans are summed by
+        kind, so nested kinds overlap rather than add up.
+        """
+        totals: Dict[str, Tuple[float, int]] = {}
+        for span in self.spans[1:]:
+            duration, count = totals.get(span.kind, (0.0, 0))
+            totals[span.kind] = (duration + span.duration, count + 1)
+        entries = []
+        if self.spans:
+            entries.append(f"total;dur={self.spans[0].duration * 1000:.2f}")
+        for kind, (duration, count) in totals.items():
+            calls = "call" if count == 1 else "calls"
+            entries.append(f'{kind};dur={duration * 1000:.2f};desc="{count} {calls}"')
+        return ", ".join(entries)
+
+def current_trace() -> Optional[Trace]:
+    """Get the trace of the current request, if it is sampled."""
+    return _current_trace.get()
+
+def start_trace(trace: Trace) -> Token:
+    """Make a trace current; returns a token for ``end_trace``."""
+    return _current_trace.set(trace)
+
+def end_trace(token: Token) -> None:
+    """Restore the trace that was current before ``start_trace``."""
+    _current_trace.reset(token)
+
+class span:
+    """Context manager recording a span in the current trace, if any.
+
+    Yields the span, or ``None`` when the request is not traced.
+    """
+
+    __slots__ = ("_name", "_kind", "_attributes", "_trace", "_span", "_token")
+
+    def __init__(self, name: str, kind: str = "internal", **attributes: Any) -> None:
+        self._name = name
+        self._kind = kind
+        self._attributes = attributes
+        self._trace: Optional[Trace] = None
+        self._span: Optional[Span] = None
+
+    def __enter__(self) -> Optional[Span]:
+        self._trace = _current_trace.get()
+        if self._trace is None:
+            return None
+        self._span = self._trace.start_span(self._name, self._kind, _current_span.get())
+        if self._span is None:
+            return None
+        self._span.attributes.update(self._attributes)
+        self._token = _current_span.set(self._span)
+        return self._span
+
+    def __exit__(self, exc_type: Any, exc: Optional[BaseException], tb: Any) -> None:
+        if self._trace is not None and self._span is not None:
+            _current_span.reset(self._token)
+            self._trace.finish_span(self._span, exc)
+
+def traced(
+    kind: str,
+    name: Optional[str] = None
+) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """Decorate a coroutine function to run in a span."""
+    def decorator(func: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        return _wrap(func, name or func.__qualname__, kind)
+    return decorator
+
+class TracedProxy:
+    """Proxy running each coroutine method of an object in a span.
+
+    Used for application and domain objects, which cannot depend on this
+    module. Other attributes are passed through unchanged.
+    """
+
+    def __init__(self, target: Any, kind: str) -> None:
+        self._target = target
+        self._kind = kind
+        self._prefix = type(target).__name__
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._target, name)
+        if not inspect.iscoroutinefunction(attribute):
+            return attribute
+        wrapped = _wrap(attribute, f"{self._prefix}.{name}", self._kind)
+        # Cache on the proxy so later lookups skip __getattr__
+        self.__dict__[name] = wrapped
+        return wrapped
+
+def _wrap(
+    func: Callable[..., Awaitable[T]],
+    name: str,
+    kind: str
+) -> Callable[..., Awaitable[T]]:
+    """Wrap a coroutine function to run in a span."""
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> T:
+        if _current_trace.get() is None:
+            return await func(*args, **kwargs)
+        with span(name, kind):
+            return await func(*args, **kwargs)
+    return wrapper
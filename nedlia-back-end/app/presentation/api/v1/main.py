@@ -1,16 +1,50 @@
 """FastAPI application entry point."""
 
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from prometheus_client import make_asgi_app
 
-from app.infrastructure.config import get_settings
+from app.infrastructure.config.settings import get_settings
+from app.infrastructure.container import Container
 from app.infrastructure.errors.handlers import register_error_handlers
 from app.infrastructure.logging.config import configure_logging
+from app.infrastructure.middleware.body_size import BodySizeLimitMiddleware
+from app.infrastructure.middleware.concurrency import ConcurrencyLimitMiddleware
+from app.infrastructure.middleware.consistency import CausalConsistencyMiddleware
+from app.infrastructure.middleware.deadline import DeadlineMiddleware
+from app.infrastructure.middleware.idempotency import (
+    IDEMPOTENT_REPLAYED_HEADER,
+    IdempotencyMiddleware,
+)
 from app.infrastructure.middleware.logging import RequestLoggingMiddleware
 from app.infrastructure.middleware.metrics import PrometheusMiddleware
-from app.infrastructure.persistence.database import init_mongodb
+from app.infrastructure.middleware.profiling import PROFILE_ID_HEADER, ProfilingMiddleware
+from app.infrastructure.middleware.rate_limit import RATE_LIMIT_HEADERS, RateLimitMiddleware
+from app.infrastructure.middleware.tracing import SERVER_TIMING_HEADER, TracingMiddleware
+from app.infrastructure.persistence.database import init_mongodb, init_partitions
+from app.infrastructure.persistence.sessions import CONSISTENCY_TOKEN_HEADER
+from app.infrastructure.ratelimit.limiter import parse_rate_limit
 from app.presentation.api.v1.routes import router as api_router
+from app.presentation.api.v1.routes.users import MAX_PATCH_BYTES, TOTAL_COUNT_HEADER
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Initialize services on startup and release them on shutdown."""
+    client = await init_mongodb()
+    partitions = await init_partitions()
+    app.state.container = Container(mongo_client=client, partitions=partitions)
+    await app.state.container.start()
+    try:
+        yield
+    finally:
+        await app.state.container.close()
+        # Last, as closing the container may still write the outbox
+        if partitions is not None:
+            partitions.close()
+        client.close()
 
 def create_application() -> FastAPI:
     """Create FastAPI application."""
@@ -27,38 +61,114 @@ def create_application() -> FastAPI:
         version=settings.api.version,
         debug=settings.api.debug,
         docs_url=settings.api.docs_url,
-        openapi_url=settings.api.openapi_url
+        openapi_url=settings.api.openapi_url,
+        lifespan=lifespan
     )
 
     # Register error handlers
     register_error_handlers(app)
 
-    # Add CORS middleware
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=settings.cors_origins,
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
-    )
+    # Add read-your-writes sessions if enabled
+    if settings.db.causal_consistency:
+        app.add_middleware(CausalConsistencyMiddleware)
+
+    # Add idempotency keys if enabled; replays skip sessions but are traced
+    if settings.features.idempotency_enabled:
+        idempotency = settings.idempotency
+        app.add_middleware(
+            IdempotencyMiddleware,
+            paths=idempotency.paths,
+            wait_timeout=idempotency.wait_seconds,
+            max_response_bytes=idempotency.max_response_bytes
+        )
+
+    # Limit merge patch sizes before anything reads the body
+    app.add_middleware(BodySizeLimitMiddleware, max_bytes=MAX_PATCH_BYTES, methods=["PATCH"])
+
+    # Add tracing middleware if enabled; inside logging, which assigns request IDs
+    if settings.features.tracing_enabled:
+        app.add_middleware(
+            TracingMiddleware,
+            sample_rate=settings.tracing.sample_rate,
+            max_spans=settings.tracing.max_spans
+        )
+
+    # Add on-demand profiling if enabled; also inside logging
+    if settings.features.profiling_enabled:
+        token = settings.profiling.token
+        app.add_middleware(
+            ProfilingMiddleware,
+            token=token.get_secret_value() if token else None
+        )
+
+    # Add rate limiting if enabled; rejected requests are still logged
+    if settings.features.rate_limit_enabled:
+        rate_limit = settings.rate_limit
+        app.add_middleware(
+            RateLimitMiddleware,
+            default_limit=parse_rate_limit(rate_limit.default),
+            route_limits={
+                route: parse_rate_limit(limit)
+                for route, limit in rate_limit.routes.items()
+            },
+            exempt_paths=rate_limit.exempt_paths,
+            trust_forwarded_for=rate_limit.trust_forwarded_for,
+            forwarded_for_hops=rate_limit.forwarded_for_hops
+        )
+
+    # Add request deadlines if enabled; inside load shedding, so that
+    # cancelled requests free their slots
+    if settings.features.deadlines_enabled:
+        deadline = settings.deadline
+        app.add_middleware(
+            DeadlineMiddleware,
+            default_timeout=deadline.default_seconds,
+            route_timeouts=deadline.routes,
+            max_timeout=deadline.max_seconds,
+            exempt_paths=deadline.exempt_paths
+        )
+
+    # Add load shedding if enabled; ahead of rate limiting, so shed
+    # requests cost no Redis round trip, and still logged
+    if settings.features.concurrency_limit_enabled:
+        concurrency_limit = settings.concurrency_limit
+        app.add_middleware(
+            ConcurrencyLimitMiddleware,
+            priorities=concurrency_limit.priorities,
+            exempt_paths=concurrency_limit.exempt_paths,
+            retry_after=concurrency_limit.retry_after_seconds
+        )
 
     # Add logging middleware
     app.add_middleware(RequestLoggingMiddleware)
 
     # Add metrics middleware if enabled
-    if settings.metrics_enabled:
+    if settings.features.metrics_enabled:
         app.add_middleware(PrometheusMiddleware)
         metrics_app = make_asgi_app()
         app.mount("/metrics", metrics_app)
 
+    # Add CORS middleware last, so it is outermost: rejections carry CORS
+    # headers too, and preflight requests skip the limits
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.cors_origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=[
+            CONSISTENCY_TOKEN_HEADER,
+            SERVER_TIMING_HEADER,
+            PROFILE_ID_HEADER,
+            TOTAL_COUNT_HEADER,
+            *RATE_LIMIT_HEADERS,
+            IDEMPOTENT_REPLAYED_HEADER,
+        ],
+    )
+
     # Add routes
     app.include_router(api_router, prefix="/api/v1")
 
-    @app.on_event("startup")
-    async def startup_event():
-        """Initialize services on startup."""
-        await init_mongodb()
-
     return app
 
 # Create application instance
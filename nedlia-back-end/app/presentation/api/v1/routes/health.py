@@ -1,10 +1,9 @@
 """Health check endpoints."""
 
-from fastapi import APIRouter, Depends
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text
+from fastapi import APIRouter, Depends, Response
 
-from app.infrastructure.persistence.database import get_session
+from app.infrastructure.container import Container, get_container
+from app.infrastructure.persistence.models.user import UserModel
 
 router = APIRouter()
 
@@ -13,13 +12,11 @@ router = APIRouter()
     summary="Health check",
     description="Check the health of the application and its dependencies"
 )
-async def health_check(
-    session: AsyncSession = Depends(get_session)
-) -> dict:
+async def health_check() -> dict:
     """Check application health."""
     # Check database connection
     try:
-        await session.execute(text("SELECT 1"))
+        await UserModel.get_motor_collection().database.command("ping")
         db_status = "healthy"
     except Exception as e:
         db_status = f"unhealthy: {str(e)}"
@@ -29,3 +26,19 @@ async def health_check(
         "database": db_status,
         "version": "0.1.0"  # This should come from settings
     }
+
+@router.get(
+    "/health/ready",
+    summary="Readiness check",
+    description="Whether the instance takes traffic: warmed up and not shutting down",
+    responses={503: {"description": "Starting up or draining before shutdown"}}
+)
+async def readiness_check(
+    response: Response,
+    container: Container = Depends(get_container)
+) -> dict:
+    """Check whether load balancers should send requests here."""
+    if not container.ready:
+        response.status_code = 503
+        return {"status": "unavailable"}
+    return {"status": "ready"}
@@ -1,9 +1,22 @@
 """User routes."""
 
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+import json
+from typing import AsyncIterator, FrozenSet, List, Optional, Union
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
 
-from app.application.dtos.user import UserCreateDTO, UserResponseDTO, UserUpdateDTO
+from app.application.dtos.user import (
+    UserAttributesDTO,
+    UserChangeFeedDTO,
+    UserCountResponseDTO,
+    UserCreateDTO,
+    UserPatchDTO,
+    UserResponseDTO,
+    UserSearchResponseDTO,
+    UserUpdateDTO,
+)
 from app.application.services.user_service import UserService
 from app.domain.exceptions.base import (
     BusinessRuleViolation,
@@ -11,12 +24,74 @@ from app.domain.exceptions.base import (
     EntityNotFound,
     ValidationError
 )
-from app.infrastructure.persistence.database import get_user_service
+from app.domain.repositories.user import UserSearchCriteria
+from app.infrastructure.container import Container, get_container, get_user_service
+from app.infrastructure.streaming.hub import (
+    PROFILE_UPDATED,
+    ProfileEvent,
+    ProfileEventHub,
+    Subscription,
+)
 
 router = APIRouter()
 
+# Set on list responses when the total is requested
+TOTAL_COUNT_HEADER = "X-Total-Count"
+
+# Serializes pages of partial responses for sparse fieldsets
+_user_list = TypeAdapter(List[UserResponseDTO])
+
+def response_fields(
+    fields: Optional[str] = Query(
+        None, description="Comma-separated response fields to return, e.g. id,email"
+    )
+) -> Optional[FrozenSet[str]]:
+    """Parse a sparse fieldset; ``None`` returns every field."""
+    if fields is None:
+        return None
+    selected = frozenset(name.strip() for name in fields.split(",") if name.strip())
+    if not selected:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="fields must name at least one field"
+        )
+    unknown = selected - UserResponseDTO.model_fields.keys()
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}"
+        )
+    return selected
+
+# How long browsers wait before reconnecting a dropped event stream
+RECONNECT_DELAY_MS = 3000
+
+# Largest merge patch body accepted, in bytes; enforced by middleware,
+# since FastAPI parses the body before any dependency runs
+MAX_PATCH_BYTES = 16 * 1024
+
+def search_criteria(
+    email: Optional[str] = Query(None, min_length=1, description="Email prefix"),
+    first_name: Optional[str] = Query(None, min_length=1, description="First name prefix"),
+    last_name: Optional[str] = Query(None, min_length=1, description="Last name prefix"),
+    q: Optional[str] = Query(None, min_length=1, description="Full-text search"),
+    is_active: Optional[bool] = None,
+    locale: Optional[str] = None,
+    email_domain: Optional[str] = None
+) -> UserSearchCriteria:
+    """Build search criteria from query parameters."""
+    return UserSearchCriteria(
+        email_prefix=email,
+        first_name_prefix=first_name,
+        last_name_prefix=last_name,
+        text=q,
+        is_active=is_active,
+        locale=locale,
+        email_domain=email_domain
+    )
+
 @router.post(
-    "/users",
+    "",
     response_model=UserResponseDTO,
     status_code=status.HTTP_201_CREATED,
     summary="Create a new user",
@@ -40,41 +115,205 @@ async def create_user(
             detail=str(e)
         )
 
+# Declared before /{user_id}, which would otherwise match "search", "count",
+# "changes" and "events"
 @router.get(
-    "/users/{user_id}",
+    "/search",
+    response_model=UserSearchResponseDTO,
+    summary="Search users",
+    description=(
+        "Search users by email, first or last name prefix and full text, "
+        "filtered by status, locale and email domain. Results are paged "
+        "with the returned cursor."
+    )
+)
+async def search_users(
+    criteria: UserSearchCriteria = Depends(search_criteria),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    user_service: UserService = Depends(get_user_service)
+) -> UserSearchResponseDTO:
+    """Search users."""
+    try:
+        return await user_service.search_users(criteria, limit=limit, cursor=cursor)
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+@router.get(
+    "/count",
+    response_model=UserCountResponseDTO,
+    summary="Count users",
+    description=(
+        "Count users matching the same filters as search, or all users when "
+        "none are given. Counts may be a few seconds stale, and the total of "
+        "all users is an estimate."
+    )
+)
+async def count_users(
+    criteria: UserSearchCriteria = Depends(search_criteria),
+    user_service: UserService = Depends(get_user_service)
+) -> UserCountResponseDTO:
+    """Count users."""
+    return await user_service.count_users(criteria)
+
+@router.get(
+    "/changes",
+    response_model=UserChangeFeedDTO,
+    summary="List user changes",
+    description=(
+        "Get profile changes published after feed position since, oldest "
+        "first. Pass next_since back as since to continue. Changes are kept "
+        "for seven days."
+    )
+)
+async def list_changes(
+    since: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    user_service: UserService = Depends(get_user_service)
+) -> UserChangeFeedDTO:
+    """List user changes."""
+    return await user_service.list_changes(since=since, limit=limit)
+
+@router.get(
+    "/events",
+    response_class=StreamingResponse,
+    summary="Stream user updates",
+    description=(
+        "Server-Sent Events for changes to the given users. Each updated "
+        "event carries the user as returned by GET /users/{user_id}; "
+        "deleted events carry only the ID. Reconnecting with Last-Event-ID "
+        "replays recent events, or sends a reset event when they are no "
+        "longer available, after which the users should be fetched again."
+    )
+)
+async def stream_user_events(
+    user_id: List[str] = Query(..., description="IDs of the users to follow"),
+    last_event_id: Optional[str] = Header(None),
+    container: Container = Depends(get_container)
+) -> StreamingResponse:
+    """Stream user updates."""
+    hub = container.profile_events
+    if hub is None or not hub.available:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Live updates are not available"
+        )
+    live_updates = container.settings.live_updates
+    if len(user_id) > live_updates.max_user_ids:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {live_updates.max_user_ids} users can be followed"
+        )
+    subscription = hub.subscribe(user_id, last_event_id=last_event_id)
+    return StreamingResponse(
+        _event_stream(hub, subscription, live_updates.heartbeat_seconds),
+        media_type="text/event-stream",
+        # Keep proxies from caching or buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _event_stream(
+    hub: ProfileEventHub,
+    subscription: Subscription,
+    heartbeat: float
+) -> AsyncIterator[str]:
+    """Format a subscription's events for Server-Sent Events."""
+    try:
+        yield f"retry: {RECONNECT_DELAY_MS}\n\n"
+        while True:
+            event = await subscription.next(timeout=heartbeat)
+            if event is not None:
+                yield _format_event(event)
+            elif subscription.closed:
+                # Fell too far behind or shutting down; the client reconnects
+                return
+            else:
+                yield ": heartbeat\n\n"
+    finally:
+        # Also runs when the client disconnects and the stream is cancelled
+        hub.unsubscribe(subscription)
+
+def _format_event(event: ProfileEvent) -> str:
+    """Format one event as a Server-Sent Events message."""
+    if event.type == PROFILE_UPDATED and event.profile is not None:
+        data = UserResponseDTO.partial(event.profile).model_dump_json(
+            include=set(event.profile)
+        )
+    else:
+        data = json.dumps({"id": event.user_id})
+    event_id = f"id: {event.id}\n" if event.id else ""
+    return f"{event_id}event: {event.type}\ndata: {data}\n\n"
+
+@router.get(
+    "/{user_id}",
     response_model=UserResponseDTO,
     summary="Get user by ID",
-    description="Get detailed information about a specific user"
+    description=(
+        "Get detailed information about a specific user. Pass fields to "
+        "return only some of them."
+    )
 )
 async def get_user(
     user_id: str,
+    fields: Optional[FrozenSet[str]] = Depends(response_fields),
     user_service: UserService = Depends(get_user_service)
-) -> UserResponseDTO:
+) -> Union[UserResponseDTO, Response]:
     """Get user by ID."""
     try:
-        return await user_service.get_user(user_id)
+        user = await user_service.get_user(user_id, fields=fields)
     except EntityNotFound as e:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=str(e)
         )
+    if fields is None:
+        return user
+    # Partial responses would fail response model validation
+    return Response(user.model_dump_json(include=set(fields)), media_type="application/json")
 
 @router.get(
-    "/users",
+    "",
     response_model=List[UserResponseDTO],
     summary="List users",
-    description="Get a list of users with pagination"
+    description=(
+        "Get a list of users with pagination. With include_total, the "
+        "estimated number of users is returned in the X-Total-Count header. "
+        "Pass fields to return only some of each user's fields."
+    )
 )
 async def list_users(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    include_total: bool = False,
+    fields: Optional[FrozenSet[str]] = Depends(response_fields),
     user_service: UserService = Depends(get_user_service)
-) -> List[UserResponseDTO]:
+) -> Union[List[UserResponseDTO], Response]:
     """List users with pagination."""
-    return await user_service.list_users(skip=skip, limit=limit)
+    total = None
+    if include_total:
+        # The count runs alongside the page, usually from the cache
+        users, total = await asyncio.gather(
+            user_service.list_users(skip=skip, limit=limit, fields=fields),
+            user_service.count_users()
+        )
+    else:
+        users = await user_service.list_users(skip=skip, limit=limit, fields=fields)
+    headers = {TOTAL_COUNT_HEADER: str(total.count)} if total is not None else {}
+    if fields is None:
+        response.headers.update(headers)
+        return users
+    return Response(
+        _user_list.dump_json(users, include={"__all__": set(fields)}),
+        media_type="application/json",
+        headers=headers
+    )
 
 @router.put(
-    "/users/{user_id}",
+    "/{user_id}",
     response_model=UserResponseDTO,
     summary="Update user",
     description="Update user information"
@@ -103,8 +342,39 @@ async def update_user(
             detail=str(e)
         )
 
+@router.patch(
+    "/{user_id}",
+    response_model=UserAttributesDTO,
+    summary="Patch user attributes",
+    description=(
+        "Merge changes into the user's preferences and metadata, following "
+        "JSON Merge Patch (RFC 7396): null removes a key, objects are merged "
+        "and other values replace what was there. Only the changed keys are "
+        "written. Patches are limited in size, nesting depth and number of "
+        "changed keys."
+    )
+)
+async def patch_user(
+    user_id: str,
+    patch: UserPatchDTO,
+    user_service: UserService = Depends(get_user_service)
+) -> UserAttributesDTO:
+    """Patch user attributes."""
+    try:
+        return await user_service.patch_user(user_id, patch)
+    except EntityNotFound as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
 @router.delete(
-    "/users/{user_id}",
+    "/{user_id}",
     status_code=status.HTTP_204_NO_CONTENT,
     summary="Delete user",
     description="Delete a user"
@@ -123,7 +393,7 @@ async def delete_user(
         )
 
 @router.post(
-    "/users/{user_id}/activate",
+    "/{user_id}/activate",
     response_model=UserResponseDTO,
     summary="Activate user",
     description="Activate a user account"
@@ -147,7 +417,7 @@ async def activate_user(
         )
 
 @router.post(
-    "/users/{user_id}/deactivate",
+    "/{user_id}/deactivate",
     response_model=UserResponseDTO,
     summary="Deactivate user",
     description="Deactivate a user account"
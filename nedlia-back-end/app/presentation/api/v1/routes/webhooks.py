@@ -3,6 +3,7 @@
 from fastapi import APIRouter, Request, HTTPException, Depends
 from app.application.services.user_service import UserService
 from app.infrastructure.auth.okta_client import OktaAuthClient
+from app.infrastructure.container import get_user_service
 from app.domain.entities.user import User
 
 router = APIRouter(prefix="/webhooks", tags=["webhooks"])
@@ -11,7 +12,7 @@ okta_client = OktaAuthClient()
 @router.post("/okta")
 async def handle_okta_webhook(
     request: Request,
-    user_service: UserService = Depends()
+    user_service: UserService = Depends(get_user_service)
 ) -> dict:
     """Handle Okta webhook events."""
     # Verify Okta webhook signature
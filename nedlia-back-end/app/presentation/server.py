@@ -0,0 +1,66 @@
+"""HTTP server draining traffic before it shuts down.
+
+Usage:
+    poetry run python -m app.presentation.server
+"""
+
+import asyncio
+import socket
+import sys
+from typing import List, Optional
+
+import uvicorn
+from uvicorn.importer import import_from_string
+from uvicorn.main import STARTUP_FAILURE
+from uvicorn.supervisors import Multiprocess
+
+from app.infrastructure.config.settings import get_settings
+
+APP = "app.presentation.api.v1.main:app"
+
+class DrainingServer(uvicorn.Server):
+    """Uvicorn server that stops taking traffic before it stops listening.
+
+    On SIGTERM the application reports not ready and ends its live update
+    streams, then keeps serving for ``drain_delay`` seconds while load
+    balancers take it out of rotation. Uvicorn then closes the listeners,
+    gives in-flight requests up to its graceful shutdown timeout and runs
+    the lifespan shutdown, which flushes the outbox and closes the pools.
+    A second SIGINT skips the wait.
+    """
+
+    def __init__(self, config: uvicorn.Config, drain_delay: float = 5.0) -> None:
+        super().__init__(config)
+        self.drain_delay = drain_delay
+
+    async def shutdown(self, sockets: Optional[List[socket.socket]] = None) -> None:
+        """Drain, then shut down."""
+        container = getattr(import_from_string(APP).state, "container", None)
+        if container is not None:
+            await container.drain()
+            loop = asyncio.get_running_loop()
+            until = loop.time() + self.drain_delay
+            while loop.time() < until and not self.force_exit:
+                await asyncio.sleep(0.1)
+        await super().shutdown(sockets=sockets)
+
+def main() -> int:
+    """Serve the API until terminated; return a process exit code."""
+    settings = get_settings().server
+    config = uvicorn.Config(
+        APP,
+        host=settings.host,
+        port=settings.port,
+        workers=settings.workers,
+        timeout_graceful_shutdown=settings.shutdown_timeout_seconds
+    )
+    server = DrainingServer(config, drain_delay=settings.drain_delay_seconds)
+    if config.workers > 1:
+        # Each worker process runs its own server and drains on its own
+        Multiprocess(config, target=server.run, sockets=[config.bind_socket()]).run()
+        return 0
+    server.run()
+    return 0 if server.started else STARTUP_FAILURE
+
+if __name__ == "__main__":
+    sys.exit(main())
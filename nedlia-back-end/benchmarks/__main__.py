@@ -0,0 +1,95 @@
+"""Benchmark runner.
+
+Usage:
+    poetry run python -m benchmarks run --output results.json
+    poetry run python -m benchmarks run -k "users_api.*" --baseline baseline.json
+    poetry run python -m benchmarks compare baseline.json results.json --threshold 0.1
+"""
+
+import argparse
+import asyncio
+import importlib
+import sys
+from typing import List
+
+from benchmarks.environment import configure_environment, init_in_memory_database
+from benchmarks.harness import (
+    BenchmarkResult,
+    compare,
+    load_medians,
+    print_comparisons,
+    print_results,
+    save_results,
+)
+
+SUITE_MODULES = [
+    "benchmarks.bench_value_objects",
+    "benchmarks.bench_mapping",
+    "benchmarks.bench_middleware",
+    "benchmarks.bench_users_api",
+]
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run benchmarks")
+    run.add_argument("-k", "--filter", help="Glob on benchmark names, e.g. 'mapping.*'")
+    run.add_argument("-o", "--output", help="Write results to this JSON file")
+    run.add_argument("--baseline", help="Compare against this results file")
+    run.add_argument("--threshold", type=float, default=0.10)
+
+    diff = commands.add_parser("compare", help="Compare two results files")
+    diff.add_argument("baseline")
+    diff.add_argument("current")
+    diff.add_argument("--threshold", type=float, default=0.10)
+
+    return parser.parse_args()
+
+async def run_suites(pattern: str) -> List[BenchmarkResult]:
+    """Import and run every suite module."""
+    from app.infrastructure.logging.config import configure_logging
+
+    configure_logging()
+    # Beanie documents cannot be constructed before initialization
+    await init_in_memory_database()
+    results: List[BenchmarkResult] = []
+    for module_name in SUITE_MODULES:
+        module = importlib.import_module(module_name)
+        results.extend(await module.suite.run(pattern))
+    return results
+
+def check_regressions(baseline_path: str, current_path: str, threshold: float) -> int:
+    """Print a comparison and return a process exit code."""
+    comparisons = compare(
+        load_medians(baseline_path),
+        load_medians(current_path),
+        threshold
+    )
+    print_comparisons(comparisons)
+    regressions = [item for item in comparisons if item.regressed]
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed by more than {threshold:.0%}")
+        return 1
+    return 0
+
+def main() -> int:
+    """Entry point."""
+    args = parse_args()
+    if args.command == "compare":
+        return check_regressions(args.baseline, args.current, args.threshold)
+
+    configure_environment()
+    results = asyncio.run(run_suites(args.filter))
+    print_results(results)
+
+    output = args.output or "benchmark-results.json"
+    save_results(results, output)
+    if args.baseline:
+        print()
+        return check_regressions(args.baseline, output, args.threshold)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+"""Entity/model mapping and DTO serialization benchmarks."""
+
+from app.application.dtos.user import UserResponseDTO
+from app.domain.entities.user import User
+from app.domain.value_objects.common import Email, Password, PhoneNumber
+from app.infrastructure.persistence.repositories.user import MongoUserRepository
+from benchmarks.harness import BenchmarkSuite
+
+suite = BenchmarkSuite("mapping")
+
+repository = MongoUserRepository()
+user = User(
+    email=Email("jane.doe@example.com"),
+    password=Password("Secret123"),
+    phone=PhoneNumber("+15551234567"),
+    first_name="Jane",
+    last_name="Doe",
+    okta_id="00u1234567890abcdef",
+    preferences={"theme": "dark", "notifications": {"email": True, "sms": False}},
+    metadata={"department": "engineering", "cost_center": "1234"},
+)
+model = repository._to_model(user)
+document = model.model_dump(by_alias=True)
+documents = [document] * 1000
+users = [user] * 100
+dto = UserResponseDTO.from_orm(user)
+
+@suite.bench(iterations=2000)
+def bench_to_model() -> None:
+    repository._to_model(user)
+
+@suite.bench(iterations=2000)
+def bench_to_entity() -> None:
+    repository._to_entity(model)
+
+@suite.bench(iterations=2000)
+def bench_from_document() -> None:
+    repository._from_document(document)
+
+@suite.bench(iterations=5, ops_per_call=1000)
+def bench_hydrate_1000_documents() -> None:
+    [repository._from_document(item) for item in documents]
+
+@suite.bench(iterations=2000)
+def bench_dto_from_entity() -> None:
+    UserResponseDTO.from_orm(user)
+
+@suite.bench(iterations=2000)
+def bench_dto_from_entity_trusted() -> None:
+    UserResponseDTO.from_entity(user)
+
+@suite.bench(iterations=2000)
+def bench_dto_to_json() -> None:
+    dto.model_dump_json()
+
+@suite.bench(iterations=50, ops_per_call=100)
+def bench_dto_list_of_100() -> None:
+    [UserResponseDTO.from_orm(item).model_dump_json() for item in users]
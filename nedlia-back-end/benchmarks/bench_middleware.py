@@ -0,0 +1,166 @@
+"""Middleware stack overhead benchmarks.
+
+Each variant serves the same trivial route, so differences between variants
+are the cost of the middleware alone.
+"""
+
+from fastapi import FastAPI
+from fastapi.middleware.cors import CORSMiddleware
+from redis import asyncio as aioredis
+
+from app.infrastructure.container import Container
+from app.infrastructure.middleware.concurrency import ConcurrencyLimitMiddleware
+from app.infrastructure.middleware.deadline import DeadlineMiddleware
+from app.infrastructure.middleware.logging import RequestLoggingMiddleware
+from app.infrastructure.middleware.metrics import PrometheusMiddleware
+from app.infrastructure.middleware.profiling import ProfilingMiddleware
+from app.infrastructure.middleware.rate_limit import RateLimitMiddleware
+from app.infrastructure.middleware.tracing import TracingMiddleware
+from app.infrastructure.profiling.profiler import ProfileStore, RequestProfiler
+from app.infrastructure.profiling.sampler import StackSampler
+from app.infrastructure.ratelimit.concurrency import AdaptiveConcurrencyLimiter
+from app.infrastructure.ratelimit.limiter import (
+    LocalRateLimiter,
+    RateLimit,
+    RateLimiter,
+    RedisRateLimiter,
+)
+from app.infrastructure.tracing.exporters import NoopSpanExporter
+from benchmarks.environment import call_asgi, expect_status
+from benchmarks.harness import BenchmarkSuite
+
+suite = BenchmarkSuite("middleware")
+
+def build_app(*middleware: type) -> FastAPI:
+    """Create an app with a single route and the given middleware."""
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping() -> dict:
+        return {"status": "ok"}
+
+    for middleware_class in middleware:
+        if middleware_class is CORSMiddleware:
+            app.add_middleware(
+                CORSMiddleware,
+                allow_origins=["*"],
+                allow_credentials=True,
+                allow_methods=["*"],
+                allow_headers=["*"],
+            )
+        else:
+            app.add_middleware(middleware_class)
+    return app
+
+def build_traced_app(sample_rate: float) -> FastAPI:
+    """Create an app with a single route and tracing at the given rate."""
+    app = build_app()
+    app.add_middleware(TracingMiddleware, sample_rate=sample_rate)
+    app.state.container = Container(span_exporter=NoopSpanExporter())
+    return app
+
+def build_profiled_app() -> FastAPI:
+    """Create an app with a single route and a profiler armed for slow requests."""
+    app = build_app()
+    app.add_middleware(ProfilingMiddleware)
+    app.state.container = Container(span_exporter=NoopSpanExporter())
+    # Requests never reach the threshold, so this measures the idle cost
+    app.state.container.profiler = RequestProfiler(
+        StackSampler(poll_interval=1.0),
+        ProfileStore("profiles"),
+        latency_threshold=10.0
+    )
+    return app
+
+def build_rate_limited_app(limiter: RateLimiter) -> FastAPI:
+    """Create an app with a single route and a limit it never reaches."""
+    app = build_app()
+    limit = RateLimit(count=10 ** 9, period=1.0)
+    app.add_middleware(
+        RateLimitMiddleware,
+        default_limit=limit,
+        route_limits={"GET /ping": limit}
+    )
+    app.state.container = Container(span_exporter=NoopSpanExporter())
+    app.state.container.rate_limiter = limiter
+    return app
+
+def build_concurrency_limited_app() -> FastAPI:
+    """Create an app with a single route and an adaptive concurrency limit."""
+    app = build_app()
+    app.add_middleware(ConcurrencyLimitMiddleware, priorities={"/health": "critical"})
+    app.state.container = Container(span_exporter=NoopSpanExporter())
+    app.state.container.concurrency_limiter = AdaptiveConcurrencyLimiter()
+    return app
+
+bare_app = build_app()
+cors_app = build_app(CORSMiddleware)
+logging_app = build_app(RequestLoggingMiddleware)
+metrics_app = build_app(PrometheusMiddleware)
+
+unsampled_app = build_traced_app(0.0)
+sampled_app = build_traced_app(1.0)
+profiled_app = build_profiled_app()
+local_limited_app = build_rate_limited_app(LocalRateLimiter())
+# Nothing listens on port 9, so every check after the first stays local;
+# this is the cost of a request while Redis is down
+fallback_limited_app = build_rate_limited_app(
+    RedisRateLimiter(
+        aioredis.from_url("redis://127.0.0.1:9", socket_connect_timeout=0.05),
+        fallback=LocalRateLimiter(),
+        fallback_seconds=3600.0
+    )
+)
+concurrency_limited_app = build_concurrency_limited_app()
+deadline_app = build_app()
+deadline_app.add_middleware(DeadlineMiddleware, default_timeout=10.0)
+# Same order as create_application
+full_app = build_app(CORSMiddleware, RequestLoggingMiddleware, PrometheusMiddleware)
+
+@suite.bench(iterations=1000)
+async def bench_bare() -> None:
+    expect_status(await call_asgi(bare_app, "GET", "/ping"), 200)
+
+@suite.bench(iterations=1000)
+async def bench_cors() -> None:
+    expect_status(await call_asgi(cors_app, "GET", "/ping"), 200)
+
+@suite.bench(iterations=1000)
+async def bench_request_logging() -> None:
+    expect_status(await call_asgi(logging_app, "GET", "/ping"), 200)
+
+@suite.bench(iterations=1000)
+async def bench_prometheus() -> None:
+    expect_status(await call_asgi(metrics_app, "GET", "/ping"), 200)
+
+@suite.bench(iterations=1000)
+async def bench_tracing_unsampled() -> None:
+    expect_status(await call_asgi(unsampled_app, "GET", "/ping"), 200)
+
+@suite.bench(iterations=1000)
+async def bench_tracing_sampled() -> None:
+    expect_status(await call_asgi(sampled_app, "GET", "/ping"), 200)
+
+@suite.bench(iterations=1000)
+async def bench_profiling_armed() -> None:
+    expect_status(await call_asgi(profiled_app, "GET", "/ping"), 200)
+
+@suite.bench(iterations=1000)
+async def bench_rate_limit_local() -> None:
+    expect_status(await call_asgi(local_limited_app, "GET", "/ping"), 200)
+
+@suite.bench(iterations=1000)
+async def bench_rate_limit_redis_down() -> None:
+    expect_status(await call_asgi(fallback_limited_app, "GET", "/ping"), 200)
+
+@suite.bench(iterations=1000)
+async def bench_concurrency_limit() -> None:
+    expect_status(await call_asgi(concurrency_limited_app, "GET", "/ping"), 200)
+
+@suite.bench(iterations=1000)
+async def bench_deadline() -> None:
+    expect_status(await call_asgi(deadline_app, "GET", "/ping"), 200)
+
+@suite.bench(iterations=1000)
+async def bench_full_stack() -> None:
+    expect_status(await call_asgi(full_app, "GET", "/ping"), 200)
@@ -0,0 +1,142 @@
+"""End-to-end benchmarks for the /users routes.
+
+Requests go through the real application, middleware and repository, backed
+by an in-process MongoDB stand-in. Timings therefore cover our own stack, not
+MongoDB's query execution.
+"""
+
+import itertools
+import json
+from typing import List
+
+from fastapi.dependencies.utils import solve_dependencies
+from starlette.requests import Request
+
+from app.application.dtos.user import UserCreateDTO
+from app.infrastructure.container import Container
+from app.presentation.api.v1.main import app
+from benchmarks.environment import call_asgi, expect_status
+from benchmarks.harness import BenchmarkSuite
+
+suite = BenchmarkSuite("users_api")
+
+SEED_USERS = 100
+PAGE_SIZE = 50
+DELETE_ITERATIONS = 20
+DELETE_ROUNDS = 5
+
+user_ids: List[str] = []
+delete_pool: List[str] = []
+get_user_route = next(
+    route for route in app.routes
+    if getattr(route, "path", None) == "/api/v1/users/{user_id}" and "GET" in route.methods
+)
+get_user_request = Request({
+    "type": "http",
+    "method": "GET",
+    "path": "/api/v1/users/unknown",
+    "path_params": {"user_id": "unknown"},
+    "query_string": b"",
+    "headers": [],
+    "app": app,
+})
+counter = itertools.count()
+phones = itertools.cycle(["+15550000001", "+15550000002"])
+toggles = itertools.cycle([True, False])
+
+async def create_users(prefix: str, count: int) -> List[str]:
+    """Create users through the service layer and return their IDs."""
+    service = app.state.container.user_service()
+    ids = []
+    for i in range(count):
+        user = await service.create_user(
+            UserCreateDTO(email=f"{prefix}{i}@example.com", password="Secret123")
+        )
+        ids.append(user.id)
+    return ids
+
+@suite.setup
+async def seed() -> None:
+    # Requests are driven without the lifespan, which normally builds this
+    app.state.container = Container()
+    user_ids.extend(await create_users("seed", SEED_USERS))
+    # One user per delete call, including the warm-up round
+    delete_count = DELETE_ITERATIONS * DELETE_ROUNDS + max(1, DELETE_ITERATIONS // 10)
+    delete_pool.extend(await create_users("doomed", delete_count))
+
+@suite.teardown
+async def close_container() -> None:
+    await app.state.container.close()
+
+@suite.bench(iterations=50, rounds=5)
+async def bench_create_user() -> None:
+    body = {"email": f"bench{next(counter)}@example.com", "password": "Secret123"}
+    expect_status(await call_asgi(app, "POST", "/api/v1/users", body), 201)
+
+@suite.bench(iterations=100)
+async def bench_get_user() -> None:
+    expect_status(await call_asgi(app, "GET", f"/api/v1/users/{user_ids[0]}"), 200)
+
+@suite.bench(iterations=1000)
+async def bench_resolve_dependencies() -> None:
+    # FastAPI's per-request dependency resolution for GET /users/{user_id}
+    await solve_dependencies(
+        request=get_user_request,
+        dependant=get_user_route.dependant,
+        body=None,
+        dependency_overrides_provider=app
+    )
+
+@suite.bench(iterations=10, rounds=5)
+async def bench_list_users() -> None:
+    path = f"/api/v1/users?limit={PAGE_SIZE}"
+    body = expect_status(await call_asgi(app, "GET", path), 200)
+    if len(json.loads(body)) != PAGE_SIZE:
+        raise RuntimeError("list_users returned an unexpected page size")
+
+@suite.bench(iterations=10, rounds=5)
+async def bench_list_users_sparse() -> None:
+    path = f"/api/v1/users?limit={PAGE_SIZE}&fields=id,email"
+    body = expect_status(await call_asgi(app, "GET", path), 200)
+    if len(json.loads(body)) != PAGE_SIZE:
+        raise RuntimeError("list_users returned an unexpected page size")
+
+@suite.bench(iterations=10, rounds=5)
+async def bench_list_users_with_total() -> None:
+    # The total comes from the count cache after the first call
+    path = f"/api/v1/users?limit={PAGE_SIZE}&include_total=true"
+    expect_status(await call_asgi(app, "GET", path), 200)
+
+@suite.bench(iterations=50)
+async def bench_count_users_filtered() -> None:
+    expect_status(await call_asgi(app, "GET", "/api/v1/users/count?email=seed1"), 200)
+
+@suite.bench(iterations=50)
+async def bench_search_users() -> None:
+    # Matches seed10 through seed19 and seed1 itself
+    path = "/api/v1/users/search?email=seed1&limit=20"
+    body = expect_status(await call_asgi(app, "GET", path), 200)
+    if len(json.loads(body)["items"]) != 11:
+        raise RuntimeError("search_users returned an unexpected number of results")
+
+@suite.bench(iterations=50)
+async def bench_update_user() -> None:
+    body = {"phone": next(phones)}
+    expect_status(await call_asgi(app, "PUT", f"/api/v1/users/{user_ids[1]}", body), 200)
+
+@suite.bench(iterations=50)
+async def bench_patch_user_preference() -> None:
+    # A one-key toggle, written as a targeted update of that key
+    body = {"preferences": {"notifications": {"email": next(toggles)}}}
+    expect_status(await call_asgi(app, "PATCH", f"/api/v1/users/{user_ids[3]}", body), 200)
+
+@suite.bench(iterations=50, ops_per_call=2)
+async def bench_deactivate_activate_user() -> None:
+    path = f"/api/v1/users/{user_ids[2]}"
+    expect_status(await call_asgi(app, "POST", f"{path}/deactivate"), 200)
+    expect_status(await call_asgi(app, "POST", f"{path}/activate"), 200)
+
+@suite.bench(iterations=DELETE_ITERATIONS, rounds=DELETE_ROUNDS)
+async def bench_delete_user() -> None:
+    path = f"/api/v1/users/{delete_pool.pop()}"
+    expect_status(await call_asgi(app, "DELETE", path), 204)
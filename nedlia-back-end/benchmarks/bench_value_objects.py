@@ -0,0 +1,55 @@
+"""Value object construction, validation and hashing benchmarks."""
+
+from app.domain.value_objects.common import Email, Password, PhoneNumber
+from benchmarks.harness import BenchmarkSuite
+
+suite = BenchmarkSuite("value_objects")
+
+email = Email("jane.doe@example.com")
+other_email = Email("jane.doe@example.com")
+password = Password("Secret123")
+phone = PhoneNumber("+15551234567")
+emails_by_key = {Email(f"user{i}@example.com"): i for i in range(1000)}
+emails_by_key[email] = -1
+
+@suite.bench(iterations=10000)
+def bench_email_create() -> None:
+    Email("jane.doe@example.com")
+
+@suite.bench(iterations=10000)
+def bench_email_from_trusted() -> None:
+    Email.from_trusted("jane.doe@example.com")
+
+@suite.bench(iterations=10000)
+def bench_email_validate() -> None:
+    email.validate()
+
+@suite.bench(iterations=10000)
+def bench_password_validate() -> None:
+    password.validate()
+
+@suite.bench(iterations=10000)
+def bench_phone_validate() -> None:
+    phone.validate()
+
+@suite.bench(iterations=10000)
+def bench_email_hash() -> None:
+    hash(email)
+
+@suite.bench(iterations=10000)
+def bench_email_eq() -> None:
+    email == other_email
+
+@suite.bench(iterations=10000)
+def bench_phone_hash() -> None:
+    hash(phone)
+
+@suite.bench(iterations=10000)
+def bench_email_dict_lookup() -> None:
+    emails_by_key[email]
+
+@suite.bench(iterations=1000, ops_per_call=100)
+def bench_email_set_membership() -> None:
+    seen = set()
+    for _ in range(100):
+        seen.add(Email("jane.doe@example.com"))
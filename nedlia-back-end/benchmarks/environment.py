@@ -0,0 +1,109 @@
+"""Process setup shared by the benchmark suites."""
+
+import asyncio
+import json
+import os
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# Settings are read at import time, so these must be set before the app loads.
+# Real values from the environment or .env take precedence.
+BENCHMARK_ENV = {
+    "DB_URL": "mongodb://localhost:27017",
+    "DB_NAME": "nedlia_benchmarks",
+    "REDIS_URL": "redis://localhost:6379",
+    # The in-process stand-in has no replica set to route reads to
+    "DB_BULK_READ_PREFERENCE": "primary",
+    "OKTA_ORG_URL": "https://benchmark.okta.com",
+    "OKTA_CLIENT_ID": "benchmark",
+    "OKTA_CLIENT_SECRET": "benchmark",
+    "OKTA_API_TOKEN": "benchmark",
+    "OKTA_ISSUER": "https://benchmark.okta.com/oauth2/default",
+    # bcrypt's minimum cost; production cost would dominate every create
+    "PASSWORD_HASH_ROUNDS": "4",
+    # Tracing wrappers stay in place, but no request is sampled
+    "TRACING_SAMPLE_RATE": "0",
+    # Benchmarks send far more requests than any limit allows; the
+    # middleware suite measures rate limiting on its own
+    "RATE_LIMIT_ENABLED": "false",
+    # Keep request logs off the terminal; set LOG_LEVEL=INFO to include them
+    "LOG_LEVEL": "WARNING",
+}
+
+def configure_environment() -> None:
+    """Provide settings the app needs to import without a real deployment."""
+    for key, value in BENCHMARK_ENV.items():
+        os.environ.setdefault(key, value)
+
+async def init_in_memory_database() -> Any:
+    """Initialize Beanie against an in-process MongoDB stand-in."""
+    from beanie import init_beanie
+    from mongomock_motor import AsyncMongoMockClient
+
+    from app.infrastructure.persistence.models.outbox import UserChangeModel
+    from app.infrastructure.persistence.models.user import UserModel
+
+    client = AsyncMongoMockClient()
+    await init_beanie(
+        database=client[os.environ["DB_NAME"]],
+        document_models=[UserModel, UserChangeModel]
+    )
+    return client
+
+async def call_asgi(
+    app: Any,
+    method: str,
+    path: str,
+    body: Optional[Dict[str, Any]] = None,
+    headers: Sequence[Tuple[bytes, bytes]] = ()
+) -> Tuple[int, bytes]:
+    """Drive an ASGI app directly, without an HTTP client in the way."""
+    path, _, query = path.partition("?")
+    payload = json.dumps(body).encode() if body is not None else b""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": query.encode(),
+        "headers": [
+            (b"host", b"benchmark"),
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(payload)).encode()),
+            *headers,
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("benchmark", 80),
+    }
+    request_sent = False
+    status = 0
+    chunks: List[bytes] = []
+
+    async def receive() -> Dict[str, Any]:
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": payload, "more_body": False}
+        # Never report a disconnect; middleware cancels this wait when done
+        await asyncio.Future()
+        return {"type": "http.disconnect"}
+
+    async def send(message: Dict[str, Any]) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, b"".join(chunks)
+
+def expect_status(response: Tuple[int, bytes], expected: int) -> bytes:
+    """Fail loudly if a benchmarked request took an error path."""
+    status, body = response
+    if status != expected:
+        raise RuntimeError(f"Expected HTTP {expected}, got {status}: {body[:200]!r}")
+    return body
@@ -0,0 +1,246 @@
+"""Minimal benchmark harness with JSON output and baseline comparison."""
+
+import asyncio
+import gc
+import inspect
+import json
+import platform
+import statistics
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from fnmatch import fnmatch
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+BenchFunc = Callable[[], Union[Any, Awaitable[Any]]]
+HookFunc = Callable[[], Union[None, Awaitable[None]]]
+
+@dataclass
+class BenchmarkCase:
+    """A single benchmarked callable."""
+
+    name: str
+    func: BenchFunc
+    iterations: int
+    rounds: int
+    ops_per_call: int = 1
+
+@dataclass
+class BenchmarkResult:
+    """Per-operation timing statistics, in nanoseconds."""
+
+    name: str
+    rounds: int
+    iterations: int
+    min_ns: float
+    median_ns: float
+    mean_ns: float
+    stdev_ns: float
+    max_ns: float
+
+    @property
+    def ops_per_sec(self) -> float:
+        """Throughput derived from the median."""
+        return 1e9 / self.median_ns if self.median_ns else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert result to dictionary."""
+        data = asdict(self)
+        data["ops_per_sec"] = round(self.ops_per_sec, 1)
+        return data
+
+@dataclass
+class Comparison:
+    """A benchmark present in both the baseline and the current run."""
+
+    name: str
+    baseline_ns: float
+    current_ns: float
+    threshold: float
+
+    @property
+    def change(self) -> float:
+        """Relative change of the median, positive when slower."""
+        return self.current_ns / self.baseline_ns - 1.0
+
+    @property
+    def regressed(self) -> bool:
+        """Whether the slowdown exceeds the threshold."""
+        return self.change > self.threshold
+
+async def _maybe_await(value: Any) -> Any:
+    """Await ``value`` if it is awaitable."""
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+class BenchmarkSuite:
+    """A named group of benchmarks sharing setup and teardown hooks."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._cases: List[BenchmarkCase] = []
+        self._setup: List[HookFunc] = []
+        self._teardown: List[HookFunc] = []
+
+    @property
+    def cases(self) -> List[BenchmarkCase]:
+        """Registered benchmark cases."""
+        return list(self._cases)
+
+    def bench(
+        self,
+        iterations: int = 1000,
+        rounds: int = 7,
+        ops_per_call: int = 1
+    ) -> Callable[[BenchFunc], BenchFunc]:
+        """Register a sync or async callable as a benchmark.
+
+        ``ops_per_call`` divides the timing when one call performs several
+        operations, e.g. a request pair.
+        """
+        def decorator(func: BenchFunc) -> BenchFunc:
+            name = func.__name__.removeprefix("bench_")
+            self._cases.append(
+                BenchmarkCase(
+                    f"{self.name}.{name}", func, iterations, rounds, ops_per_call
+                )
+            )
+            return func
+        return decorator
+
+    def setup(self, func: HookFunc) -> HookFunc:
+        """Register a hook run once before the suite's benchmarks."""
+        self._setup.append(func)
+        return func
+
+    def teardown(self, func: HookFunc) -> HookFunc:
+        """Register a hook run once after the suite's benchmarks."""
+        self._teardown.append(func)
+        return func
+
+    async def run(self, pattern: Optional[str] = None) -> List[BenchmarkResult]:
+        """Run every case whose name matches ``pattern``."""
+        cases = [
+            case for case in self._cases
+            if pattern is None or fnmatch(case.name, pattern)
+        ]
+        if not cases:
+            return []
+
+        for hook in self._setup:
+            await _maybe_await(hook())
+        try:
+            return [await run_case(case) for case in cases]
+        finally:
+            for hook in self._teardown:
+                await _maybe_await(hook())
+
+async def _time_round(case: BenchmarkCase, iterations: int) -> int:
+    """Time ``iterations`` calls and return elapsed nanoseconds."""
+    func = case.func
+    if asyncio.iscoroutinefunction(func):
+        start = time.perf_counter_ns()
+        for _ in range(iterations):
+            await func()
+        return time.perf_counter_ns() - start
+
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        func()
+    return time.perf_counter_ns() - start
+
+async def run_case(case: BenchmarkCase) -> BenchmarkResult:
+    """Warm up, then time each round with the garbage collector paused."""
+    await _time_round(case, max(1, case.iterations // 10))
+
+    samples: List[float] = []
+    for _ in range(case.rounds):
+        gc.collect()
+        gc.disable()
+        try:
+            elapsed = await _time_round(case, case.iterations)
+        finally:
+            gc.enable()
+        samples.append(elapsed / (case.iterations * case.ops_per_call))
+
+    return BenchmarkResult(
+        name=case.name,
+        rounds=case.rounds,
+        iterations=case.iterations,
+        min_ns=min(samples),
+        median_ns=statistics.median(samples),
+        mean_ns=statistics.fmean(samples),
+        stdev_ns=statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        max_ns=max(samples),
+    )
+
+def results_to_json(results: List[BenchmarkResult]) -> Dict[str, Any]:
+    """Wrap results with enough metadata to judge comparability."""
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "system": platform.system(),
+        },
+        "results": [result.to_dict() for result in results],
+    }
+
+def save_results(results: List[BenchmarkResult], path: str) -> None:
+    """Write results to a JSON file."""
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(results_to_json(results), handle, indent=2)
+
+def load_medians(path: str) -> Dict[str, float]:
+    """Load median timings keyed by benchmark name."""
+    with open(path, encoding="utf-8") as handle:
+        data = json.load(handle)
+    return {result["name"]: result["median_ns"] for result in data["results"]}
+
+def compare(
+    baseline: Dict[str, float],
+    current: Dict[str, float],
+    threshold: float
+) -> List[Comparison]:
+    """Compare medians of benchmarks present in both runs."""
+    return [
+        Comparison(name, baseline[name], current[name], threshold)
+        for name in sorted(baseline.keys() & current.keys())
+    ]
+
+def format_duration(ns: float) -> str:
+    """Format nanoseconds with a readable unit."""
+    for unit, scale in (("s", 1e9), ("ms", 1e6), ("us", 1e3)):
+        if ns >= scale:
+            return f"{ns / scale:.2f}{unit}"
+    return f"{ns:.0f}ns"
+
+def print_results(results: List[BenchmarkResult]) -> None:
+    """Print results as a fixed-width table."""
+    header = f"{'benchmark':<44} {'median':>10} {'min':>10} {'stdev':>10} {'ops/s':>12}"
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        print(
+            f"{result.name:<44} "
+            f"{format_duration(result.median_ns):>10} "
+            f"{format_duration(result.min_ns):>10} "
+            f"{format_duration(result.stdev_ns):>10} "
+            f"{result.ops_per_sec:>12,.0f}"
+        )
+
+def print_comparisons(comparisons: List[Comparison]) -> None:
+    """Print baseline comparisons, flagging regressions."""
+    header = f"{'benchmark':<44} {'baseline':>10} {'current':>10} {'change':>8}"
+    print(header)
+    print("-" * len(header))
+    for item in comparisons:
+        flag = "  REGRESSION" if item.regressed else ""
+        print(
+            f"{item.name:<44} "
+            f"{format_duration(item.baseline_ns):>10} "
+            f"{format_duration(item.current_ns):>10} "
+            f"{item.change:>+8.1%}{flag}"
+        )
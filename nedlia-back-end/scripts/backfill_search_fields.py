@@ -0,0 +1,84 @@
+"""Fill in the normalized search fields on existing user profiles.
+
+The repository writes these fields whenever a user is saved; profiles
+written before search existed lack them and do not show up in searches
+until this has run. Safe to rerun: only documents missing the fields are
+updated.
+
+Usage:
+    poetry run python -m scripts.backfill_search_fields --url mongodb://localhost:27017
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from typing import Any, Dict, List
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+
+from app.infrastructure.persistence.models.user import UserModel
+from app.infrastructure.persistence.search import normalize
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--url",
+        default=os.environ.get("DB_URL", "mongodb://localhost:27017"),
+        help="MongoDB connection string (default: $DB_URL)",
+    )
+    parser.add_argument(
+        "--database",
+        default=os.environ.get("DB_NAME", "nedlia_profiles"),
+        help="Database holding the user profiles (default: $DB_NAME)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1000,
+        help="Documents updated per bulk write",
+    )
+    return parser.parse_args()
+
+def search_update(document: Dict[str, Any]) -> UpdateOne:
+    """Update setting a document's search fields from its stored values."""
+    email = document["email"]
+    return UpdateOne({"_id": document["_id"]}, {"$set": {
+        "email_normalized": normalize(email),
+        "first_name_normalized": normalize(document.get("first_name", "")),
+        "last_name_normalized": normalize(document.get("last_name", "")),
+        "email_domain": normalize(email.split("@")[1]),
+    }})
+
+async def main() -> int:
+    """Backfill and report; return a process exit code."""
+    args = parse_args()
+    client = AsyncIOMotorClient(args.url)
+    collection = client[args.database][UserModel.Settings.name]
+
+    updated = 0
+    try:
+        cursor = collection.find(
+            {"email_normalized": {"$exists": False}},
+            projection={"email": 1, "first_name": 1, "last_name": 1},
+        )
+        batch: List[UpdateOne] = []
+        async for document in cursor:
+            batch.append(search_update(document))
+            if len(batch) >= args.batch_size:
+                result = await collection.bulk_write(batch, ordered=False)
+                updated += result.modified_count
+                batch = []
+        if batch:
+            result = await collection.bulk_write(batch, ordered=False)
+            updated += result.modified_count
+    finally:
+        client.close()
+
+    print(f"Updated {updated} profiles")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
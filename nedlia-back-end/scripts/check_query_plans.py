@@ -0,0 +1,115 @@
+"""Fail when a repository query stops using an index.
+
+Seeds a throwaway database on a local MongoDB, creates the indexes declared
+on the document models and runs ``explain()`` for every repository query
+shape.
+
+Usage:
+    poetry run python -m scripts.check_query_plans --url mongodb://localhost:27017
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from typing import List
+
+from beanie import init_beanie
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.infrastructure.persistence.models.outbox import UserChangeModel
+from app.infrastructure.persistence.models.route import UserRouteModel
+from app.infrastructure.persistence.models.user import UserModel
+from app.infrastructure.persistence.query_plans import (
+    PlanReport,
+    check_query_plans,
+    seed_database,
+)
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--url",
+        default=os.environ.get("DB_URL", "mongodb://localhost:27017"),
+        help="MongoDB connection string (default: $DB_URL)",
+    )
+    parser.add_argument(
+        "--database",
+        default="nedlia_query_plans",
+        help="Scratch database to seed; it is dropped before and after the run",
+    )
+    parser.add_argument(
+        "--documents",
+        type=int,
+        default=10000,
+        help="Number of user profiles, and of outbox changes, to seed",
+    )
+    parser.add_argument(
+        "--max-docs-ratio",
+        type=float,
+        default=1.0,
+        help="Maximum documents examined per document returned",
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Print reports as JSON instead of a table",
+    )
+    parser.add_argument(
+        "--keep",
+        action="store_true",
+        help="Keep the seeded database after the run",
+    )
+    return parser.parse_args()
+
+def print_table(reports: List[PlanReport]) -> None:
+    """Print reports as a fixed-width table."""
+    header = f"{'shape':<16} {'plan':<28} {'index':<14} {'keys':>7} {'docs':>7} {'ret':>5}  result"
+    print(header)
+    print("-" * len(header))
+    for report in reports:
+        print(
+            f"{report.shape:<16} "
+            f"{' > '.join(report.stages):<28} "
+            f"{','.join(report.index_names) or '-':<14} "
+            f"{report.keys_examined:>7} "
+            f"{report.docs_examined:>7} "
+            f"{report.returned:>5}  "
+            f"{'ok' if report.passed else 'FAIL: ' + '; '.join(report.violations)}"
+        )
+
+async def main() -> int:
+    """Seed, explain and report; return a process exit code."""
+    args = parse_args()
+    client = AsyncIOMotorClient(args.url)
+    database = client[args.database]
+    await client.drop_database(args.database)
+
+    try:
+        # Creates the indexes declared on the document models
+        await init_beanie(
+            database=database,
+            document_models=[UserModel, UserChangeModel, UserRouteModel]
+        )
+        samples = await seed_database(database, args.documents)
+        reports = await check_query_plans(
+            database,
+            samples,
+            max_docs_ratio=args.max_docs_ratio,
+        )
+    finally:
+        if not args.keep:
+            await client.drop_database(args.database)
+        client.close()
+
+    if args.json:
+        print(json.dumps([report.to_dict() for report in reports], indent=2))
+    else:
+        print_table(reports)
+
+    return 0 if all(report.passed for report in reports) else 1
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
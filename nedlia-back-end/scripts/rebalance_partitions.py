@@ -0,0 +1,265 @@
+"""Move user profiles onto the partitions their IDs hash to.
+
+Run after adding or removing partitions in DB_PARTITIONS, or with --drain to
+move an unpartitioned deployment's profiles onto partitions. Profiles found
+anywhere but on their own partition are copied there, unless a copy at least
+as recent is already there, and then removed from where they were found.
+Lookup table entries are rebuilt from every profile seen. Reports what it
+would do unless --apply is given.
+
+Rendezvous hashing only moves the profiles a changed partition wins or
+loses. To rebalance while the service runs:
+
+1. Run with the new layout, --apply and --keep-source before deploying it,
+   so that moved profiles exist on both their old and new partitions.
+2. Deploy the new layout.
+3. Run again with --apply; profiles changed in between are copied if the
+   old copy is newer, and old copies are removed. Profiles deleted in
+   between come back and must be deleted again.
+
+Usage:
+    poetry run python -m scripts.rebalance_partitions \\
+        --partitions '{"p0": "mongodb://localhost:27018", "p1": "mongodb://localhost:27019"}' \\
+        --drain mongodb://localhost:27017 --apply
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Set, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from app.infrastructure.persistence.models.route import UserRouteModel
+from app.infrastructure.persistence.models.user import UserModel
+from app.infrastructure.persistence.partitions import (
+    create_user_indexes,
+    partition_name,
+    route_keys,
+)
+
+def parse_args() -> argparse.Namespace:
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description=__doc__.splitlines()[0],
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "--partitions",
+        default=os.environ.get("DB_PARTITIONS", ""),
+        help="Partition names and connection strings as JSON (default: $DB_PARTITIONS)",
+    )
+    parser.add_argument(
+        "--drain",
+        action="append",
+        default=[],
+        metavar="URL",
+        help="Deployment to move every profile off, such as a removed partition; repeatable",
+    )
+    parser.add_argument(
+        "--url",
+        default=os.environ.get("DB_URL", "mongodb://localhost:27017"),
+        help="MongoDB holding the lookup table (default: $DB_URL)",
+    )
+    parser.add_argument(
+        "--database",
+        default=os.environ.get("DB_NAME", "nedlia_profiles"),
+        help="Database holding the user profiles on every deployment (default: $DB_NAME)",
+    )
+    parser.add_argument(
+        "--apply",
+        action="store_true",
+        help="Move profiles and write lookup entries instead of only reporting",
+    )
+    parser.add_argument(
+        "--keep-source",
+        action="store_true",
+        help="Copy profiles without removing them from where they were found",
+    )
+    parser.add_argument(
+        "--prune-routes",
+        action="store_true",
+        help="Also remove lookup entries no profile holds; keeps every key in memory",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1000,
+        help="Lookup entries written per bulk write",
+    )
+    return parser.parse_args()
+
+@dataclass
+class RebalanceReport:
+    """What a rebalancing run found and did."""
+
+    scanned: int = 0
+    # Misplaced profiles by where they were found and where they belong
+    misplaced: Counter = field(default_factory=Counter)
+    moved: int = 0
+    # Misplaced profiles whose partition already had a copy as recent
+    superseded: int = 0
+    # Profiles changed while being moved; the next run picks them up
+    changed: int = 0
+    # Profiles whose email address or Okta ID another profile holds there
+    conflicts: List[str] = field(default_factory=list)
+    routes: int = 0
+    pruned_routes: int = 0
+
+async def move(
+    document: Mapping[str, Any],
+    source: AsyncIOMotorCollection,
+    target: AsyncIOMotorCollection,
+    report: RebalanceReport,
+    keep_source: bool
+) -> None:
+    """Copy a profile to its partition, then remove it from its source."""
+    user_id = document["_id"]
+    updated_at = document.get("updated_at") or datetime.min
+    try:
+        # Replaces an older copy; a newer one fails the filter, and the
+        # upsert then collides with it on _id
+        await target.replace_one(
+            {"_id": user_id, "updated_at": {"$lt": updated_at}}, document, upsert=True
+        )
+        report.moved += 1
+    except DuplicateKeyError as error:
+        if "_id" not in (error.details or {}).get("keyPattern", {"_id": 1}):
+            report.conflicts.append(user_id)
+            return
+        report.superseded += 1
+    if not keep_source:
+        result = await source.delete_one({"_id": user_id, "updated_at": document.get("updated_at")})
+        if not result.deleted_count:
+            report.changed += 1
+
+async def rebalance(
+    partitions: Mapping[str, AsyncIOMotorCollection],
+    drained: Mapping[str, AsyncIOMotorCollection],
+    routes: AsyncIOMotorCollection,
+    apply: bool = False,
+    keep_source: bool = False,
+    prune_routes: bool = False,
+    batch_size: int = 1000
+) -> RebalanceReport:
+    """Move misplaced profiles and rebuild the lookup table."""
+    names = sorted(partitions)
+    report = RebalanceReport()
+    seen: Set[str] = set()
+    batch: List[UpdateOne] = []
+    now = datetime.utcnow()
+
+    sources: List[Tuple[str, AsyncIOMotorCollection]] = [
+        *((name, partitions[name]) for name in names),
+        *drained.items(),
+    ]
+    for source_name, source in sources:
+        async for document in source.find({}):
+            report.scanned += 1
+            user_id = document["_id"]
+            keys = route_keys(document["email"], document.get("okta_id"))
+            if prune_routes:
+                seen.update(keys)
+            if apply:
+                batch.extend(
+                    UpdateOne(
+                        {"_id": key},
+                        {"$set": {"user_id": user_id}, "$setOnInsert": {"created_at": now}},
+                        upsert=True
+                    )
+                    for key in keys
+                )
+            if len(batch) >= batch_size:
+                await routes.bulk_write(batch, ordered=False)
+                report.routes += len(batch)
+                batch = []
+            target = partition_name(user_id, names)
+            if target == source_name:
+                continue
+            report.misplaced[(source_name, target)] += 1
+            if apply:
+                await move(document, source, partitions[target], report, keep_source)
+    if batch:
+        await routes.bulk_write(batch, ordered=False)
+        report.routes += len(batch)
+
+    if prune_routes:
+        stale = [route["_id"] async for route in routes.find({}, projection={"_id": 1})]
+        stale = [key for key in stale if key not in seen]
+        report.pruned_routes = len(stale)
+        if apply:
+            for start in range(0, len(stale), batch_size):
+                await routes.delete_many({"_id": {"$in": stale[start:start + batch_size]}})
+    return report
+
+def print_report(report: RebalanceReport, apply: bool) -> None:
+    """Print what was found, and what was done if anything."""
+    print(f"Scanned {report.scanned} profiles")
+    for (source, target), count in sorted(report.misplaced.items()):
+        print(f"  {count:>8} on {source} belong on {target}")
+    if not apply:
+        print("Dry run; pass --apply to move them")
+        if report.pruned_routes:
+            print(f"Would remove {report.pruned_routes} stale lookup entries")
+        return
+    print(
+        f"Moved {report.moved}, already moved {report.superseded}, "
+        f"changed meanwhile {report.changed}"
+    )
+    print(f"Wrote {report.routes} lookup entries, removed {report.pruned_routes} stale ones")
+    for user_id in report.conflicts:
+        print(f"  Not moved, unique attribute taken on its partition: {user_id}")
+
+async def main() -> int:
+    """Rebalance and report; return a process exit code."""
+    args = parse_args()
+    layout: Dict[str, str] = json.loads(args.partitions or "{}")
+    if not layout:
+        print("No partitions configured; pass --partitions or set DB_PARTITIONS", file=sys.stderr)
+        return 2
+    if set(args.drain) & set(layout.values()):
+        # Its profiles would be removed right after being kept in place
+        print("A drained deployment cannot also be a partition", file=sys.stderr)
+        return 2
+
+    clients = [AsyncIOMotorClient(args.url)]
+    routes = clients[0][args.database][UserRouteModel.Settings.name]
+    partitions: Dict[str, AsyncIOMotorCollection] = {}
+    for name, url in layout.items():
+        clients.append(AsyncIOMotorClient(url))
+        partitions[name] = clients[-1][args.database][UserModel.Settings.name]
+    drained: Dict[str, AsyncIOMotorCollection] = {}
+    for url in args.drain:
+        clients.append(AsyncIOMotorClient(url))
+        drained[url] = clients[-1][args.database][UserModel.Settings.name]
+
+    try:
+        if args.apply:
+            # Partitions not yet used by the service lack the indexes
+            for collection in partitions.values():
+                await create_user_indexes(collection)
+        report = await rebalance(
+            partitions,
+            drained,
+            routes,
+            apply=args.apply,
+            keep_source=args.keep_source,
+            prune_routes=args.prune_routes,
+            batch_size=args.batch_size,
+        )
+    finally:
+        for client in clients:
+            client.close()
+
+    print_report(report, args.apply)
+    return 1 if report.conflicts else 0
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))